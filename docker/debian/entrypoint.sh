@@ -44,8 +44,11 @@ for worker in $(seq 1 $EXECUTION_WORKERS)
 do
     python /code/manage.py rqworker executions-queue &
 done
-python /code/manage.py rqworker findings-queue &
-python /code/manage.py rqworker emails-queue &
+python /code/manage.py rqworker findings-queue --with-scheduler &
+python /code/manage.py rqworker enrichment-queue &
+python /code/manage.py rqworker emails-queue --with-scheduler &
+python /code/manage.py rqworker telegram-queue --with-scheduler &
+python /code/manage.py rqworker defectdojo-queue --with-scheduler &
 
 # Run Telegram bot
 python /code/manage.py telegram_bot &
@@ -1,6 +1,7 @@
+import json
 import logging
 from datetime import datetime, timedelta
-from typing import Any, Tuple
+from typing import Any, Dict, List, Tuple
 from urllib.parse import urlparse
 
 import requests
@@ -20,6 +21,8 @@ SEVERITY_MAPPING = {
     str(Severity.CRITICAL): 'S5',
 }
 
+GENERIC_FINDINGS_IMPORT = 'Generic Findings Import'                             # Defect-Dojo generic JSON parser
+
 logger = logging.getLogger()                                                    # Rekono logger
 
 
@@ -108,6 +111,17 @@ class DefectDojo:
         else:
             return False, response                                              # Failed request
 
+    def is_not_found(self, response: Any) -> bool:
+        '''Check if a failed request is caused by a Defect-Dojo entity that doesn't exist.
+
+        Args:
+            response (Any): Response of the failed request
+
+        Returns:
+            bool: Indicate if Defect-Dojo response is HTTP 404
+        '''
+        return getattr(response, 'status_code', None) == 404
+
     def is_available(self) -> bool:
         '''Check if Defect-Dojo integration is available.
 
@@ -264,23 +278,48 @@ class DefectDojo:
         data.update({'product': product})
         return self.request('POST', '/endpoints/', data=data, expected_status=201)
 
-    def create_finding(self, test: int, finding: Any) -> Tuple[bool, dict]:
-        '''Create new Defect-Dojo finding from Rekono finding.
+    def get_generic_finding(self, finding: Any) -> Dict[str, Any]:
+        '''Get Defect-Dojo finding in the Generic Findings Import format from Rekono finding.
 
         Args:
-            test (int): Test Id where the finding will be created
-            finding (Finding): Rekono finding to create in Defect-Dojo
+            finding (Finding): Rekono finding to import in Defect-Dojo
 
         Returns:
-            Tuple[bool, dict]: Indicates if request was successful or not (bool), and return the response body (dict)
+            Dict[str, Any]: Defect-Dojo finding data
         '''
         data = finding.defect_dojo()
+        cve = data.pop('cve', None)
+        if cve:
+            data['vulnerability_ids'] = [cve]                                   # CVE field in Defect-Dojo
         data.update({
-            'test': test,
             'numerical_severity': SEVERITY_MAPPING[data.get('severity')],       # Mapping between severity values
             'active': True                                                      # Always created as active
         })
-        return self.request('POST', '/findings/', data=data, expected_status=201)
+        return {k: v for k, v in data.items() if v is not None}
+
+    def reimport_findings(self, test: int, findings: List[Any]) -> Tuple[bool, dict]:
+        '''Import Rekono findings in a Defect-Dojo test, using only one Generic Findings Import report.
+
+        Args:
+            test (int): Test Id where the findings will be imported
+            findings (List[Finding]): Rekono findings to import in Defect-Dojo
+
+        Returns:
+            Tuple[bool, dict]: Indicates if request was successful or not (bool), and return the response body (dict)
+        '''
+        data = {
+            'scan_type': GENERIC_FINDINGS_IMPORT,
+            'test': test,
+            'tags': [self.get_system().defect_dojo_tag],                        # Includes the configurated tag
+            'minimum_severity': str(Severity.INFO),
+            'active': True,                                                     # Always imported as active
+            'close_old_findings': False                                         # Test includes other executions
+        }
+        report = json.dumps({'findings': [self.get_generic_finding(f) for f in findings]})
+        files = {
+            'file': ('rekono.json', report, 'application/json')                 # Generic Findings Import report
+        }
+        return self.request('POST', '/reimport-scan/', data=data, files=files, expected_status=201)
 
     def import_scan(self, engagement: int, execution: Any) -> Tuple[bool, dict]:
         '''Import Rekono execution output in Defect-Dojo.
@@ -0,0 +1,104 @@
+import logging
+from typing import Any, Callable, Optional
+
+import django_rq
+from redis.exceptions import RedisError
+
+from rekono.settings import DD_CACHE_TTL
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+PRODUCT = 'product'                                                             # Existing products by Id
+ENGAGEMENT = 'engagement'                                                       # Existing engagements by Id
+TEST_TYPE = 'test-type'                                                         # Test type Id by name
+TEST = 'test'                                                                   # Rekono test Id by engagement Id
+
+
+def get_cache_key(entity: str, key: Any) -> str:
+    '''Get Redis key to save a Defect-Dojo lookup.
+
+    Args:
+        entity (str): Defect-Dojo entity
+        key (Any): Lookup key
+
+    Returns:
+        str: Redis key for the Defect-Dojo lookup
+    '''
+    return f'rekono:defectdojo:{entity}:{key}'
+
+
+def get(entity: str, key: Any) -> Optional[int]:
+    '''Get Defect-Dojo lookup from cache.
+
+    Args:
+        entity (str): Defect-Dojo entity
+        key (Any): Lookup key
+
+    Returns:
+        Optional[int]: Defect-Dojo Id, or None if it isn't in cache
+    '''
+    try:
+        value = django_rq.get_connection('defectdojo-queue').get(get_cache_key(entity, key))
+    except RedisError:                                                          # Cache not available
+        return None
+    return int(value) if value is not None else None
+
+
+def save(entity: str, key: Any, value: int) -> None:
+    '''Save Defect-Dojo lookup in cache.
+
+    Args:
+        entity (str): Defect-Dojo entity
+        key (Any): Lookup key
+        value (int): Defect-Dojo Id
+    '''
+    if DD_CACHE_TTL <= 0:                                                       # Cache disabled
+        return
+    try:
+        django_rq.get_connection('defectdojo-queue').set(get_cache_key(entity, key), value, ex=DD_CACHE_TTL)
+    except RedisError:                                                          # Cache not available
+        logger.warning(f'[Defect-Dojo] Lookup of {entity} {key} can\'t be saved in cache')
+
+
+def invalidate(entity: str, key: Any) -> None:
+    '''Remove Defect-Dojo lookup from cache, because the entity isn't found in Defect-Dojo anymore.
+
+    Args:
+        entity (str): Defect-Dojo entity
+        key (Any): Lookup key
+    '''
+    try:
+        django_rq.get_connection('defectdojo-queue').delete(get_cache_key(entity, key))
+        logger.info(f'[Defect-Dojo] Lookup of {entity} {key} has been removed from cache')
+    except RedisError:                                                          # Cache not available
+        logger.warning(f'[Defect-Dojo] Lookup of {entity} {key} can\'t be removed from cache')
+
+
+def clear() -> None:
+    '''Remove all the Defect-Dojo lookups from cache.'''
+    connection = django_rq.get_connection('defectdojo-queue')
+    try:
+        keys = list(connection.scan_iter(get_cache_key('*', '*')))
+        if keys:
+            connection.delete(*keys)
+    except RedisError:                                                          # Cache not available
+        logger.warning('[Defect-Dojo] Lookups can\'t be removed from cache')
+
+
+def exists(entity: str, id: int, checker: Callable) -> bool:
+    '''Check if a Defect-Dojo entity exists, using the cache before requesting it to Defect-Dojo.
+
+    Args:
+        entity (str): Defect-Dojo entity
+        id (int): Entity Id
+        checker (Callable): Defect-Dojo client method to get the entity
+
+    Returns:
+        bool: Indicate if the entity exists
+    '''
+    if get(entity, id) is not None:
+        return True
+    found, _ = checker(id)
+    if found:
+        save(entity, id, id)
+    return found
@@ -0,0 +1,195 @@
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import django_rq
+import requests
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+from django_rq import job
+from executions.models import DefectDojoSync, Execution
+from findings.models import (OSINT, Credential, Exploit, Finding, Host, Path,
+                             Port, Technology, Vulnerability)
+from input_types.utils import get_inputs_from_references, get_references
+from tasks.enums import Status
+
+from defectdojo.exceptions import DefectDojoException
+from defectdojo.reporter import ReportRun, report
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+SCHEDULED_KEY = 'rekono:defectdojo:scheduled'                                   # Flag of the scheduled retry
+SYNC_BATCH_SIZE = 50                                                            # Max executions claimed by each query
+SYNC_LEASE = timedelta(minutes=30)                                              # Time to sync a batch before reclaim
+SYNC_BACKOFF = 60                                                               # Seconds before the first retry
+MAX_ATTEMPTS = 8                                                                # Max attempts to sync an execution
+FINDING_MODELS = [OSINT, Host, Port, Path, Technology, Credential, Vulnerability, Exploit]
+
+
+def producer(execution: Execution, findings: List[Finding]) -> None:
+    '''Save the execution findings in the Defect-Dojo outbox, and enqueue a job in the Defect-Dojo queue to import them.
+
+    Args:
+        execution (Execution): Execution to import in Defect-Dojo
+        findings (List[Finding]): Findings to import
+    '''
+    DefectDojoSync.objects.update_or_create(
+        execution=execution,
+        defaults={'findings': get_references(findings), 'attempts': 0, 'next_attempt': timezone.now()}
+    )
+    drain_producer()
+    logger.info(f'[Defect-Dojo] Execution {execution.id} has been enqueued for synchronization')
+
+
+def drain_producer() -> None:
+    '''Enqueue a job in the Defect-Dojo queue to import the pending executions.'''
+    django_rq.get_queue('defectdojo-queue').enqueue(consumer)
+
+
+def backfill(projects: List[int] = []) -> int:
+    '''Save in the Defect-Dojo outbox the completed executions not imported yet, using bulk queries.
+
+    Args:
+        projects (List[int], optional): Project Ids to backfill. Defaults to [], all the synchronized projects.
+
+    Returns:
+        int: Number of executions enqueued for synchronization
+    '''
+    executions = Execution.objects.filter(
+        status=Status.COMPLETED,
+        imported_in_defectdojo=False,
+        task__target__project__defectdojo_synchronization=True,
+        defectdojo_sync__isnull=True
+    )
+    if projects:
+        executions = executions.filter(task__target__project__in=projects)
+    now = timezone.now()
+    syncs = DefectDojoSync.objects.bulk_create(                                 # All findings of each execution
+        [DefectDojoSync(execution_id=id, next_attempt=now) for id in executions.values_list('id', flat=True)],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    if syncs:
+        drain_producer()
+    logger.info(f'[Defect-Dojo] {len(syncs)} executions have been enqueued for synchronization')
+    return len(syncs)
+
+
+def retry_failed() -> int:
+    '''Enqueue again the executions whose synchronization reached the max attempts.
+
+    Returns:
+        int: Number of executions enqueued for synchronization
+    '''
+    count = DefectDojoSync.objects.filter(next_attempt__isnull=True).update(attempts=0, next_attempt=timezone.now())
+    if count:
+        drain_producer()
+    return count
+
+
+def get_progress() -> Dict[str, Any]:
+    '''Get progress of the Defect-Dojo synchronization.
+
+    Returns:
+        Dict[str, Any]: Pending and failed executions, and age in seconds of the oldest pending execution
+    '''
+    progress = DefectDojoSync.objects.aggregate(
+        pending=Count('id', filter=Q(next_attempt__isnull=False)),
+        failed=Count('id', filter=Q(next_attempt__isnull=True)),
+        oldest=Min('created', filter=Q(next_attempt__isnull=False))
+    )
+    oldest = progress.pop('oldest')
+    progress['lag'] = int((timezone.now() - oldest).total_seconds()) if oldest else 0
+    return progress
+
+
+def claim() -> List[DefectDojoSync]:
+    '''Get a batch of executions pending of synchronization, leasing them so other workers don't sync them too.
+
+    Returns:
+        List[DefectDojoSync]: Pending synchronizations
+    '''
+    now = timezone.now()
+    with transaction.atomic():
+        syncs = list(
+            DefectDojoSync.objects.select_for_update(skip_locked=True, of=('self',)).select_related(
+                'execution__task__target__project', 'execution__tool'
+            ).filter(next_attempt__lte=now).order_by('next_attempt')[:SYNC_BATCH_SIZE]
+        )
+        DefectDojoSync.objects.filter(pk__in=[s.id for s in syncs]).update(next_attempt=now + SYNC_LEASE)
+    return syncs
+
+
+def get_findings(sync: DefectDojoSync) -> List[Finding]:
+    '''Get findings to import in Defect-Dojo.
+
+    Args:
+        sync (DefectDojoSync): Pending synchronization
+
+    Returns:
+        List[Finding]: Saved findings, or all the execution findings if they aren't saved
+    '''
+    if sync.findings is not None:
+        return get_inputs_from_references([(model, id) for model, id in sync.findings], sync.execution.task.target_id)
+    return [f for model in FINDING_MODELS for f in model.objects.filter(executions=sync.execution)]
+
+
+def synchronize(sync: DefectDojoSync, run: ReportRun) -> None:
+    '''Import one execution in Defect-Dojo. If it fails, the synchronization is retried later with backoff.
+
+    Args:
+        sync (DefectDojoSync): Pending synchronization
+        run (ReportRun): Report run to share lookups with other executions
+    '''
+    if not sync.execution.task.target.project.defectdojo_synchronization:
+        sync.delete()                                                           # Synchronization has been disabled
+        return
+    try:
+        report(sync.execution, get_findings(sync), run)                        # Import execution in Defect-Dojo
+        sync.delete()
+        return
+    except DefectDojoException as ex:
+        sync.last_error = str(ex.args[0])
+    except requests.exceptions.RequestException as ex:                          # Defect-Dojo connection errors
+        sync.last_error = str(ex)
+    except Exception as ex:                                                     # Unexpected errors
+        sync.last_error = str(ex) or ex.__class__.__name__
+    sync.attempts += 1
+    sync.next_attempt = None                                                    # Max attempts reached
+    if sync.attempts < MAX_ATTEMPTS:
+        sync.next_attempt = timezone.now() + timedelta(seconds=SYNC_BACKOFF * 2 ** (sync.attempts - 1))
+    sync.save(update_fields=['attempts', 'next_attempt', 'last_error'])
+    logger.warning(f'[Defect-Dojo] Execution {sync.execution.id} can\'t be synchronized: {sync.last_error}')
+
+
+def schedule() -> None:
+    '''Schedule a job to retry the next pending synchronization, if it isn't scheduled yet.'''
+    next_attempt = DefectDojoSync.objects.filter(
+        next_attempt__isnull=False
+    ).aggregate(Min('next_attempt'))['next_attempt__min']
+    if not next_attempt:
+        return
+    delay = max(1, int((next_attempt - timezone.now()).total_seconds()) + 1)
+    # Only one retry is scheduled at the same time, although there are multiple workers
+    if django_rq.get_connection('defectdojo-queue').set(SCHEDULED_KEY, '1', nx=True, ex=delay):
+        django_rq.get_queue('defectdojo-queue').enqueue_in(timedelta(seconds=delay), consumer)
+
+
+@job('defectdojo-queue')
+def consumer() -> None:
+    '''Import the pending executions in Defect-Dojo by batches, sharing the Defect-Dojo lookups between them.'''
+    run = ReportRun()
+    try:
+        syncs = claim()
+        while syncs:
+            for sync in syncs:
+                synchronize(sync, run)
+            syncs = claim()
+    finally:
+        schedule()                                                              # Retries are scheduled after errors
+    progress = get_progress()
+    logger.info(
+        f'[Defect-Dojo] {progress["pending"]} executions pending of synchronization and {progress["failed"]} failed. '
+        f'Synchronization lag is {progress["lag"]} seconds'
+    )
@@ -1,6 +1,8 @@
 import logging
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from defectdojo import cache
 from defectdojo.api import DefectDojo
 from defectdojo.exceptions import DefectDojoException
 from executions.models import Execution
@@ -12,87 +14,225 @@ dd_client = DefectDojo()
 
 logger = logging.getLogger()                                                    # Rekono logger
 
-
-def get_product_and_engagement_id(project: Project, target: Target) -> Tuple[int, int]:
+ENDPOINTS_WORKERS = 8                                                           # Max endpoints created at the same time
+
+
+class ReportRun:
+    '''Defect-Dojo lookups made during a report run. They are memoized, so each one is only requested once, and
+    shared with other runs using the cache.'''
+
+    def __init__(self) -> None:
+        '''Report run constructor.'''
+        self.available: Optional[bool] = None                                   # Defect-Dojo availability
+        self.checks: Dict[Tuple[str, int], bool] = {}                           # Existing products and engagements
+        self.target_engagements: Dict[int, int] = {}                            # Engagement Id by target Id
+        self.test_type: Optional[int] = None                                    # Rekono test type Id
+        self.tests: Dict[int, int] = {}                                         # Rekono test Id by engagement Id
+
+    def is_available(self) -> bool:
+        '''Check if Defect-Dojo integration is available.
+
+        Returns:
+            bool: Indicate if Defect-Dojo integration is available or not
+        '''
+        if self.available is None:
+            self.available = dd_client.is_available()
+        return self.available
+
+    def check(self, name: str, id: int, checker: Callable) -> bool:
+        '''Check if a Defect-Dojo entity exists.
+
+        Args:
+            name (str): Entity name
+            id (int): Entity Id
+            checker (Callable): Defect-Dojo client method to get the entity
+
+        Returns:
+            bool: Indicate if the entity exists
+        '''
+        if (name, id) not in self.checks:
+            self.checks[(name, id)] = cache.exists(name, id, checker)
+        return self.checks[(name, id)]
+
+    def get_target_engagement(self, target: Target) -> int:
+        '''Get Id of the Defect-Dojo engagement associated to the target. If not exists, create a new one.
+
+        Args:
+            target (Target): Rekono target
+
+        Returns:
+            int: Engagement Id in Defect-Dojo
+        '''
+        if target.id not in self.target_engagements:
+            self.target_engagements[target.id] = target.get_defectdojo_engagement(dd_client)
+        return self.target_engagements[target.id]
+
+    def invalidate(self, entity: str, key: Any) -> None:
+        '''Remove a lookup from the report run and from the cache, because the entity isn't found in Defect-Dojo.
+
+        Args:
+            entity (str): Defect-Dojo entity
+            key (Any): Lookup key
+        '''
+        cache.invalidate(entity, key)
+        if entity == cache.TEST_TYPE:
+            self.test_type = None
+        elif entity == cache.TEST:
+            self.tests.pop(key, None)
+        else:
+            self.checks.pop((entity, key), None)
+            if entity == cache.ENGAGEMENT:
+                self.target_engagements = {t: e for t, e in self.target_engagements.items() if e != key}
+
+
+def get_product_and_engagement_id(project: Project, target: Target, run: ReportRun) -> Tuple[int, int]:
     '''Get product Id and engagement Id to use to Defect-Dojo import.
 
     Args:
         project (Project): Rekono project
         target (Target): Rekono target
+        run (ReportRun): Report run with the memoized lookups
 
     Returns:
         Tuple[int, int]: Defect-Dojo product Id and engagement Id
     '''
     product_id = project.defectdojo_product_id
-    to_check = [(dd_client.get_product, product_id, 'product')]
+    to_check = [(dd_client.get_product, product_id, cache.PRODUCT)]
     engagement_id = project.defectdojo_engagement_id
     if project.defectdojo_engagement_by_target:
-        engagement_id = target.get_defectdojo_engagement(dd_client)
+        engagement_id = run.get_target_engagement(target)
     else:
-        to_check.append((dd_client.get_engagement, engagement_id, 'engagement'))
+        to_check.append((dd_client.get_engagement, engagement_id, cache.ENGAGEMENT))
     for checker, id, name in to_check:
-        check, _ = checker(id)
-        if not check:
+        if not run.check(name, id, checker):
             raise DefectDojoException({name.lower(): [f'{name.capitalize()} {id} is not found in Defect-Dojo']})
     return product_id, engagement_id
 
 
-def get_rekono_test(engagement_id: int) -> int:
-    '''Create a new test associated to Rekono in a specific Defect-Dojo engagement.
+def get_rekono_test_type(run: ReportRun) -> Optional[int]:
+    '''Get Id of the test type associated to Rekono. If not exists, create a new one.
 
     Args:
-        engagement_id (int): Engagement Id where the test will be created
-
-    Raises:
-        DefectDojoException: Raised if the test can't be created
+        run (ReportRun): Report run with the memoized lookups
 
     Returns:
-        int: Defect-Dojo test Id
+        Optional[int]: Defect-Dojo test type Id, or None if it can't be created
     '''
-    test_type = None
+    if run.test_type:
+        return run.test_type
+    name = dd_client.get_system().defect_dojo_test_type
+    run.test_type = cache.get(cache.TEST_TYPE, name)
+    if run.test_type:
+        return run.test_type
     result, body = dd_client.get_rekono_test_type()                             # Get Rekono test type
     if result and body and len(body.get('results', [])) > 0:
-        test_type = body['results'][0].get('id')
+        run.test_type = body['results'][0].get('id')
     else:                                                                       # Rekono test type not found
         result, body = dd_client.create_rekono_test_type()                      # Create Rekono test type
         if result:
             logger.info(f'[Defect-Dojo] Rekono test type {body["id"]} has been created')
-            test_type = body.get('id')
+            run.test_type = body.get('id')
+    if run.test_type:
+        cache.save(cache.TEST_TYPE, name, run.test_type)
+    return run.test_type
+
+
+def get_rekono_test(engagement_id: int, run: ReportRun) -> int:
+    '''Create a new test associated to Rekono in a specific Defect-Dojo engagement. Only one test is created for each
+    engagement while it's in cache.
+
+    Args:
+        engagement_id (int): Engagement Id where the test will be created
+        run (ReportRun): Report run with the memoized lookups
+
+    Raises:
+        DefectDojoException: Raised if the test can't be created
+
+    Returns:
+        int: Defect-Dojo test Id
+    '''
+    if engagement_id in run.tests:
+        return run.tests[engagement_id]
+    test_id = cache.get(cache.TEST, engagement_id)
+    if test_id:
+        run.tests[engagement_id] = test_id
+        return test_id
+    test_type = get_rekono_test_type(run)
     if test_type:                                                               # If test type found or created
         result, body = dd_client.create_rekono_test(test_type, engagement_id)   # Create Rekono test
         if result:
             logger.info(f'[Defect-Dojo] Rekono test {body["id"]} has been created')
+            run.tests[engagement_id] = body['id']
+            cache.save(cache.TEST, engagement_id, body['id'])
             return body['id']
+        if dd_client.is_not_found(body):                                        # Test type or engagement removed
+            run.invalidate(cache.TEST_TYPE, dd_client.get_system().defect_dojo_test_type)
+            run.invalidate(cache.ENGAGEMENT, engagement_id)
     logger.warning("[Defect-Dojo] Rekono test can't be created")
     raise DefectDojoException({'test': ['Unexpected error in Rekono test creation']})   # Rekono test can't be created
 
 
-def report(execution: Execution, findings: List[Finding]) -> None:
+def create_endpoints(product_id: int, endpoints: List[Path], run: ReportRun) -> None:
+    '''Create Defect-Dojo endpoints from Rekono endpoints, using a bounded number of concurrent requests.
+
+    Args:
+        product_id (int): Product Id where the endpoints will be created
+        endpoints (List[Path]): Rekono endpoints
+        run (ReportRun): Report run with the memoized lookups
+    '''
+    # Related data is obtained before the requests, so the threads don't need database queries
+    endpoints = list(Path.objects.filter(pk__in=[e.id for e in endpoints]).select_related('port__host'))
+    if not endpoints:
+        return
+    with ThreadPoolExecutor(max_workers=min(ENDPOINTS_WORKERS, len(endpoints))) as executor:
+        results = list(executor.map(lambda e: dd_client.create_endpoint(product_id, e), endpoints))
+    for endpoint, (success, _) in zip(endpoints, results):
+        if success:
+            logger.info(f'[Defect-Dojo] Path {endpoint.id} has been imported in product {product_id}')
+        else:
+            logger.warning(f'[Defect-Dojo] Path {endpoint.id} can\'t be imported in product {product_id}')
+    if any(not success and dd_client.is_not_found(body) for success, body in results):
+        run.invalidate(cache.PRODUCT, product_id)                               # Product removed from Defect-Dojo
+
+
+def report(execution: Execution, findings: List[Finding], run: Optional[ReportRun] = None) -> None:
     '''Report to Defect-Dojo the results of one Rekono execution.
 
     Args:
         execution (Execution): Execution to be reported
         findings (List[Finding]): Findings detected during the execution
+        run (Optional[ReportRun], optional): Report run to share lookups with other reports. Defaults to None.
 
     Raises:
-        DefectDojoException: Raised if Defect-Dojo is not available
+        DefectDojoException: Raised if Defect-Dojo is not available or findings can't be imported
     '''
-    if not dd_client.is_available():
+    run = run or ReportRun()
+    if not run.is_available():
         raise DefectDojoException({'defect-dojo': ['Integration with Defect-Dojo is not available']})
-    product_id, engagement_id = get_product_and_engagement_id(execution.task.target.project, execution.task.target)
-    if execution.tool.defectdojo_scan_type:
-        dd_client.import_scan(engagement_id, execution)                         # Import the execution output
+    product_id, engagement_id = get_product_and_engagement_id(
+        execution.task.target.project, execution.task.target, run
+    )
+    if execution.tool.defectdojo_scan_type and execution.output_file:
+        success, body = dd_client.import_scan(engagement_id, execution)         # Import the execution output
+        if not success:
+            if dd_client.is_not_found(body):                                    # Engagement removed from Defect-Dojo
+                run.invalidate(cache.ENGAGEMENT, engagement_id)
+            raise DefectDojoException({'execution': [f"Execution {execution.id} can't be imported"]})
         logger.info(f'[Defect-Dojo] Execution {execution.id} has been imported in engagement {engagement_id}')
     else:
-        test_id = None
-        for finding in findings:
-            if isinstance(finding, Path):                                       # Path finding
-                dd_client.create_endpoint(product_id, finding)                  # Import finding as Defect-Dojo endpoint
-            else:
-                test_id = test_id if test_id else get_rekono_test(engagement_id)
-                dd_client.create_finding(test_id, finding)                      # Import finding as Defect-Dojo finding
-            logger.info(
-                f'[Defect-Dojo] {finding.__class__.__name__} {finding.id} has been imported in product {product_id}'
-            )
+        endpoints = [f for f in findings if isinstance(f, Path)]                # Imported as Defect-Dojo endpoints
+        if endpoints:
+            create_endpoints(product_id, endpoints, run)
+        findings = [f for f in findings if not isinstance(f, Path)]            # Imported as Defect-Dojo findings
+        if findings:
+            test_id = get_rekono_test(engagement_id, run)
+            success, body = dd_client.reimport_findings(test_id, findings)     # Import all findings in one report
+            if not success and dd_client.is_not_found(body):                    # Test removed from Defect-Dojo
+                run.invalidate(cache.TEST, engagement_id)
+                test_id = get_rekono_test(engagement_id, run)                   # Create a new test
+                success, _ = dd_client.reimport_findings(test_id, findings)
+            if not success:
+                raise DefectDojoException({'findings': [f"Findings from execution {execution.id} can't be imported"]})
+            logger.info(f'[Defect-Dojo] {len(findings)} findings have been imported in test {test_id}')
     execution.imported_in_defectdojo = True                                     # Update the execution as reported
     execution.save(update_fields=['imported_in_defectdojo'])
@@ -1,8 +1,12 @@
 import logging
-from typing import Any, Dict, List
+import os
+import pickle
+from datetime import timedelta
+from smtplib import SMTPDataError, SMTPRecipientsRefused, SMTPSenderRefused
+from typing import Any, Dict, List, Tuple
 
 import django_rq
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import get_template
 from django.utils import timezone
 from django_rq import job
@@ -13,10 +17,40 @@ from rekono.settings import EMAIL_HOST, EMAIL_PORT, FRONTEND_URL
 
 logger = logging.getLogger()                                                    # Rekono logger
 
+EMAILS_KEY = 'rekono:emails'                                                    # Pending email messages
+EMAILS_BATCH_SIZE = 100                                                         # Max emails sent by each connection
+EMAILS_TTL = 86400                                                              # Max seconds to keep pending emails
+MAX_ATTEMPTS = 3                                                                # Max attempts to send each email
+RETRY_DELAY = 60                                                                # Seconds to wait before sending again
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'templates')   # HTML templates directory
+
+templates: Dict[str, Any] = {}                                                  # Compiled HTML templates by name
+
+
+def get_cached_template(template_name: str) -> Any:
+    '''Get compiled HTML template. Templates are compiled only once.
+
+    Args:
+        template_name (str): HTML template name
+
+    Returns:
+        Any: Compiled HTML template
+    '''
+    if template_name not in templates:
+        templates[template_name] = get_template(template_name)
+    return templates[template_name]
 
-@job('emails-queue')
-def consumer(addresses: List[str], subject: str, template_name: str, data: Dict[str, Any]) -> None:
-    '''Send HTML email message.
+
+def load_templates() -> None:
+    '''Compile all the HTML templates. It's executed when the emails worker starts, so the work horses created for
+    each job inherit the compiled templates.'''
+    for template_name in os.listdir(TEMPLATES_DIR):
+        if template_name.endswith('.html'):
+            get_cached_template(template_name)
+
+
+def producer(addresses: List[str], subject: str, template_name: str, data: Dict[str, Any]) -> None:
+    '''Add an HTML email message to the pending emails, and enqueue a job in the emails queue to send them.
 
     Args:
         addresses (List[str]): Destinatary email addresses
@@ -24,17 +58,129 @@ def consumer(addresses: List[str], subject: str, template_name: str, data: Dict[
         template_name (str): HTML template to use
         data (Dict[str, Any]): Data to include in the HTML template
     '''
-    if EMAIL_HOST and EMAIL_PORT:
-        template = get_template(template_name)                                  # Get HTML template
-        data['rekono_url'] = FRONTEND_URL                                       # Include frontend address for links
-        # nosemgrep: python.flask.security.xss.audit.direct-use-of-jinja2.direct-use-of-jinja2
-        content = template.render(data)                                         # Render HTML template using data
+    if not addresses:
+        return
+    email = pickle.dumps({'addresses': addresses, 'subject': subject, 'template_name': template_name, 'data': data})
+    with django_rq.get_connection('emails-queue').pipeline() as pipeline:
+        pipeline.rpush(EMAILS_KEY, email)
+        pipeline.expire(EMAILS_KEY, EMAILS_TTL)
+        pipeline.execute()
+    django_rq.get_queue('emails-queue').enqueue(consumer)
+
+
+def pop_emails() -> List[Dict[str, Any]]:
+    '''Get and remove a batch of pending emails, atomically.
+
+    Returns:
+        List[Dict[str, Any]]: Pending emails
+    '''
+    with django_rq.get_connection('emails-queue').pipeline() as pipeline:
+        pipeline.lrange(EMAILS_KEY, 0, EMAILS_BATCH_SIZE - 1)
+        pipeline.ltrim(EMAILS_KEY, EMAILS_BATCH_SIZE, -1)
+        emails, _ = pipeline.execute()
+    return [pickle.loads(e) for e in emails]
+
+
+def build_messages(email: Dict[str, Any]) -> List[EmailMultiAlternatives]:
+    '''Create one HTML email message for each recipient, rendering the template only once.
+
+    Args:
+        email (Dict[str, Any]): Pending email with addresses, subject, template name and data
+
+    Returns:
+        List[EmailMultiAlternatives]: Email messages
+    '''
+    template = get_cached_template(email['template_name'])                     # Get HTML template
+    email['data']['rekono_url'] = FRONTEND_URL                                  # Include frontend address for links
+    # nosemgrep: python.flask.security.xss.audit.direct-use-of-jinja2.direct-use-of-jinja2
+    content = template.render(email['data'])                                    # Render HTML template using data
+    messages = []
+    for address in email['addresses']:
+        message = EmailMultiAlternatives(email['subject'], '', None, [address])     # Create email message
+        message.attach_alternative(content, 'text/html')                        # Add HTML content to email message
+        messages.append(message)
+    return messages
+
+
+@job('emails-queue')
+def consumer() -> None:
+    '''Send the pending HTML email messages by batches, using only one SMTP connection for each batch.'''
+    emails = pop_emails()
+    while emails:
+        if EMAIL_HOST and EMAIL_PORT:
+            failed = send_emails(emails)
+            if failed:
+                retry_emails(failed)
+                return                                                          # Pending emails are sent later
+        emails = pop_emails()
+
+
+def send_emails(emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    '''Send a batch of pending emails using only one SMTP connection. Emails whose template can't be rendered are
+    discarded, because they would fail again.
+
+    Args:
+        emails (List[Dict[str, Any]]): Pending emails
+
+    Returns:
+        List[Dict[str, Any]]: Emails that couldn't be sent, only with the addresses not reached yet
+    '''
+    pending = []
+    for email in emails:
         try:
-            message = EmailMultiAlternatives(subject, '', None, addresses)      # Create email message
-            message.attach_alternative(content, 'text/html')                    # Add HTML content to email message
-            message.send()                                                      # Send email message
+            pending.append((email, build_messages(email)))
         except Exception:
-            logger.error('[Email] Error during email message sending')
+            logger.error(f'[Email] Template {email["template_name"]} can\'t be rendered. Email has been discarded')
+    try:
+        with get_connection() as connection:                                    # Open SMTP connection
+            while pending:
+                email, messages = pending[0]
+                while messages:
+                    send_message(connection, messages[0])
+                    messages.pop(0)                                             # Message has been processed
+                pending.pop(0)
+    except Exception:
+        logger.error('[Email] Error during SMTP connection')
+    return [dict(email, addresses=[m.to[0] for m in messages]) for email, messages in pending]
+
+
+def retry_emails(emails: List[Dict[str, Any]]) -> None:
+    '''Add the emails that couldn't be sent to the pending emails again, and enqueue a job to send them later.
+
+    Args:
+        emails (List[Dict[str, Any]]): Emails that couldn't be sent
+    '''
+    retry = []
+    for email in emails:
+        email['attempt'] = email.get('attempt', 1) + 1
+        if email['attempt'] <= MAX_ATTEMPTS:
+            retry.append(pickle.dumps(email))
+    if len(retry) < len(emails):
+        logger.error(f'[Email] {len(emails) - len(retry)} emails can\'t be sent after {MAX_ATTEMPTS} attempts')
+    if not retry:
+        return
+    with django_rq.get_connection('emails-queue').pipeline() as pipeline:
+        pipeline.rpush(EMAILS_KEY, *retry)
+        pipeline.expire(EMAILS_KEY, EMAILS_TTL)
+        pipeline.execute()
+    django_rq.get_queue('emails-queue').enqueue_in(timedelta(seconds=RETRY_DELAY), consumer)
+    logger.warning(f'[Email] {len(retry)} emails will be sent again')
+
+
+def send_message(connection: Any, message: EmailMultiAlternatives) -> None:
+    '''Send email message using an opened SMTP connection.
+
+    Args:
+        connection (Any): SMTP connection
+        message (EmailMultiAlternatives): Email message
+
+    Raises:
+        Exception: Raised if the SMTP connection fails, so the pending messages can be sent later
+    '''
+    try:
+        connection.send_messages([message])                                     # Send email message
+    except (SMTPRecipientsRefused, SMTPSenderRefused, SMTPDataError):           # Message rejected by the server
+        logger.error('[Email] Error during email message sending')
 
 
 def user_invitation(user: Any) -> None:
@@ -43,9 +189,7 @@ def user_invitation(user: Any) -> None:
     Args:
         user (Any): User to invite to Rekono
     '''
-    emails_queue = django_rq.get_queue('emails-queue')                          # Get emails queue
-    emails_queue.enqueue(                                                       # Enqueue email notification
-        consumer,
+    producer(
         addresses=[user.email],
         subject='Welcome to Rekono',
         template_name='user_invitation.html',
@@ -59,9 +203,7 @@ def user_password_reset(user: Any) -> None:
     Args:
         user (Any): User that requests the password reset
     '''
-    emails_queue = django_rq.get_queue('emails-queue')                          # Get emails queue
-    emails_queue.enqueue(                                                       # Enqueue email notification
-        consumer,
+    producer(
         addresses=[user.email],
         subject='Reset Rekono password',
         template_name='user_password_reset.html',
@@ -75,9 +217,7 @@ def user_enable_account(user: Any) -> None:
     Args:
         user (Any): Recently enabled user
     '''
-    emails_queue = django_rq.get_queue('emails-queue')                          # Get emails queue
-    emails_queue.enqueue(                                                       # Enqueue email notification
-        consumer,
+    producer(
         addresses=[user.email],
         subject='Rekono user enabled',
         template_name='user_enable_account.html',
@@ -91,9 +231,7 @@ def user_login_notification(user: Any) -> None:
     Args:
         user (Any): Recently enabled user
     '''
-    emails_queue = django_rq.get_queue('emails-queue')                          # Get emails queue
-    emails_queue.enqueue(                                                       # Enqueue email notification
-        consumer,
+    producer(
         addresses=[user.email],
         subject='New login on your Rekono account',
         template_name='user_login_notification.html',
@@ -107,9 +245,7 @@ def user_telegram_linked_notification(user: Any) -> None:
     Args:
         user (Any): Recently enabled user
     '''
-    emails_queue = django_rq.get_queue('emails-queue')                          # Get emails queue
-    emails_queue.enqueue(                                                       # Enqueue email notification
-        consumer,
+    producer(
         addresses=[user.email],
         subject='Welcome to Rekono Bot',
         template_name='user_telegram_linked_notification.html',
@@ -117,15 +253,17 @@ def user_telegram_linked_notification(user: Any) -> None:
     )
 
 
-def execution_notifications(emails: List[str], execution: Any, findings: List[Finding]) -> None:
-    '''Send email notifications with execution results.
+def get_execution_data(execution: Any, findings: List[Finding]) -> Dict[str, Any]:
+    '''Get data to include execution results in email templates.
 
     Args:
-        emails (List[str]): Email address list to notify
         execution (Any): Completed execution
         findings (List[Finding]): Findings obtained during execution
+
+    Returns:
+        Dict[str, Any]: Execution data with the findings grouped by model
     '''
-    data = {                                                                    # Data to include in notification
+    data: Dict[str, Any] = {                                                    # Data to include in notification
         'execution': execution,
         'tool': execution.tool,
         'configuration': execution.configuration
@@ -134,12 +272,38 @@ def execution_notifications(emails: List[str], execution: Any, findings: List[Fi
         if finding.__class__.__name__.lower() not in data:
             data[finding.__class__.__name__.lower()] = []
         data[finding.__class__.__name__.lower()].append(finding)                # Add finding to the data
+    return data
+
+
+def execution_notifications(emails: List[str], execution: Any, findings: List[Finding]) -> None:
+    '''Send email notifications with execution results.
+
+    Args:
+        emails (List[str]): Email address list to notify
+        execution (Any): Completed execution
+        findings (List[Finding]): Findings obtained during execution
+    '''
+    data = get_execution_data(execution, findings)                              # Data to include in notification
     # Send email notifications
-    emails_queue = django_rq.get_queue('emails-queue')                          # Get emails queue
-    emails_queue.enqueue(                                                       # Enqueue email notifications
-        consumer,
+    producer(
         addresses=emails,
         subject=f'[Rekono] {data["tool"].name} execution completed',
         template_name='execution_notification.html',
         data=data
     )
+
+
+def task_notifications(emails: List[str], task: Any, executions: List[Tuple[Any, List[Finding]]]) -> None:
+    '''Send one email notification with the results of multiple executions of the same task.
+
+    Args:
+        emails (List[str]): Email address list to notify
+        task (Any): Task of the executions
+        executions (List[Tuple[Any, List[Finding]]]): Completed executions and their findings
+    '''
+    producer(
+        addresses=emails,
+        subject=f'[Rekono] {len(executions)} executions completed in task {task.id}',
+        template_name='task_notification.html',
+        data={'task': task, 'executions': [get_execution_data(e, f) for e, f in executions]}
+    )
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from executions.models import Execution
+from executions.models import DefectDojoSync, Execution
 
 # Register your models here.
 
 admin.site.register(Execution)
+admin.site.register(DefectDojoSync)
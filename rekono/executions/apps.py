@@ -1,7 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class ExecutionsConfig(AppConfig):
     '''Executions Django application.'''
 
     name = 'executions'
+
+    def ready(self) -> None:
+        '''Run code as soon as the registry is fully populated.'''
+        from executions.models import Execution
+        from executions.utils import remove_plain_output_file
+        # Full plain output files are removed with their executions
+        post_delete.connect(remove_plain_output_file, sender=Execution)
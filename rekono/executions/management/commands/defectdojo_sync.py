@@ -0,0 +1,36 @@
+from typing import Any
+
+from defectdojo.queue import backfill, get_progress, retry_failed
+from django.core.management.base import BaseCommand, CommandParser
+
+
+class Command(BaseCommand):
+    '''Rekono command to manage the synchronization of executions with Defect-Dojo.'''
+
+    help = 'Show the Defect-Dojo synchronization progress, and enqueue historical or failed executions'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        '''Add command arguments.
+
+        Args:
+            parser (CommandParser): Command parser
+        '''
+        parser.add_argument(
+            '--backfill', action='store_true',
+            help='Enqueue completed executions not imported yet from projects with Defect-Dojo synchronization'
+        )
+        parser.add_argument('--project', type=int, action='append', default=[], help='Project Id to backfill')
+        parser.add_argument('--retry-failed', action='store_true', help='Enqueue executions that reached max attempts')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        '''Enqueue executions for Defect-Dojo synchronization and show the synchronization progress.'''
+        if options['backfill']:
+            count = backfill(options['project'])                                # Enqueue historical executions
+            self.stdout.write(f'{count} executions enqueued for synchronization')
+        if options['retry_failed']:
+            count = retry_failed()                                              # Enqueue failed executions
+            self.stdout.write(f'{count} failed executions enqueued again')
+        progress = get_progress()
+        self.stdout.write(
+            f'{progress["pending"]} executions pending, {progress["failed"]} failed. Lag: {progress["lag"]} seconds'
+        )
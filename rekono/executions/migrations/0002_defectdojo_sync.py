@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('executions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DefectDojoSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('findings', models.JSONField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('execution', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='defectdojo_sync', to='executions.execution')),
+            ],
+        ),
+    ]
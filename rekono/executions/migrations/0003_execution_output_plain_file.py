@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('executions', '0002_defectdojo_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='execution',
+            name='output_plain_file',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
@@ -17,6 +17,7 @@ class Execution(models.Model):
     extra_data_path = models.TextField(max_length=50, blank=True, null=True)    # Filepath with extra data
     output_file = models.TextField(max_length=50, blank=True, null=True)        # Tool output filepath
     output_plain = models.TextField(blank=True, null=True)                      # Tool output in plain text
+    output_plain_file = models.TextField(blank=True, null=True)                 # Full plain output if truncated
     output_error = models.TextField(blank=True, null=True)                      # Tool errors
     status = models.TextField(max_length=10, choices=Status.choices, default=Status.REQUESTED)      # Execution status
     start = models.DateTimeField(blank=True, null=True)                         # Start date
@@ -41,3 +42,30 @@ class Execution(models.Model):
             Project: Related project entity
         '''
         return self.task.target.project
+
+
+class DefectDojoSync(models.Model):
+    '''Pending synchronization of one execution with Defect-Dojo.'''
+
+    execution = models.OneToOneField(Execution, related_name='defectdojo_sync', on_delete=models.CASCADE)
+    findings = models.JSONField(blank=True, null=True)                          # Finding references. None to use all
+    attempts = models.IntegerField(default=0)                                   # Failed synchronization attempts
+    next_attempt = models.DateTimeField(blank=True, null=True, db_index=True)   # None if max attempts are reached
+    last_error = models.TextField(blank=True, null=True)                        # Error of the last failed attempt
+    created = models.DateTimeField(auto_now_add=True)                           # Creation date
+
+    def __str__(self) -> str:
+        '''Instance representation in text format.
+
+        Returns:
+            str: String value that identifies this instance
+        '''
+        return f'{self.execution.id} - {self.attempts}'
+
+    def get_project(self) -> Project:
+        '''Get the related project for the instance. This will be used for authorization purposes.
+
+        Returns:
+            Project: Related project entity
+        '''
+        return self.execution.task.target.project
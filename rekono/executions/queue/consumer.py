@@ -1,4 +1,5 @@
-from typing import List
+from functools import partial
+from typing import Any, List, Tuple
 
 import rq
 from django.utils import timezone
@@ -6,41 +7,53 @@ from django_rq import job
 from executions.models import Execution
 from executions.queue import utils as queue_utils
 from input_types.base import BaseInput
+from input_types.utils import get_inputs_from_references, get_references
 from tasks.enums import Status
 from tools import utils as tool_utils
 from tools.models import Argument, Intensity
-from tools.tools.base_tool import BaseTool
+
+from rekono.settings import TOOLS_STREAMING_HANDOFF
 
 
 @job('executions-queue')
 def consumer(
-    execution: Execution,
-    intensity: Intensity,
-    arguments: List[Argument],
-    targets: List[BaseInput],
-    previous_findings: List[BaseInput]
-) -> BaseTool:
+    execution_id: int,
+    intensity_id: int,
+    arguments_ids: List[int],
+    targets: List[Tuple[str, int]],
+    previous_findings: List[Tuple[str, int]]
+) -> List[Tuple[str, int]]:
     '''Consume jobs from executions queue and executes them.
 
     Args:
-        execution (Execution): Execution associated to the job
-        intensity (Intensity): Intensity to apply in the execution
-        arguments (List[Argument]): Arguments implied in the execution
-        targets (List[BaseInput]): Targets and resources to include in the execution
-        previous_findings (List[Finding]): Findings from previous executions to include in the execution
+        execution_id (int): Id of the execution associated to the job
+        intensity_id (int): Id of the intensity to apply in the execution
+        arguments_ids (List[int]): Ids of the arguments implied in the execution
+        targets (List[Tuple[str, int]]): References to targets and resources to include in the execution
+        previous_findings (List[Tuple[str, int]]): References to findings from previous executions to include
 
     Returns:
-        BaseTool: Tool instance that executed the tool and saved the results
+        List[Tuple[str, int]]: References to the findings obtained by the execution
     '''
+    # Get entities from database
+    execution = Execution.objects.select_related('task__target', 'tool', 'configuration').get(pk=execution_id)
+    intensity = Intensity.objects.get(pk=intensity_id)
+    arguments_by_id = Argument.objects.in_bulk(arguments_ids)
+    arguments = [arguments_by_id[id] for id in arguments_ids if id in arguments_by_id]
+    targets_list: List[BaseInput] = get_inputs_from_references(targets)
+    findings: List[BaseInput] = get_inputs_from_references(previous_findings, execution.task.target_id)
     tool_class = tool_utils.get_tool_class_by_name(execution.tool.name)         # Get Tool class from Tool name
     tool_runner = tool_class(execution, intensity, arguments)                   # Create Tool instance
     current_job = rq.get_current_job()                                          # Get current Job
-    if not previous_findings and current_job._dependency_ids:                   # No previous findings and dependencies
-        previous_findings = queue_utils.process_dependencies(                   # Get findings from dependencies
+    if TOOLS_STREAMING_HANDOFF:
+        # Persisted findings are handed off to the dependent executions without waiting for the job end
+        tool_runner.findings_handoff = partial(queue_utils.hand_off_findings, execution, current_job.id)
+    if not findings and current_job._dependency_ids:                            # No previous findings and dependencies
+        findings = queue_utils.process_dependencies(                            # Get findings from dependencies
             execution,
             intensity,
             arguments,
-            targets,
+            targets_list,
             current_job,
             tool_runner
         )
@@ -50,5 +63,21 @@ def consumer(
         execution.task.status = Status.RUNNING                                  # Set task status to Running
         execution.task.start = timezone.now()                                   # Set task start date
         execution.task.save(update_fields=['status', 'start'])
-    tool_runner.run(targets=targets, previous_findings=previous_findings)       # Tool execution
-    return tool_runner
+    tool_runner.run(targets=targets_list, previous_findings=findings)           # Tool execution
+    return get_references(tool_runner.findings)                                 # Only findings references are saved
+
+
+def failure_callback(job: Any, connection: Any, *exc_info: Any) -> None:
+    '''Run code after execution job failure. Execution finishes with errors and the job callback is called, so the
+    task doesn't wait for it.
+
+    Args:
+        job (Any): Failed execution job
+        connection (Any): Redis connection
+    '''
+    Execution.objects.filter(
+        pk=job.kwargs['execution_id'], status__in=[Status.REQUESTED, Status.RUNNING]
+    ).update(status=Status.ERROR, end=timezone.now())
+    callback = job.meta.get('callback')
+    if callback:
+        callback(job, connection, [])                                           # Count the finished execution
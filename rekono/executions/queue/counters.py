@@ -0,0 +1,135 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+import django_rq
+from django.db.models import Count, Q
+from executions.models import Execution
+from executions.queue.graph import GRAPH_TTL
+from tasks.enums import Status
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+PENDING = 'pending'                                                             # Requested or running executions
+ERROR = 'error'                                                                 # Executions finished with errors
+CANCELLED = 'cancelled'                                                         # Cancelled executions
+
+
+def get_counters_key(task_id: int) -> str:
+    '''Get Redis key of the task execution counters.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        str: Redis key of the hash with the execution counters
+    '''
+    return f'rekono:task:{task_id}:counters'
+
+
+def get_pending_key(task_id: int) -> str:
+    '''Get Redis key of the task executions that haven't finished yet.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        str: Redis key of the set with the pending execution Ids
+    '''
+    return f'rekono:task:{task_id}:pending'
+
+
+def add_pending(task_id: int, executions: List[int], pipeline: Any = None) -> None:
+    '''Count new executions of a task as pending.
+
+    Args:
+        task_id (int): Task Id
+        executions (List[int]): Ids of the new executions
+        pipeline (Any, optional): Redis pipeline to use. Defaults to None.
+    '''
+    connection = pipeline if pipeline is not None else django_rq.get_connection('executions-queue')
+    connection.sadd(get_pending_key(task_id), *executions)
+    connection.hincrby(get_counters_key(task_id), ERROR, 0)                     # Counters exist since the first one
+    connection.expire(get_pending_key(task_id), GRAPH_TTL)
+    connection.expire(get_counters_key(task_id), GRAPH_TTL)
+
+
+def finish_execution(task_id: int, execution_id: int, status: str) -> Optional[Dict[str, int]]:
+    '''Count a finished execution of a task. It's idempotent, so an execution is only counted once although its
+    callback is called multiple times or the counters have been reconciled after it finished.
+
+    Args:
+        task_id (int): Task Id
+        execution_id (int): Finished execution Id
+        status (str): Execution status
+
+    Returns:
+        Optional[Dict[str, int]]: Task execution counters after the update, or None if they have been lost
+    '''
+    key = get_counters_key(task_id)
+    pending_key = get_pending_key(task_id)
+    with django_rq.get_connection('executions-queue').pipeline() as pipeline:
+        pipeline.exists(key)
+        pipeline.srem(pending_key, execution_id)
+        exists, removed = pipeline.execute()
+    if not exists:                                                              # Counters lost
+        return None
+    with django_rq.get_connection('executions-queue').pipeline() as pipeline:
+        pipeline.scard(pending_key)
+        # Execution status is only counted if it was pending
+        pipeline.hincrby(key, ERROR, 1 if removed and status == Status.ERROR else 0)
+        pipeline.hincrby(key, CANCELLED, 1 if removed and status == Status.CANCELLED else 0)
+        pipeline.expire(pending_key, GRAPH_TTL)
+        pipeline.expire(key, GRAPH_TTL)
+        pending, error, cancelled, *_ = pipeline.execute()
+    return {PENDING: pending, ERROR: error, CANCELLED: cancelled}
+
+
+def count_executions(task_id: int) -> Dict[str, int]:
+    '''Count task executions by status from database, using only one query.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        Dict[str, int]: Task execution counters
+    '''
+    return Execution.objects.filter(task_id=task_id).aggregate(**{
+        PENDING: Count('id', filter=Q(status__in=[Status.REQUESTED, Status.RUNNING])),
+        ERROR: Count('id', filter=Q(status=Status.ERROR)),
+        CANCELLED: Count('id', filter=Q(status=Status.CANCELLED))
+    })
+
+
+def reconcile(task_id: int) -> Dict[str, int]:
+    '''Repair task execution counters using the executions data from database.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        Dict[str, int]: Task execution counters
+    '''
+    counters = count_executions(task_id)
+    pending = list(Execution.objects.filter(
+        task_id=task_id, status__in=[Status.REQUESTED, Status.RUNNING]
+    ).values_list('id', flat=True))
+    connection = django_rq.get_connection('executions-queue')
+    with connection.pipeline() as pipeline:
+        pipeline.delete(get_pending_key(task_id))
+        if pending:
+            pipeline.sadd(get_pending_key(task_id), *pending)
+            pipeline.expire(get_pending_key(task_id), GRAPH_TTL)
+        pipeline.hset(get_counters_key(task_id), mapping={ERROR: counters[ERROR], CANCELLED: counters[CANCELLED]})
+        pipeline.expire(get_counters_key(task_id), GRAPH_TTL)
+        pipeline.execute()
+    logger.info(f'[Task] Execution counters of task {task_id} have been reconciled')
+    return counters
+
+
+def remove_counters(task_id: int) -> None:
+    '''Remove the task execution counters.
+
+    Args:
+        task_id (int): Task Id
+    '''
+    django_rq.get_connection('executions-queue').delete(get_counters_key(task_id), get_pending_key(task_id))
@@ -0,0 +1,119 @@
+import logging
+from typing import Any, List
+
+import django_rq
+from rq.job import Job
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+GRAPH_TTL = 7 * 24 * 60 * 60                                                    # Max seconds to keep task graphs
+
+
+def get_dependents_key(task_id: int, job_id: str) -> str:
+    '''Get Redis key of the jobs that depend on a job, in the task dependency graph.
+
+    Args:
+        task_id (int): Task Id
+        job_id (str): Parent job Id
+
+    Returns:
+        str: Redis key of the set with the dependent job Ids
+    '''
+    return f'rekono:task:{task_id}:dependents:{job_id}'
+
+
+def get_parents_key(task_id: int) -> str:
+    '''Get Redis key of the jobs with dependents in the task dependency graph.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        str: Redis key of the set with the parent job Ids
+    '''
+    return f'rekono:task:{task_id}:parents'
+
+
+def add_dependencies(task_id: int, job_id: str, dependencies: List[str], pipeline: Any = None) -> None:
+    '''Add job dependencies to the task dependency graph.
+
+    Args:
+        task_id (int): Task Id
+        job_id (str): Dependent job Id
+        dependencies (List[str]): Parent job Ids
+        pipeline (Any, optional): Redis pipeline to use. Defaults to None.
+    '''
+    connection = pipeline if pipeline is not None else django_rq.get_connection('executions-queue')
+    for dependency in dependencies:
+        key = get_dependents_key(task_id, dependency)
+        connection.sadd(key, job_id)
+        connection.expire(key, GRAPH_TTL)
+    if dependencies:
+        connection.sadd(get_parents_key(task_id), *dependencies)
+        connection.expire(get_parents_key(task_id), GRAPH_TTL)
+
+
+def get_dependents(task_id: int, job_id: str) -> List[str]:
+    '''Get jobs that depend on a job from the task dependency graph.
+
+    Args:
+        task_id (int): Task Id
+        job_id (str): Parent job Id
+
+    Returns:
+        List[str]: Dependent job Ids
+    '''
+    connection = django_rq.get_connection('executions-queue')
+    return sorted([i.decode() for i in connection.smembers(get_dependents_key(task_id, job_id))])
+
+
+def get_dependencies(job: Job) -> List[str]:
+    '''Get job dependencies, including the ones attached after job creation.
+
+    Args:
+        job (Job): Dependent job
+
+    Returns:
+        List[str]: Parent job Ids. Original dependencies first
+    '''
+    dependencies = {i.decode() for i in job.connection.smembers(job.dependencies_key)}
+    return job._dependency_ids + sorted(dependencies - set(job._dependency_ids))
+
+
+def attach_dependencies(task_id: int, parent_job: str, new_jobs: List[str]) -> List[str]:
+    '''Attach new jobs as dependencies of the jobs that depend on a parent job, without recreating them.
+
+    Dependent jobs are waiting for the parent job, so they can't be enqueued before the new dependencies are attached.
+
+    Args:
+        task_id (int): Task Id
+        parent_job (str): Parent job Id, used to get the affected jobs from the task dependency graph
+        new_jobs (List[str]): Id list of new jobs
+
+    Returns:
+        List[str]: Id list of the affected jobs
+    '''
+    dependents = get_dependents(task_id, parent_job)
+    if not dependents or not new_jobs:
+        return dependents
+    connection = django_rq.get_connection('executions-queue')
+    with connection.pipeline() as pipeline:
+        for dependent in dependents:
+            for new_job in new_jobs:
+                pipeline.sadd(Job.dependents_key_for(new_job), dependent)      # Dependents checked by RQ
+            pipeline.sadd(Job(id=dependent, connection=connection).dependencies_key, *new_jobs)
+            add_dependencies(task_id, dependent, new_jobs, pipeline)
+        pipeline.execute()
+    return dependents
+
+
+def remove_graph(task_id: int) -> None:
+    '''Remove the task dependency graph.
+
+    Args:
+        task_id (int): Task Id
+    '''
+    connection = django_rq.get_connection('executions-queue')
+    parents = [i.decode() for i in connection.smembers(get_parents_key(task_id))]
+    keys = [get_dependents_key(task_id, p) for p in parents] + [get_parents_key(task_id)]
+    connection.delete(*keys)
@@ -1,11 +1,13 @@
 import logging
-from typing import Callable, List
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
 
 import django_rq
 from executions.models import Execution
-from executions.queue import consumer
+from executions.queue import consumer, counters, graph
 from input_types.base import BaseInput
-from rq.job import Job
+from input_types.utils import get_references
+from rq.job import Job, JobStatus
 from tools.models import Argument, Intensity
 
 logger = logging.getLogger()                                                    # Rekono logger
@@ -33,18 +35,72 @@ def producer(
         dependencies (List[Any], optional): Job list whose output is required to perform this execution. Defaults to [].
         at_front (bool, optional): Indicate that the execution should be enqueued at first start. Defaults to False.
 
+    Returns:
+        Any: Enqueued job in the executions queue
+    '''
+    payload = get_payload(execution, intensity, arguments, targets, previous_findings)
+    return enqueue(execution, payload, callback=callback, dependencies=dependencies, at_front=at_front)
+
+
+def get_payload(
+    execution: Execution,
+    intensity: Intensity,
+    arguments: List[Argument],
+    targets: List[BaseInput] = [],
+    previous_findings: List[BaseInput] = []
+) -> Dict[str, Any]:
+    '''Get execution job arguments. Only Ids and references are sent to the queue, and entities are obtained from
+    database by the consumer.
+
+    Args:
+        execution (Execution): Execution to enqueue
+        intensity (Intensity): Intensity to apply in the execution
+        arguments (List[Argument]): Arguments implied in the execution
+        targets (List[BaseInput], optional): Targets and resources to include. Defaults to [].
+        previous_findings (List[BaseInput], optional): Findings from previous executions to include. Defaults to [].
+
+    Returns:
+        Dict[str, Any]: Job arguments
+    '''
+    return {
+        'execution_id': execution.id,
+        'intensity_id': intensity.id,
+        'arguments_ids': [a.id for a in arguments],
+        'targets': get_references(targets),
+        'previous_findings': get_references(previous_findings)
+    }
+
+
+def enqueue(
+    execution: Execution,
+    payload: Dict[str, Any],
+    callback: Callable = None,
+    dependencies: List[Job] = [],
+    at_front: bool = False
+) -> Job:
+    '''Enqueue a new execution in the executions queue using the job arguments.
+
+    Args:
+        execution (Execution): Execution to enqueue
+        payload (Dict[str, Any]): Job arguments, with Ids and references to the entities implied in the execution
+        callback (Callable, optional): Function to call after success execution. Defaults to None.
+        dependencies (List[Any], optional): Job list whose output is required to perform this execution. Defaults to [].
+        at_front (bool, optional): Indicate that the execution should be enqueued at first start. Defaults to False.
+
     Returns:
         Any: Enqueued job in the executions queue
     '''
     executions_queue = django_rq.get_queue('executions-queue')                  # Get executions queue
+    job_id = str(uuid.uuid4())
+    # Save job dependencies in the task dependency graph before enqueue it, so it can't miss new dependencies
+    graph.add_dependencies(execution.task_id, job_id, [d.id if isinstance(d, Job) else d for d in dependencies])
+    counters.add_pending(execution.task_id, [execution.id])                     # Count execution before it finishes
     execution_job = executions_queue.enqueue(                                   # Enqueue the Execution job
         consumer.consumer,
-        execution=execution,
-        intensity=intensity,
-        arguments=arguments,
-        targets=targets,
-        previous_findings=previous_findings,
+        **payload,
+        job_id=job_id,
         on_success=callback,
+        on_failure=consumer.failure_callback,
         # Required to get results from dependent jobs
         result_ttl=7200,
         depends_on=dependencies,
@@ -55,12 +111,69 @@ def producer(
         f'{execution.configuration.name}) has been enqueued'
     )
     # Save important data in job metadata if it is needed later
-    execution_job.meta['execution'] = execution
-    execution_job.meta['intensity'] = intensity
-    execution_job.meta['arguments'] = arguments
     execution_job.meta['callback'] = callback
-    execution_job.meta['targets'] = targets
     execution_job.save_meta()
     execution.rq_job_id = execution_job.id                                      # Save job Id in execution model
     execution.save(update_fields=['rq_job_id'])
     return execution_job
+
+
+def bulk_producer(
+    executions: List[Tuple[Execution, Intensity, List[Argument], List[BaseInput], List[BaseInput], List[str]]],
+    callback: Callable = None
+) -> List[Job]:
+    '''Create executions in database and enqueue them in the executions queue using only one Redis pipeline.
+
+    Args:
+        executions (List[Tuple[Execution, Intensity, List[Argument], List[BaseInput], List[BaseInput], List[str]]]):
+            Executions to create, with their intensity, arguments, targets, previous findings and the job Ids whose
+            output is required. Job Ids are taken from the execution rq_job_id, so dependencies should be executions
+            of the same batch
+        callback (Callable, optional): Function to call after success executions. Defaults to None.
+
+    Returns:
+        List[Job]: Enqueued jobs in the executions queue
+    '''
+    if not executions:
+        return []
+    for execution, *_ in executions:
+        # Job Ids are generated before enqueue them, so they are saved in the same database insert
+        execution.rq_job_id = execution.rq_job_id or str(uuid.uuid4())
+    created = Execution.objects.bulk_create([e for e, *_ in executions])
+    if any(e.id is None for e in created):                                      # Database doesn't return Ids
+        ids = dict(
+            Execution.objects.filter(rq_job_id__in=[e.rq_job_id for e in created]).values_list('rq_job_id', 'id')
+        )
+        for execution in created:
+            execution.id = ids[execution.rq_job_id]
+    executions_queue = django_rq.get_queue('executions-queue')                  # Get executions queue
+    pipeline = executions_queue.connection.pipeline()
+    for task_id in {e.task_id for e, *_ in executions}:                         # Count executions before they finish
+        counters.add_pending(task_id, [e.id for e, *_ in executions if e.task_id == task_id], pipeline)
+    jobs = []
+    for execution, intensity, arguments, targets, previous_findings, dependencies in executions:
+        execution_job = executions_queue.create_job(
+            consumer.consumer,
+            kwargs=get_payload(execution, intensity, arguments, targets, previous_findings),
+            job_id=execution.rq_job_id,
+            on_success=callback,
+            on_failure=consumer.failure_callback,
+            # Required to get results from dependent jobs
+            result_ttl=7200,
+            depends_on=dependencies,
+            # Save important data in job metadata if it is needed later
+            meta={'callback': callback}
+        )
+        graph.add_dependencies(execution.task_id, execution_job.id, dependencies, pipeline=pipeline)
+        if dependencies:
+            # Dependencies belong to the same batch, so they can't be finished yet
+            execution_job.set_status(JobStatus.DEFERRED, pipeline=pipeline)
+            execution_job.register_dependency(pipeline=pipeline)
+            execution_job.save(pipeline=pipeline)
+            execution_job.cleanup(ttl=execution_job.ttl, pipeline=pipeline)
+        else:
+            executions_queue.enqueue_job(execution_job, pipeline=pipeline)
+        jobs.append(execution_job)
+    pipeline.execute()                                                          # All jobs are enqueued at once
+    logger.info(f'[Execution] {len(jobs)} executions of task {executions[0][0].task_id} have been enqueued')
+    return jobs
@@ -0,0 +1,77 @@
+import json
+import logging
+from typing import Dict, List, Set, Tuple
+
+import django_rq
+from executions.queue.graph import GRAPH_TTL
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+MAX_READ_STREAMS = 100                                                          # Max task streams read in memory
+# Last read entry Id and references to the published findings by job, for each task stream. Streams only grow, so
+# only the new entries need to be read
+read_streams: Dict[int, Tuple[str, Dict[str, Set[Tuple[str, int]]]]] = {}
+
+
+def get_stream_key(task_id: int) -> str:
+    '''Get Redis key of the stream with the findings handed off between the executions of a task.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        str: Redis key of the task findings stream
+    '''
+    return f'rekono:task:{task_id}:findings'
+
+
+def publish(task_id: int, job_id: str, references: List[Tuple[str, int]]) -> None:
+    '''Publish references to findings persisted by an execution job in the task findings stream.
+
+    Args:
+        task_id (int): Task Id
+        job_id (str): Job Id of the execution that has found the findings
+        references (List[Tuple[str, int]]): References to the persisted findings
+    '''
+    if not references:
+        return
+    connection = django_rq.get_connection('executions-queue')
+    with connection.pipeline() as pipeline:
+        pipeline.xadd(get_stream_key(task_id), {'job': job_id, 'findings': json.dumps(references)})
+        pipeline.expire(get_stream_key(task_id), GRAPH_TTL)
+        pipeline.execute()
+
+
+def get_published(task_id: int, jobs: List[str]) -> Set[Tuple[str, int]]:
+    '''Get references to the findings published by some execution jobs in the task findings stream. Only entries
+    added since the last read are requested.
+
+    Args:
+        task_id (int): Task Id
+        jobs (List[str]): Job Ids of the executions that have published findings
+
+    Returns:
+        Set[Tuple[str, int]]: References to the published findings
+    '''
+    last_id, published = read_streams.pop(task_id, ('0', {}))                  # Moved to the end as recently read
+    connection = django_rq.get_connection('executions-queue')
+    for _, entries in connection.xread({get_stream_key(task_id): last_id}):    # Entries after the last read one
+        for entry_id, entry in entries:
+            last_id = entry_id.decode()
+            published.setdefault(entry[b'job'].decode(), set()).update(
+                (model, id) for model, id in json.loads(entry[b'findings'])
+            )
+    read_streams[task_id] = (last_id, published)
+    if len(read_streams) > MAX_READ_STREAMS:
+        read_streams.pop(next(iter(read_streams)))                              # Remove least recently read stream
+    return {r for job in jobs for r in published.get(job, set())}
+
+
+def remove_stream(task_id: int) -> None:
+    '''Remove the task findings stream.
+
+    Args:
+        task_id (int): Task Id
+    '''
+    django_rq.get_connection('executions-queue').delete(get_stream_key(task_id))
+    read_streams.pop(task_id, None)
@@ -1,68 +1,56 @@
 import logging
-from typing import List, cast
+from typing import List, Optional, cast
 
 import django_rq
 from executions import utils
 from executions.models import Execution
-from executions.queue import producer
+from executions.queue import graph, producer, stream
 from findings.models import Finding
 from input_types.models import BaseInput
+from input_types.utils import (get_inputs_from_references, get_references,
+                               probe_urls)
 from processes.executor.callback import process_callback
-from queues.utils import cancel_and_delete_job
 from rq.job import Job
-from rq.registry import DeferredJobRegistry
 from tools.models import Argument, Intensity
 from tools.tools.base_tool import BaseTool
+from tools.utils import get_tool_class_by_name
+
+from rekono.settings import TOOLS_STREAMING_HANDOFF
 
 logger = logging.getLogger()                                                    # Rekono logger
 
 
-def get_findings_from_dependencies(dependencies: list) -> List[BaseInput]:
+def get_findings_from_dependencies(dependencies: list, target_id: Optional[int] = None) -> List[BaseInput]:
     '''Get findings from dependencies.
 
     Args:
         dependencies (list): Id list of dependency jobs
+        target_id (Optional[int], optional): Target Id of the findings, to identify them. Defaults to None.
 
     Returns:
         List[BaseInput]: Finding list obtained from dependencies
     '''
     executions_queue = django_rq.get_queue('executions-queue')                  # Get execution list
-    findings = []
+    references = []
     for dep_id in dependencies:                                                 # For each dependency Id
         dependency = executions_queue.fetch_job(dep_id)                         # Get dependency job
         if not dependency or not dependency.result:
             continue                                                            # No job or results found
-        findings.extend(dependency.result.findings)                             # Get findings from result
-    return findings
+        references.extend(dependency.result)                                    # Get findings references from result
+    return get_inputs_from_references(references, target_id)                    # Get findings from database
 
 
-def update_new_dependencies(parent_job: str, new_jobs: list) -> None:
+def update_new_dependencies(task_id: int, parent_job: str, new_jobs: list) -> None:
     '''Update on hold jobs dependencies to include new jobs as dependency. Based on the parent job dependents.
 
     Args:
+        task_id (int): Task Id, used to get the task dependency graph
         parent_job (str): Parent job Id, used to get affected on hold jobs
         new_jobs (list): Id list of new jobs
     '''
-    executions_queue = django_rq.get_queue('executions-queue')                  # Get execution list
-    registry = DeferredJobRegistry(queue=executions_queue)                      # Get on hold jobs registry
-    for job_id in registry.get_job_ids():                                       # For each on hold job
-        job_on_hold = executions_queue.fetch_job(job_id)                        # Get on hold job
-        # If on hold job is waiting for parent job
-        if job_on_hold and parent_job in job_on_hold._dependency_ids:
-            dependencies = job_on_hold._dependency_ids                          # Get on hold job original dependencies
-            # Include new jobs as on hold job dependency
-            dependencies.extend(new_jobs)
-            meta = job_on_hold.get_meta()                                       # Get on hold job metadata
-            cancel_and_delete_job('executions-queue', job_id)                   # Cancel and delete on hold job
-            # Enqueue an on hold job copy with new dependencies
-            producer.producer(
-                meta['execution'],
-                meta['intensity'],
-                meta['arguments'],
-                targets=meta['targets'],
-                callback=meta['callback'],
-                dependencies=dependencies
-            )
+    # Include new jobs as dependency of the on hold jobs that are waiting for parent job
+    dependents = graph.attach_dependencies(task_id, parent_job, new_jobs)
+    logger.info(f'[Execution] {len(new_jobs)} new dependencies for {len(dependents)} jobs waiting for {parent_job}')
 
 
 def process_dependencies(
@@ -87,11 +75,17 @@ def process_dependencies(
         List[Finding]: Finding list to include in the current job execution
     '''
     # Get findings from dependent jobs
-    findings = get_findings_from_dependencies(current_job._dependency_ids)
+    dependencies = graph.get_dependencies(current_job)
+    findings = get_findings_from_dependencies(dependencies, execution.task.target_id)
+    if TOOLS_STREAMING_HANDOFF and is_streamable(arguments):
+        # Findings handed off during the dependencies execution have been processed by other executions yet
+        published = stream.get_published(execution.task.id, dependencies)
+        findings = [f for f in findings if (f._meta.label_lower, f.id) not in published]
     if not findings:
         logger.info('[Execution] No findings found from dependencies')
         return []                                                               # No findings found
     new_jobs_ids = []
+    probe_urls(targets + findings)                                              # Check all required URLs at once
     # Get required executions to include all previous findings
     executions: List[List[BaseInput]] = utils.get_executions_from_findings(findings, execution.tool)
     logger.info(f'[Execution] {len(executions) - 1} new executions from previous findings')
@@ -120,6 +114,72 @@ def process_dependencies(
         new_jobs_ids.append(job.id)                                             # Save new Job Id
     if new_jobs_ids:                                                            # New Jobs has been created
         # Update next jobs dependencies based on current job dependents
-        update_new_dependencies(current_job.id, new_jobs_ids)
+        update_new_dependencies(execution.task.id, current_job.id, new_jobs_ids)
     # Return first findings list to be used in the current job
     return executions[0] if executions else []
+
+
+def is_streamable(arguments: List[Argument]) -> bool:
+    '''Check if a tool execution can receive findings as soon as they are persisted. Only tools whose arguments
+    accept single inputs can be streamed, because each finding produces its own executions.
+
+    Args:
+        arguments (List[Argument]): Arguments implied in the execution
+
+    Returns:
+        bool: Indicate if the execution can receive findings from the task findings stream
+    '''
+    return not any(a.multiple for a in arguments)
+
+
+def hand_off_findings(execution: Execution, job_id: str, findings: List[Finding]) -> None:
+    '''Publish findings persisted by an execution and enqueue executions of the dependent jobs that can use them,
+    without waiting for the end of the rest of the dependencies.
+
+    Args:
+        execution (Execution): Execution that has found the findings
+        job_id (str): Job Id of the execution
+        findings (List[Finding]): Persisted findings
+    '''
+    dependents = graph.get_dependents(execution.task.id, job_id)
+    if not findings or not dependents:
+        return                                                                  # No executions waiting for findings
+    executions_queue = django_rq.get_queue('executions-queue')
+    # Only jobs waiting for the current one and that accept single inputs can receive the findings
+    dependent_jobs = [
+        j for j in Job.fetch_many(dependents, connection=executions_queue.connection)
+        if j and j.is_deferred and 'execution_id' in j.kwargs
+    ]
+    dependent_executions = Execution.objects.select_related('task', 'tool', 'configuration').in_bulk(
+        [j.kwargs['execution_id'] for j in dependent_jobs]
+    )
+    intensities = Intensity.objects.in_bulk([j.kwargs['intensity_id'] for j in dependent_jobs])
+    arguments = Argument.objects.in_bulk([i for j in dependent_jobs for i in j.kwargs['arguments_ids']])
+    stream.publish(execution.task.id, job_id, get_references(findings))         # Persisted findings are handed off
+    base_inputs = cast(List[BaseInput], findings)
+    for job in dependent_jobs:
+        dependent = dependent_executions.get(job.kwargs['execution_id'])
+        job_arguments = [arguments[i] for i in job.kwargs['arguments_ids'] if i in arguments]
+        if not dependent or job.kwargs['intensity_id'] not in intensities or not is_streamable(job_arguments):
+            continue
+        targets = get_inputs_from_references(job.kwargs['targets'])
+        tool_runner = get_tool_class_by_name(dependent.tool.name)(
+            dependent, intensities[job.kwargs['intensity_id']], job_arguments
+        )
+        planned_executions = [
+            (
+                Execution(task=dependent.task, tool=dependent.tool, configuration=dependent.configuration),
+                intensities[job.kwargs['intensity_id']],
+                job_arguments,
+                targets,
+                param_set,                                                      # Include the handed off findings
+                []
+            )
+            for param_set in utils.get_executions_from_findings(base_inputs, dependent.tool)
+            if tool_runner.check_arguments(targets, cast(List[Finding], param_set))
+        ]
+        new_jobs = producer.bulk_producer(planned_executions, callback=process_callback)
+        if new_jobs:
+            logger.info(f'[Execution] {len(new_jobs)} executions have been started from findings of job {job_id}')
+            # Jobs that wait for the dependent job also wait for the new executions
+            update_new_dependencies(execution.task.id, job.id, [j.id for j in new_jobs])
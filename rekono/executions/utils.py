@@ -1,82 +1,170 @@
-from typing import Any, Dict, List, cast
+import os
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
 
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, prefetch_related_objects
 from input_types import utils
 from input_types.base import BaseInput
 from input_types.models import InputType
 from stringcase import snakecase
 from tools.models import Argument, Input, Tool
 
+from executions.models import Execution
+
+
+def get_arguments_by_input_type(tool: Tool) -> Dict[int, Argument]:
+    '''Get the first tool argument (by input order) that accepts each input type, using only one query.
+
+    Args:
+        tool (Tool): Tool that will be executed
+
+    Returns:
+        Dict[int, Argument]: Argument for each input type Id
+    '''
+    arguments: Dict[int, Argument] = {}
+    for tool_input in Input.objects.filter(argument__tool=tool).select_related('argument').order_by('order', 'id'):
+        arguments.setdefault(tool_input.type_id, tool_input.argument)
+    return arguments
+
+
+def get_relation_fields(base_inputs: List[BaseInput], related_input_types: Tuple[InputType, ...]) -> List[str]:
+    '''Get fields names that can relate the base inputs with inputs of the related input types.
+
+    Related entities are loaded using one query for each field and model, instead of one query for each base input.
+
+    Args:
+        base_inputs (List[BaseInput]): Inputs of the same input type
+        related_input_types (Tuple[InputType, ...]): Related input types
+
+    Returns:
+        List[str]: Field names to check, in priority order
+    '''
+    fields = []
+    for related_input_type in related_input_types:                              # For each related input type
+        fields.append(related_input_type.name.lower())                          # Field to the related model
+        callback_model = related_input_type.get_callback_model_class()
+        if callback_model:                                                      # Field to the related callback model
+            fields.append(snakecase(callback_model.__name__))
+    by_class: Dict[Any, List[BaseInput]] = {}
+    for base_input in base_inputs:
+        by_class.setdefault(base_input.__class__, []).append(base_input)
+    for input_class, instances in by_class.items():
+        for field in fields:
+            try:
+                if input_class._meta.get_field(field).many_to_one:              # Foreign key to the related model
+                    prefetch_related_objects(instances, field)
+            except (AttributeError, FieldDoesNotExist):
+                continue
+    return fields
+
+
+def add_execution_to_index(
+    positions: Dict[Any, List[int]],
+    first_by_class: List[Dict[Any, BaseInput]],
+    execution: List[BaseInput]
+) -> None:
+    '''Add execution to the index of the executions where each input is included.
+
+    Args:
+        positions (Dict[Any, List[int]]): Sorted execution indexes for each input
+        first_by_class (List[Dict[Any, BaseInput]]): First input of each class for each execution
+        execution (List[BaseInput]): New execution, with index equals to the number of indexed executions
+    '''
+    index = len(first_by_class)
+    classes: Dict[Any, BaseInput] = {}
+    for base_input in execution:
+        indexes = positions.setdefault(base_input, [])
+        if not indexes or indexes[-1] != index:
+            indexes.append(index)
+        classes.setdefault(base_input.__class__, base_input)
+    first_by_class.append(classes)
+
+
+def assign_related_inputs(
+    executions: List[List[BaseInput]],
+    base_inputs: List[BaseInput],
+    related_input_types: Tuple[InputType, ...],
+    multiple: bool
+) -> None:
+    '''Assign each input to the first execution that includes a related input.
+
+    If the argument doesn't accept multiple inputs and the execution already has an input of the same class, a copy
+    of the execution is created with the new input instead of the first input of the same class.
+
+    Args:
+        executions (List[List[BaseInput]]): BaseInput list for each execution. It will be updated
+        base_inputs (List[BaseInput]): Inputs of the same input type
+        related_input_types (Tuple[InputType, ...]): Related input types
+        multiple (bool): Indicate if the argument accepts multiple inputs
+    '''
+    fields = get_relation_fields(base_inputs, related_input_types)
+    positions: Dict[Any, List[int]] = {}                                        # Execution indexes by input
+    first_by_class: List[Dict[Any, BaseInput]] = []                             # First input by class by execution
+    for execution in executions:
+        add_execution_to_index(positions, first_by_class, execution)
+    for base_input in base_inputs:                                              # For each input
+        candidates = []
+        for field in fields:                                                    # For each relation field
+            related = getattr(base_input, field, None)
+            if isinstance(related, Model) and related in positions:             # Related input included in executions
+                candidates.append(positions[related][0])
+        if not candidates:
+            continue
+        index = min(candidates)                                                 # First execution with related input
+        execution = executions[index]
+        same_class = first_by_class[index].get(base_input.__class__)            # Input with same type in execution
+        if multiple or same_class is None:
+            execution.append(base_input)                                        # Add input in current execution
+            indexes = positions.setdefault(base_input, [])
+            position = bisect_left(indexes, index)
+            if position == len(indexes) or indexes[position] != index:
+                indexes.insert(position, index)
+            first_by_class[index].setdefault(base_input.__class__, base_input)
+        else:                                                                   # Duplicate current execution
+            new_execution = execution.copy()                                    # Copy input list
+            new_execution.remove(same_class)                                    # Remove input with same type
+            new_execution.append(base_input)                                    # Add input
+            executions.append(new_execution)
+            add_execution_to_index(positions, first_by_class, new_execution)
+
 
 def get_executions_from_findings_with_relationships(
     base_inputs: Dict[InputType, List[BaseInput]],
-    tool: Tool
+    tool: Tool,
+    arguments: Optional[Dict[int, Argument]] = None
 ) -> List[List[BaseInput]]:
     '''Get needed executions for a tool based on a given inputs with relationships between them.
 
     Args:
         base_inputs (Dict[InputType, List[BaseInput]]): InputTypes for this tool and related input list
         tool (Tool): Tool that will be executed
+        arguments (Optional[Dict[int, Argument]], optional): Tool argument for each input type Id. Defaults to None.
 
     Returns:
         List[List[BaseInput]]: List of inputs to be passed for each tool execution
     '''
+    if arguments is None:
+        arguments = get_arguments_by_input_type(tool)
     executions: List[List[BaseInput]] = [[]]                                    # BaseInput list for each execution
     # It's required because base inputs will be assigned to executions based on relationships between them
     input_relations = utils.get_relations_between_input_types()                 # Get relations between input types
+    input_types = {it.id: it for it in base_inputs.keys()}
     # For each input type, and his related input types
-    for input_type, related_input_types in list(reversed(input_relations.items())):
-        if input_type not in base_inputs:
+    for input_type_id, related_input_types in list(reversed(input_relations.items())):
+        if input_type_id not in input_types:
             continue
-        # Get argument by tool and input type
-        argument = Argument.objects.filter(tool=tool, inputs__type=input_type).order_by('inputs__order').first()
+        inputs = base_inputs[input_types[input_type_id]]
+        argument = arguments[input_type_id]                                     # Argument by tool and input type
         if related_input_types:                                                 # Input with related input types
-            for base_input in base_inputs[input_type]:                          # For each input
-                for index, execution_list in enumerate(executions.copy()):      # For each execution list
-                    assigned = False
-                    for related_input_type in related_input_types:              # For each related input type
-                        # Check number of inputs of the same type in this execution
-                        base_inputs_by_class = [bi for bi in execution_list if bi.__class__ == base_input.__class__]
-                        # Get callback model class from related input type
-                        callback_model = related_input_type.get_callback_model_class()
-                        # Get field name to the related callback model
-                        callback_model_field = snakecase(cast(Any, callback_model).__name__) if callback_model else ''
-                        if (
-                            (
-                                # Check if input has a relationship
-                                hasattr(base_input, related_input_type.name.lower()) and
-                                getattr(base_input, related_input_type.name.lower()) in execution_list
-                            ) or
-                            (
-                                # Check if input has a relationship with a callback model
-                                hasattr(base_input, callback_model_field) and
-                                getattr(base_input, callback_model_field) in execution_list
-                            )
-                        ):
-                            if argument.multiple or len(base_inputs_by_class) == 0:
-                                # Add input in current execution
-                                executions[index].append(base_input)
-                                assigned = True
-                                break
-                            elif not argument.multiple and len(base_inputs_by_class) > 0:
-                                # Duplicate current execution
-                                new_execution = execution_list.copy()           # Copy input list
-                                new_execution.remove(base_inputs_by_class[0])   # Remove input with same type
-                                new_execution.append(base_input)                # Add input
-                                executions.append(new_execution)
-                                assigned = True
-                                break
-                    if assigned:
-                        break
+            assign_related_inputs(executions, inputs, related_input_types, argument.multiple)
         elif argument.multiple:
             # Input type without relationships and argument that allows multiple inputs
-            for item in range(len(executions)):
-                executions[item].extend(base_inputs[input_type])                # Add inputs in all executions
+            for execution_list in executions:
+                execution_list.extend(inputs)                                   # Add inputs in all executions
         else:                                                                   # Input type without relationships
-            new_executions: List[List[BaseInput]] = []
-            for base_input in base_inputs[input_type]:                          # For each input
-                for execution_list in executions:                               # For each execution
-                    new_executions.append(list(execution_list + [base_input]))  # Add input to the execution
-            executions = new_executions
+            # Add each input to each execution
+            executions = [execution_list + [base_input] for base_input in inputs for execution_list in executions]
     return executions
 
 
@@ -90,27 +178,40 @@ def get_executions_from_findings(base_inputs: List[BaseInput], tool: Tool) -> Li
     Returns:
         List[List[BaseInput]]: List of inputs to be passed for each tool execution
     '''
-    tool_inputs: List[Input] = Input.objects.filter(argument__tool=tool).all()  # Get inputs by tool
+    tool_inputs: List[Input] = Input.objects.filter(argument__tool=tool).select_related('type').all()
+    by_class: Dict[Any, List[BaseInput]] = {}                                   # Inputs by class
+    for base_input in base_inputs:
+        by_class.setdefault(base_input.__class__, []).append(base_input)
     filtered_base_inputs: Dict[InputType, List[BaseInput]] = {}
     for tool_input in tool_inputs:
-        base_input_list = [
-            bi for bi in base_inputs if bi.__class__ in [
-                tool_input.type.get_model_class(), tool_input.type.get_callback_model_class()
-            ]
+        classes = [
+            c for c in [tool_input.type.get_model_class(), tool_input.type.get_callback_model_class()] if c in by_class
         ]
-        if base_input_list:
-            filtered_base_inputs[tool_input.type] = base_input_list             # Relation between inputs and classes
+        if len(classes) == 1:
+            filtered_base_inputs[tool_input.type] = list(by_class[classes[0]])  # Relation between inputs and classes
+        elif classes:                                                           # Inputs of both classes in order
+            filtered_base_inputs[tool_input.type] = [bi for bi in base_inputs if bi.__class__ in classes]
     if len(filtered_base_inputs.keys()) > 1:                                    # Multiple input types
         # Get executions from inputs with maybe relationships
-        return get_executions_from_findings_with_relationships(filtered_base_inputs, tool)
+        return get_executions_from_findings_with_relationships(
+            filtered_base_inputs, tool, get_arguments_by_input_type(tool)
+        )
     elif len(filtered_base_inputs.keys()) == 1:                                 # Only one input type
         # Get argument by tool and input type
-        argument = Argument.objects.filter(
-            tool=tool, inputs__type=list(filtered_base_inputs.keys())[0]
-        ).order_by('inputs__order').first()
+        argument = get_arguments_by_input_type(tool)[list(filtered_base_inputs.keys())[0].id]
         if argument.multiple:                                                   # Argument with multiple inputs
             return list(filtered_base_inputs.values())                          # One execution with all inputs
         else:
             return [[bi] for bi in list(filtered_base_inputs.values())[0]]      # One execution for each input
     # By default, one execution with all inputs
     return [base_inputs]
+
+
+def remove_plain_output_file(instance: Execution, **kwargs: Any) -> None:
+    '''Remove the full plain output file of an execution when the execution is removed.
+
+    Args:
+        instance (Execution): Removed execution
+    '''
+    if instance.output_plain_file and os.path.isfile(instance.output_plain_file):
+        os.remove(instance.output_plain_file)
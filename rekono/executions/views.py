@@ -1,5 +1,14 @@
+import os
+
 from api.views import GetViewSet
+from django.http import FileResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from executions.filters import ExecutionFilter
 from executions.models import Execution
@@ -17,3 +26,25 @@ class ExecutionViewSet(GetViewSet, ListModelMixin, RetrieveModelMixin):
     # Fields used to search executions
     search_fields = ['task__target__target', 'tool__name', 'configuration__name']
     members_field = 'task__target__project__members'
+
+    @extend_schema(request=None, responses={200: OpenApiTypes.BINARY})
+    @action(detail=True, methods=['GET'], url_path='output', url_name='output')
+    def download_plain_output(self, request: Request, pk: str) -> Response:
+        '''Download the full plain output of the execution, if the plain output saved in database is truncated.
+
+        Args:
+            request (Request): Received HTTP request
+            pk (str): Instance Id
+
+        Returns:
+            Response: HTTP Response
+        '''
+        execution = self.get_object()
+        if not execution.output_plain_file or not os.path.isfile(execution.output_plain_file):
+            return Response(status=status.HTTP_404_NOT_FOUND)                   # Full plain output not available
+        return FileResponse(
+            open(execution.output_plain_file, 'rb'),
+            as_attachment=True,
+            filename=f'execution_{execution.id}.txt',
+            content_type='text/plain'
+        )
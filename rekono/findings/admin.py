@@ -1,5 +1,5 @@
 from django.contrib import admin
-from findings.models import (OSINT, Credential, Path, Port, Exploit,
+from findings.models import (OSINT, Credential, Cve, Path, Port, Exploit,
                              Host, Technology, Vulnerability)
 
 # Register your models here.
@@ -12,3 +12,4 @@ admin.site.register(Technology)
 admin.site.register(Vulnerability)
 admin.site.register(Credential)
 admin.site.register(Exploit)
+admin.site.register(Cve)
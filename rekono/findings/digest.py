@@ -0,0 +1,84 @@
+import json
+from typing import List, Tuple
+
+import django_rq
+from executions.models import Execution
+from findings.models import Finding
+from input_types.utils import get_references
+
+from rekono.settings import NOTIFICATIONS_DIGEST_WINDOW
+
+DIGEST_TTL = 86400                                                              # Max seconds to keep a digest
+TELEGRAM_MAX_LENGTH = 4096                                                      # Max length of Telegram messages
+
+
+def get_digest_key(task_id: int) -> str:
+    '''Get Redis key of the notifications digest of a task.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        str: Redis key of the list with the executions and findings pending of notification
+    '''
+    return f'rekono:task:{task_id}:digest'
+
+
+def add(execution: Execution, findings: List[Finding]) -> bool:
+    '''Add execution findings to the notifications digest of its task.
+
+    Args:
+        execution (Execution): Execution where the findings are discovered
+        findings (List[Finding]): Findings to notify
+
+    Returns:
+        bool: Indicate if the digest flush should be scheduled, because it isn't scheduled yet
+    '''
+    key = get_digest_key(execution.task_id)
+    connection = django_rq.get_connection('findings-queue')
+    with connection.pipeline() as pipeline:
+        pipeline.rpush(key, json.dumps({'execution': execution.id, 'findings': get_references(findings)}))
+        pipeline.expire(key, max(DIGEST_TTL, NOTIFICATIONS_DIGEST_WINDOW * 2))
+        # Flag to schedule only one flush for each digest window
+        pipeline.set(f'{key}:scheduled', '1', nx=True, ex=max(1, NOTIFICATIONS_DIGEST_WINDOW))
+        _, _, scheduled = pipeline.execute()
+    return bool(scheduled)
+
+
+def pop(task_id: int) -> List[Tuple[int, List[Tuple[str, int]]]]:
+    '''Get and remove the notifications digest of a task, atomically.
+
+    Args:
+        task_id (int): Task Id
+
+    Returns:
+        List[Tuple[int, List[Tuple[str, int]]]]: Execution Ids and references to their findings, in arrival order
+    '''
+    key = get_digest_key(task_id)
+    with django_rq.get_connection('findings-queue').pipeline() as pipeline:
+        pipeline.lrange(key, 0, -1)
+        pipeline.delete(key, f'{key}:scheduled')
+        items, _ = pipeline.execute()
+    digest = []
+    for item in items:
+        data = json.loads(item)
+        digest.append((data['execution'], [(model, id) for model, id in data['findings']]))
+    return digest
+
+
+def pack_messages(messages: List[str]) -> List[str]:
+    '''Join Telegram messages in as few messages as possible, respecting the Telegram size limit.
+
+    Args:
+        messages (List[str]): Telegram messages
+
+    Returns:
+        List[str]: Joined Telegram messages
+    '''
+    packed: List[str] = []
+    for message in messages:
+        if packed and len(packed[-1]) + len(message) + 1 <= TELEGRAM_MAX_LENGTH:
+            packed[-1] = f'{packed[-1]}\n{message}'
+        else:
+            packed.append(message)
+    return packed
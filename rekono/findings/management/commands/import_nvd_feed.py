@@ -0,0 +1,25 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from findings.nvd_nist import import_feed
+
+
+class Command(BaseCommand):
+    '''Rekono command to import CVE information from NVD JSON feed files.'''
+
+    help = 'Import CVE information from NVD JSON feed files, to enrich vulnerabilities without Internet access'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        '''Add command arguments.
+
+        Args:
+            parser (CommandParser): Command parser
+        '''
+        parser.add_argument('feeds', nargs='+', help='NVD JSON feed files. Compressed files (.json.gz) are supported')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        '''Import CVE information from NVD JSON feed files.'''
+        for feed in options['feeds']:
+            count = import_feed(feed)                                           # Save CVEs from feed in database
+            self.stdout.write(f'{count} CVEs imported from {feed}')
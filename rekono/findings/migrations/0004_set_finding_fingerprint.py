@@ -0,0 +1,35 @@
+from django.db import migrations
+from findings.utils import get_fingerprint, get_key_values, get_unique_filter
+
+FINDINGS = ['OSINT', 'Host', 'Port', 'Path', 'Technology', 'Credential', 'Vulnerability', 'Exploit']
+
+
+def set_fingerprints(apps, schema_editor):
+    '''Set fingerprint of the existing findings. Duplicated findings are kept without fingerprint.'''
+    from findings import models as findings_models
+    for name in FINDINGS:
+        model = apps.get_model('findings', name)
+        key_fields = getattr(findings_models, name).key_fields
+        fingerprints = set()
+        to_update = []
+        for finding in model.objects.order_by('id').prefetch_related('executions__task__target'):
+            execution = min(finding.executions.all(), key=lambda e: e.id, default=None)
+            if not execution:
+                continue                                                        # Finding without target
+            unique_filter = get_unique_filter(key_fields, get_key_values(finding), execution.task.target)
+            finding.fingerprint = get_fingerprint(model, unique_filter)
+            if finding.fingerprint not in fingerprints:
+                fingerprints.add(finding.fingerprint)
+                to_update.append(finding)
+        model.objects.bulk_update(to_update, ['fingerprint'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findings', '0003_finding_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_fingerprints, migrations.RunPython.noop),
+    ]
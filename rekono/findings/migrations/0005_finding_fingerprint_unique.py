@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findings', '0004_set_finding_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='credential',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='exploit',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='host',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='osint',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='path',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='port',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='technology',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='vulnerability',
+            name='fingerprint',
+            field=models.TextField(blank=True, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('findings', '0005_finding_fingerprint_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cve',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cve', models.TextField(max_length=20, unique=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('cwe', models.TextField(blank=True, max_length=20, null=True)),
+                ('cvss', models.FloatField(blank=True, null=True)),
+                ('severity', models.TextField(choices=[('Info', 'Info'), ('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High'), ('Critical', 'Critical')], default='Medium')),
+                ('reference', models.TextField(blank=True, max_length=250, null=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Union, cast
+from typing import Any, Dict, List, Optional, Union, cast
 
 from defectdojo.constants import DD_DATE_FORMAT
 from django.db import models
@@ -8,12 +8,13 @@ from input_types.enums import InputKeyword
 from input_types.utils import get_url
 from projects.models import Project
 from targets.enums import TargetType
+from targets.models import Target
 from targets.utils import get_target_type
 from tools.models import Input, Tool
 
 from findings.enums import (DataType, OSType, PathType, PortStatus, Protocol,
                             Severity)
-from findings.utils import get_unique_filter
+from findings.utils import get_fingerprint, get_key_values, get_unique_filter
 
 # Create your models here.
 
@@ -40,26 +41,50 @@ class Finding(models.Model, BaseInput):
     first_seen = models.DateTimeField(auto_now_add=True)                        # First date when the finding appear
     last_seen = models.DateTimeField(auto_now_add=True)                         # Last date when the finding appear
     is_active = models.BooleanField(default=True)                               # Indicate if the finding is active
+    # Hash of the key fields values, used to identify the finding without joins
+    fingerprint = models.TextField(max_length=64, unique=True, blank=True, null=True)
 
     key_fields: List[Dict[str, Any]] = []                                       # Unique field list
+    # Target Id used to identify findings without fingerprint. It's set by the callers that already know it
+    identity_target_id: Optional[int] = None
+    identity: Optional[str] = None                                              # Identity calculated on first access
 
     class Meta:
         '''Model metadata.'''
 
         abstract = True                                                         # To be extended by Finding models
 
+    def set_identity_target(self, target_id: Optional[int]) -> None:
+        '''Set the target used to identify the finding if it has no fingerprint, as the fingerprint would do.
+
+        Args:
+            target_id (Optional[int]): Target Id of the executions where the finding is found
+        '''
+        self.identity_target_id = target_id
+        self.identity = None                                                    # Identity is calculated again
+
+    def get_identity(self) -> str:
+        '''Get finding identity from its key fields. Database is never queried.
+
+        Returns:
+            str: Finding fingerprint. If finding has no fingerprint, hash of the key fields values and the target
+        '''
+        if self.fingerprint:
+            return self.fingerprint                                             # Calculated when finding is created
+        if self.identity is None:                                               # Same calculation than fingerprints
+            target = Target(pk=self.identity_target_id) if self.identity_target_id else None
+            self.identity = get_fingerprint(
+                self.__class__, get_unique_filter(self.key_fields, get_key_values(self), target)
+            )
+        return self.identity
+
     def __hash__(self) -> int:
         '''Get an unique value based on the object unique fields.
 
         Returns:
             int: Calculated unique value
         '''
-        hash_fields = []
-        # Get unique filter from key fields
-        unique_filter = get_unique_filter(self.key_fields, vars(self), self.executions.first().task.target)
-        for value in unique_filter.values():
-            hash_fields.append(value)                                           # Add values to the calculation
-        return hash(tuple(hash_fields))                                         # Hash calculation
+        return hash(self.get_identity())
 
     def __eq__(self, o: object) -> bool:
         '''Check if other object is equals to this object.
@@ -70,16 +95,7 @@ class Finding(models.Model, BaseInput):
         Returns:
             bool: Indicate if both objects are equal or not
         '''
-        if isinstance(o, self.__class__):                                       # Check object class
-            equals = True
-            # Get object unique filter from object key fields
-            other_filter = get_unique_filter(o.key_fields, vars(o), o.executions.first().task.target)
-            self_filter = get_unique_filter(self.key_fields, vars(self), self.executions.first().task.target)
-            # Get unique filter from key fields
-            for key, value in self_filter.items():
-                equals = equals and (other_filter.get(key) == value)            # Compare all key fields
-            return equals
-        return False
+        return isinstance(o, self.__class__) and o.get_identity() == self.get_identity()
 
     def get_project(self) -> Project:
         '''Get the related project for the instance. This will be used for authorization purposes.
@@ -651,3 +667,23 @@ class Exploit(Finding):
         elif self.technology:
             text = f'{self.technology.__str__()} - {self.title}'
         return text
+
+
+class Cve(models.Model):
+    '''CVE model. Information about CVEs obtained from NVD NIST, to enrich vulnerabilities without new requests.'''
+
+    cve = models.TextField(max_length=20, unique=True)                          # CVE code
+    description = models.TextField(blank=True, null=True)                       # CVE description
+    cwe = models.TextField(max_length=20, blank=True, null=True)                # CWE
+    cvss = models.FloatField(blank=True, null=True)                             # CVSS base score
+    severity = models.TextField(choices=Severity.choices, default=Severity.MEDIUM)  # Severity based on CVSS score
+    reference = models.TextField(max_length=250, blank=True, null=True)         # CVE reference
+    updated = models.DateTimeField(auto_now=True)                               # Last update date
+
+    def __str__(self) -> str:
+        '''Instance representation in text format.
+
+        Returns:
+            str: String value that identifies this instance
+        '''
+        return self.cve
@@ -1,10 +1,17 @@
+import gzip
+import json
 import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from urllib.parse import urlparse
 
 import requests
 from findings.enums import Severity
+from findings.models import Cve
+from queues import rate_limit
 from requests.adapters import HTTPAdapter, Retry
 
+from rekono.settings import NVD_NIST_RATE_LIMIT, NVD_NIST_RATE_PERIOD
+
 # Mapping between severity values and CVSS values
 CVSS_RANGES = {
     Severity.CRITICAL: (9, 10),
@@ -16,39 +23,61 @@ CVSS_RANGES = {
 
 logger = logging.getLogger()                                                    # Rekono logger
 
+BATCH_SIZE = 500                                                                # Max CVEs saved by each query
+RATE_LIMIT_KEY = 'rekono:nvd-nist:rate-limit'                                   # Token bucket shared by all workers
+CVE_FIELDS = ['description', 'cwe', 'cvss', 'severity', 'reference']           # CVE fields updated from NVD NIST
+
 
 class NvdNist:
     '''NVD NIST API handler to get information for a CVE code.'''
 
     api_url_pattern = 'https://services.nvd.nist.gov/rest/json/cves/2.0?cveId={cve}'   # API Rest URL
     cve_reference_pattern = 'https://nvd.nist.gov/vuln/detail/{cve}'            # CVE reference format
+    session: Optional[requests.Session] = None                                  # HTTP session shared by all requests
 
-    def __init__(self, cve: str) -> None:
+    def __init__(self, cve: str, raw_cve_info: Optional[Dict[str, Any]] = None) -> None:
         '''NVE NIST API constructor.
 
         Args:
             cve (str): CVE code
+            raw_cve_info (Optional[Dict[str, Any]], optional): CVE raw information, if it's already known. Defaults to
+                None, so it's requested to the NVD NIST API.
         '''
         self.cve = cve
         self.reference = self.cve_reference_pattern.format(cve=cve)             # CVE reference
-        self.raw_cve_info = self.request()                                      # CVE raw information
+        # CVE raw information
+        self.raw_cve_info = raw_cve_info if raw_cve_info is not None else self.request()
         self.description = self.parse_description() if self.raw_cve_info else ''    # CVE description
         self.cwe = self.parse_cwe() if self.raw_cve_info else None              # CVE weakness as CWE code
+        self.cvss = self.parse_cvss() if self.raw_cve_info else None            # CVE CVSS base score
         # CVE severity based on CVSS score
         self.severity = self.parse_severity() if self.raw_cve_info else Severity.MEDIUM
 
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        '''Get the HTTP session to the NVD NIST API, shared by all requests to reuse the connections.
+
+        Returns:
+            requests.Session: HTTP session
+        '''
+        if cls.session is None:
+            schema = urlparse(cls.api_url_pattern).scheme                       # Get API schema
+            session = requests.Session()                                        # Create HTTP session
+            # Configure retry protocol to prevent unexpected errors
+            # Free NVD NIST API has a rate limit of 10 requests by second
+            retries = Retry(total=10, backoff_factor=1, status_forcelist=[403, 500, 502, 503, 504, 599])
+            session.mount(f'{schema}://', HTTPAdapter(max_retries=retries))
+            cls.session = session
+        return cls.session
+
     def request(self) -> dict:
         '''Get information from a CVE using the NVD NIST API Rest.
 
         Returns:
             dict: Raw NVD NIST CVE information
         '''
-        schema = urlparse(self.api_url_pattern).scheme                          # Get API schema
-        session = requests.Session()                                            # Create HTTP session
-        # Configure retry protocol to prevent unexpected errors
-        # Free NVD NIST API has a rate limit of 10 requests by second
-        retries = Retry(total=10, backoff_factor=1, status_forcelist=[403, 500, 502, 503, 504, 599])
-        session.mount(f'{schema}://', HTTPAdapter(max_retries=retries))
+        rate_limit.acquire(RATE_LIMIT_KEY, NVD_NIST_RATE_LIMIT, NVD_NIST_RATE_PERIOD)
+        session = self.get_session()
         try:
             response = session.get(self.api_url_pattern.format(cve=self.cve))
         except requests.exceptions.ConnectionError:
@@ -81,13 +110,13 @@ class NvdNist:
                     return desc.get('value')
         return ''
 
-    def parse_severity(self) -> str:
-        '''Get severity value from raw CVE information, based on CVSS score.
+    def parse_cvss(self) -> Optional[float]:
+        '''Get CVSS base score from raw CVE information. Newer CVSS versions are preferred.
 
         Returns:
-            Optional[str]: Severity value
+            Optional[float]: CVSS base score
         '''
-        score = 5                                                               # Score by default: MEDIUM
+        score = None
         score_assigned = False
         cvss_metrics = self.raw_cve_info.get("metrics", {}) or {}
         for field in [
@@ -112,9 +141,130 @@ class NvdNist:
                         break
             if score_assigned:
                 break
+        return score
+
+    def parse_severity(self) -> str:
+        '''Get severity value from raw CVE information, based on CVSS score.
+
+        Returns:
+            Optional[str]: Severity value
+        '''
+        score = self.cvss if self.cvss is not None else 5                       # Score by default: MEDIUM
         for severity in CVSS_RANGES.keys():
             down, up = CVSS_RANGES[severity]
             # Search severity value based on CVSS ranges
             if (score >= down and score < up) or (severity == Severity.CRITICAL and score >= down and score <= up):
                 return severity
         return Severity.MEDIUM
+
+    def to_model(self) -> Cve:
+        '''Get CVE entity with the CVE information.
+
+        Returns:
+            Cve: CVE entity, not saved yet
+        '''
+        return Cve(
+            cve=self.cve,
+            description=self.description,
+            cwe=self.cwe,
+            cvss=self.cvss,
+            severity=self.severity,
+            reference=self.reference
+        )
+
+
+def get_cves(cves: Iterable[str], request: bool = True) -> Dict[str, Cve]:
+    '''Get CVEs information from the local CVE table, and from the NVD NIST API if they aren't saved yet.
+
+    Args:
+        cves (Iterable[str]): CVE codes. Duplicated codes are only requested once
+        request (bool, optional): Indicate if not saved CVEs should be requested to NVD NIST. Defaults to True.
+
+    Returns:
+        Dict[str, Cve]: CVEs information by uppercase CVE code. Only CVEs known by NVD NIST are saved
+    '''
+    codes = {c.upper() for c in cves}
+    found: Dict[str, Cve] = Cve.objects.in_bulk(codes, field_name='cve') if codes else {}
+    if request:
+        requested = [NvdNist(c) for c in sorted(codes - found.keys())]
+        # Not found CVEs aren't saved, so they will be requested again in the future
+        save_cves([n.to_model() for n in requested if n.raw_cve_info], CVE_FIELDS)
+        found.update({n.cve: n.to_model() for n in requested})
+    return found
+
+
+def read_feed(path: str) -> Iterator[NvdNist]:
+    '''Read CVE information from a NVD JSON feed file. Compressed files, API 2.0 and legacy 1.1 formats are supported.
+
+    Args:
+        path (str): NVD JSON feed file path
+
+    Yields:
+        Iterator[NvdNist]: CVE information
+    '''
+    opener: Any = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as feed:
+        data = json.load(feed)
+    for item in data.get('vulnerabilities', []):                               # API 2.0 format
+        raw = item.get('cve', {})
+        if raw.get('id'):
+            yield NvdNist(raw['id'], raw)
+    for item in data.get('CVE_Items', []):                                      # Legacy 1.1 format
+        cve = item.get('cve', {})
+        impact = item.get('impact', {})
+        raw = {
+            'descriptions': cve.get('description', {}).get('description_data', []),
+            'weaknesses': [
+                {'type': 'Primary', 'description': p.get('description', [])}
+                for p in cve.get('problemtype', {}).get('problemtype_data', [])
+            ],
+            'metrics': {
+                field: [{'type': 'Primary', 'cvssData': impact[metric][data]}]
+                for field, metric, data in [
+                    ('cvssMetricV31', 'baseMetricV3', 'cvssV3'),
+                    ('cvssMetricV2', 'baseMetricV2', 'cvssV2')
+                ] if data in impact.get(metric, {})
+            }
+        }
+        cve_id = cve.get('CVE_data_meta', {}).get('ID')
+        if cve_id:
+            yield NvdNist(cve_id, raw)
+
+
+def import_feed(path: str) -> int:
+    '''Save CVE information from a NVD JSON feed file in the local CVE table, using bulk queries.
+
+    Args:
+        path (str): NVD JSON feed file path
+
+    Returns:
+        int: Number of imported CVEs
+    '''
+    batch: List[Cve] = []
+    count = 0
+    for nvd_nist in read_feed(path):
+        batch.append(nvd_nist.to_model())
+        if len(batch) >= BATCH_SIZE:
+            save_cves(batch, CVE_FIELDS)
+            count += len(batch)
+            batch = []
+    if batch:
+        save_cves(batch, CVE_FIELDS)
+        count += len(batch)
+    logger.info(f'[NVD NIST] {count} CVEs imported from {path}')
+    return count
+
+
+def save_cves(cves: List[Cve], fields: List[str]) -> None:
+    '''Create new CVEs and update the existing ones using bulk queries.
+
+    Args:
+        cves (List[Cve]): CVE entities, not saved yet
+        fields (List[str]): Fields to update in the existing CVEs
+    '''
+    existing = Cve.objects.in_bulk([c.cve for c in cves], field_name='cve')
+    for cve in cves:
+        if cve.cve in existing:
+            cve.pk = existing[cve.cve].pk                                       # CVE will be updated
+    Cve.objects.bulk_create([c for c in cves if c.pk is None], ignore_conflicts=True)
+    Cve.objects.bulk_update([c for c in cves if c.pk is not None], fields)
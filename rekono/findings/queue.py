@@ -1,77 +1,235 @@
 import logging
-from typing import List
+from datetime import timedelta
+from typing import List, Optional, Tuple
 
 import django_rq
-from defectdojo.exceptions import DefectDojoException
-from defectdojo.reporter import report
+from defectdojo import queue as defectdojo_queue
 from django_rq import job
 from email_notifications import sender as email_sender
 from executions.models import Execution
+from input_types.utils import get_inputs_from_references
+from tasks.enums import Status
+from tasks.models import Task
 from telegram_bot import sender as telegram_sender
 from telegram_bot.messages.execution import notification_messages
 from users.enums import Notification
+from users.models import User
 
+from findings import digest
 from findings.models import Finding, Vulnerability
-from findings.nvd_nist import NvdNist
+from findings.nvd_nist import get_cves
+
+from rekono.settings import NOTIFICATIONS_DIGEST_WINDOW
 
 logger = logging.getLogger()                                                    # Rekono logger
 
+ENRICHMENT_KEY = 'rekono:findings:enrichment'                                   # Vulnerabilities pending of enrichment
+ENRICHMENT_BATCH_SIZE = 200                                                     # Max vulnerabilities by enrichment
+
 
-def producer(execution: Execution, findings: List[Finding]) -> None:
+def producer(execution: Execution, findings: List[Finding], reported_findings: Optional[List[Finding]] = None) -> None:
     '''Enqueue a list of findings in the findings queue.
 
     Args:
         execution (Execution): Execution where the findings are discovered
         findings (List[Finding]): Findings list to process
+        reported_findings (Optional[List[Finding]], optional): Findings to notify and report. Defaults to findings.
     '''
     findings_queue = django_rq.get_queue('findings-queue')                      # Get findings queue
-    findings_queue.enqueue(consumer, execution=execution, findings=findings)    # Enqueue findings list
+    findings_queue.enqueue(                                                     # Enqueue findings list
+        consumer,
+        execution=execution,
+        findings=findings,
+        reported_findings=reported_findings
+    )
     logger.info(f'[Findings] {len(findings)} findings from execution {execution.id} have been enqueued')
 
 
 @job('findings-queue')
-def consumer(execution: Execution = None, findings: List[Finding] = []) -> None:
+def consumer(
+    execution: Execution = None,
+    findings: List[Finding] = [],
+    reported_findings: Optional[List[Finding]] = None
+) -> None:
     '''Consume jobs from findings queue and process them.
 
     Args:
         execution (Execution, optional): Execution where the findings are discovered. Defaults to None.
         findings (List[Finding], optional): Findings list to process. Defaults to [].
+        reported_findings (Optional[List[Finding]], optional): Findings to notify and report. Defaults to findings.
     '''
-    if execution and findings:
-        for finding in findings:                                                # For each finding
-            if isinstance(finding, Vulnerability) and finding.cve:              # If it's a vulnerability with CVE
-                nn_client = NvdNist(finding.cve)                                # NVD NIST request to get information
-                # Update vulnerability fields with the NIST information
-                finding.description = nn_client.description
-                finding.severity = nn_client.severity
-                finding.cwe = nn_client.cwe
-                finding.reference = nn_client.reference
-                finding.save(update_fields=['description', 'severity', 'cwe', 'reference'])
-        users_to_notify = []
-        # Executor with enabled own executions notification
-        if execution.task.executor.notification_scope == Notification.OWN_EXECUTIONS:
-            users_to_notify.append(execution.task.executor)                     # Save executor user in the notify list
-        # Search project members with enabled all executions notification
-        search_members = execution.task.target.project.members.filter(
-            notification_scope=Notification.ALL_EXECUTIONS
-        ).all()
-        users_to_notify.extend(list(search_members))                            # Save members in the notify list
-        logger.info(f'[Findings] {len(users_to_notify)} will receive a notification with the findings from execution {execution.id}')   # noqa: E501
-        telegram_messages = notification_messages(execution, findings)          # Create Telegram message
-        for user in [u for u in users_to_notify if u.telegram_notification]:    # Sometimes multiple messages are needed
-            for telegram_message in telegram_messages:
-                # For each user with enabled Telegram notifications
-                telegram_sender.send_message(user.telegram_chat.chat_id, telegram_message)  # Telegram notification
-        # Email notifications
-        email_sender.execution_notifications(
-            [u.email for u in users_to_notify if u.email_notification],
-            execution,
-            findings
-        )
+    if not execution:
+        return
+    # Vulnerabilities with CVE are enriched in a different stage, so notifications don't wait for NVD NIST
+    enrichment_producer([f for f in findings if isinstance(f, Vulnerability) and f.cve])
+    # Findings parsed while the tool is running aren't notified until the end of the execution
+    notify(execution, findings if reported_findings is None else reported_findings)
+
+
+def enrich(vulnerabilities: List[Vulnerability], request: bool = True) -> List[Vulnerability]:
+    '''Update vulnerabilities with the information of their CVEs, using only one update query.
+
+    Args:
+        vulnerabilities (List[Vulnerability]): Vulnerabilities with CVE
+        request (bool, optional): Indicate if CVEs not saved yet should be requested to NVD NIST. Defaults to True.
+
+    Returns:
+        List[Vulnerability]: Vulnerabilities that can't be enriched without requests to NVD NIST
+    '''
+    cves = get_cves([v.cve for v in vulnerabilities], request)
+    enriched: List[Vulnerability] = []
+    pending: List[Vulnerability] = []
+    for vulnerability in vulnerabilities:
+        cve = cves.get(vulnerability.cve.upper())
+        if not cve:
+            pending.append(vulnerability)
+            continue
+        # Update vulnerability fields with the NIST information
+        vulnerability.description = cve.description
+        vulnerability.severity = cve.severity
+        vulnerability.cwe = cve.cwe
+        vulnerability.reference = cve.reference
+        enriched.append(vulnerability)
+    Vulnerability.objects.bulk_update(enriched, ['description', 'severity', 'cwe', 'reference'])
+    return pending
+
+
+def enrichment_producer(vulnerabilities: List[Vulnerability]) -> None:
+    '''Enqueue vulnerabilities to be enriched with NVD NIST information. CVEs already saved are applied directly.
+
+    Args:
+        vulnerabilities (List[Vulnerability]): Vulnerabilities with CVE
+    '''
+    pending = enrich(vulnerabilities, False) if vulnerabilities else []
+    if not pending:
+        return
+    # Pending vulnerabilities are shared by all the enrichment jobs, so CVEs are deduplicated between executions
+    django_rq.get_connection('enrichment-queue').sadd(ENRICHMENT_KEY, *[v.id for v in pending])
+    # Enrichment has its own queue, so NVD NIST rate limit doesn't delay the findings notifications
+    django_rq.get_queue('enrichment-queue').enqueue(enrichment_consumer)
+    logger.info(f'[Findings] {len(pending)} vulnerabilities have been enqueued for enrichment')
+
+
+@job('enrichment-queue')
+def enrichment_consumer() -> None:
+    '''Enrich the pending vulnerabilities by batches, until there are no more of them. Vulnerabilities are removed
+    from the pending ones after their enrichment, so they aren't lost if the job fails.'''
+    connection = django_rq.get_connection('enrichment-queue')
+    ids = connection.srandmember(ENRICHMENT_KEY, ENRICHMENT_BATCH_SIZE)
+    while ids:
+        vulnerabilities = list(Vulnerability.objects.filter(pk__in=[int(i) for i in ids]))
+        enrich(vulnerabilities)
+        connection.srem(ENRICHMENT_KEY, *ids)                                   # Enriched or removed vulnerabilities
+        logger.info(f'[Findings] {len(vulnerabilities)} vulnerabilities have been enriched')
+        ids = connection.srandmember(ENRICHMENT_KEY, ENRICHMENT_BATCH_SIZE)
+
+
+def notify(execution: Execution, findings: List[Finding]) -> None:
+    '''Notify findings to the users and enqueue them to be imported in Defect-Dojo.
+
+    Args:
+        execution (Execution): Execution where the findings are discovered
+        findings (List[Finding]): Findings list to notify
+    '''
+    if findings:
+        if NOTIFICATIONS_DIGEST_WINDOW > 0:
+            digest_producer(execution, findings)                                # Notify findings in the task digest
+        else:
+            send_notifications(execution.task, [(execution, findings)])
         if execution.task.target.project.defectdojo_synchronization:
-            try:
-                report(execution, findings)                                     # Import execution in Defect-Dojo
-            except DefectDojoException:
-                # Prevent errors during the import in Defect-Dojo
-                # All the exceptions are managed inside the report function
-                pass
+            # Execution is imported in Defect-Dojo by the Defect-Dojo worker, so its latency doesn't affect findings
+            defectdojo_queue.producer(execution, findings)
+
+
+def get_users_to_notify(task: Task) -> List[User]:
+    '''Get users that should be notified about the task results.
+
+    Args:
+        task (Task): Task whose results are notified
+
+    Returns:
+        List[User]: Users to notify
+    '''
+    users_to_notify = []
+    # Executor with enabled own executions notification
+    if task.executor.notification_scope == Notification.OWN_EXECUTIONS:
+        users_to_notify.append(task.executor)                                   # Save executor user in the notify list
+    # Search project members with enabled all executions notification
+    search_members = task.target.project.members.filter(notification_scope=Notification.ALL_EXECUTIONS).all()
+    users_to_notify.extend(list(search_members))                                # Save members in the notify list
+    return users_to_notify
+
+
+def send_notifications(task: Task, executions: List[Tuple[Execution, List[Finding]]]) -> None:
+    '''Send one notification to each user with the findings of some task executions.
+
+    Args:
+        task (Task): Task of the executions
+        executions (List[Tuple[Execution, List[Finding]]]): Executions and findings to notify
+    '''
+    users_to_notify = get_users_to_notify(task)
+    logger.info(f'[Findings] {len(users_to_notify)} will receive a notification with the findings from {len(executions)} executions of task {task.id}')   # noqa: E501
+    # Create Telegram messages, joining them when possible. Sometimes multiple messages are needed
+    telegram_messages = digest.pack_messages([m for e, f in executions for m in notification_messages(e, f)])
+    # Telegram notifications for users with enabled Telegram notifications, sent in only one job
+    telegram_sender.send_messages([
+        (user.telegram_chat.chat_id, telegram_message)
+        for user in users_to_notify if user.telegram_notification
+        for telegram_message in telegram_messages
+    ])
+    # Email notifications
+    emails = [u.email for u in users_to_notify if u.email_notification]
+    if len(executions) == 1:
+        email_sender.execution_notifications(emails, *executions[0])
+    else:
+        email_sender.task_notifications(emails, task, executions)
+
+
+def digest_producer(execution: Execution, findings: List[Finding]) -> None:
+    '''Add findings to the notifications digest of the task, and schedule the digest notification if needed.
+
+    Args:
+        execution (Execution): Execution where the findings are discovered
+        findings (List[Finding]): Findings list to notify
+    '''
+    if digest.add(execution, findings):
+        django_rq.get_queue('findings-queue').enqueue_in(
+            timedelta(seconds=NOTIFICATIONS_DIGEST_WINDOW), digest_consumer, task_id=execution.task_id
+        )
+    finished = Task.objects.filter(pk=execution.task_id, status__in=[Status.COMPLETED, Status.ERROR, Status.CANCELLED])
+    if finished.exists():                                                       # Task completed before the findings
+        flush_digest(execution.task_id)
+    logger.info(f'[Findings] {len(findings)} findings from execution {execution.id} have been added to the digest')
+
+
+def flush_digest(task_id: int) -> None:
+    '''Enqueue the notification of the task digest without waiting for the digest window.
+
+    Args:
+        task_id (int): Task Id
+    '''
+    if NOTIFICATIONS_DIGEST_WINDOW > 0:
+        django_rq.get_queue('findings-queue').enqueue(digest_consumer, task_id=task_id)
+
+
+@job('findings-queue')
+def digest_consumer(task_id: int) -> None:
+    '''Notify all the findings of the task digest in one notification for each user.
+
+    Args:
+        task_id (int): Task Id
+    '''
+    items = digest.pop(task_id)
+    if not items:                                                               # Digest already notified
+        return
+    executions_by_id = Execution.objects.select_related(
+        'task__target__project', 'task__executor', 'tool', 'configuration'
+    ).in_bulk([e for e, _ in items])
+    findings = get_inputs_from_references([r for _, references in items for r in references])
+    findings_by_reference = {(f._meta.label_lower, f.pk): f for f in findings}
+    executions = [
+        (executions_by_id[e], [findings_by_reference[r] for r in references if r in findings_by_reference])
+        for e, references in items if e in executions_by_id
+    ]
+    if executions:
+        send_notifications(executions[0][0].task, executions)
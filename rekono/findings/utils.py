@@ -1,5 +1,8 @@
+import hashlib
+from enum import Enum
 from typing import Any, Dict, List
 
+from django.db import models
 from targets.models import Target
 
 
@@ -18,6 +21,9 @@ def get_unique_filter(key_fields: List[Dict[str, Any]], fields: Dict[str, Any],
     unique_filter: Dict[str, Any] = {}
     for field in key_fields:                                                    # For each key field
         value = fields.get(field['name'])                                       # Get value for the key field
+        if value is None and field['name'].endswith('_id'):                     # Related entity by field name
+            related = fields.get(field['name'][:-3])
+            value = related.pk if isinstance(related, models.Model) else related
         # Only one base key field should be included in the filter
         if value and (not base_field_found or not field.get('is_base')):
             unique_filter[field['name']] = value                                # Add key field and value to the filter
@@ -26,3 +32,35 @@ def get_unique_filter(key_fields: List[Dict[str, Any]], fields: Dict[str, Any],
     if not base_field_found and target:                                         # If no base field found, use target
         unique_filter['executions__task__target'] = target                      # Add target value
     return unique_filter
+
+
+def get_key_values(finding: Any) -> Dict[str, Any]:
+    '''Get finding values by field name. Related entities are referenced by Id, so no queries are needed.
+
+    Args:
+        finding (Any): Finding entity
+
+    Returns:
+        Dict[str, Any]: Finding values by field name
+    '''
+    return {f.name: getattr(finding, f.attname) for f in finding._meta.concrete_fields}
+
+
+def get_fingerprint(finding_type: Any, unique_filter: Dict[str, Any]) -> str:
+    '''Get fingerprint from finding unique filter. It identifies the finding in database.
+
+    Args:
+        finding_type (Any): Finding model
+        unique_filter (Dict[str, Any]): Filter with the key fields and values
+
+    Returns:
+        str: Finding fingerprint
+    '''
+    values = []
+    for field, value in sorted(unique_filter.items()):
+        if isinstance(value, models.Model):
+            value = value.pk                                                    # Related entities by Id
+        else:                                                                   # Same value type than database
+            value = finding_type._meta.get_field(field).to_python(value.value if isinstance(value, Enum) else value)
+        values.append(f'{field}={value}')
+    return hashlib.sha256('|'.join(values).encode()).hexdigest()
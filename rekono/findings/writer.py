@@ -0,0 +1,242 @@
+import logging
+from typing import Any, Dict, List, Set
+
+from django.db import models
+from executions.models import Execution
+
+from findings.models import Finding
+from findings.utils import get_fingerprint, get_key_values, get_unique_filter
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+# Max number of findings saved or resolved by each query. It keeps the number of query parameters under the limits
+BATCH_SIZE = 250
+
+
+class FindingsWriter:
+    '''Buffer parsed findings to save them using bulk queries instead of a few queries for each finding.
+
+    Each parsed finding is a distinct instance, as if it was saved at creation time. Parsed findings with the same
+    fingerprint are applied in order over the same database entity when the writer is flushed.
+    '''
+
+    def __init__(self, execution: Execution) -> None:
+        '''Findings writer constructor.
+
+        Args:
+            execution (Execution): Execution where the findings are discovered
+        '''
+        self.execution = execution
+        self.target = execution.task.target                                     # Target used in the fingerprints
+        # Findings pending to be saved by model and fingerprint, in parsing order
+        self.pending: Dict[Any, Dict[str, List[Finding]]] = {}
+        # Last saved finding by model and fingerprint
+        self.saved: Dict[Any, Dict[str, Finding]] = {}
+        # Data about the pending findings: initial values and fields provided by the parser
+        self.initial: Dict[int, Dict[str, Any]] = {}
+        self.provided: Dict[int, Set[str]] = {}
+
+    def add(self, finding_type: Any, fields: Dict[str, Any]) -> Finding:
+        '''Add finding to the writer buffer.
+
+        Args:
+            finding_type (Any): Finding model
+            fields (Dict[str, Any]): Finding fields
+
+        Returns:
+            Finding: Finding instance that will be saved after the next flush
+        '''
+        if any(isinstance(v, models.Model) and v.pk is None for v in fields.values()):
+            # Related findings are required to be saved before the current one
+            self.flush()
+        fingerprint = get_fingerprint(finding_type, get_unique_filter(finding_type.key_fields, fields, self.target))
+        fields['fingerprint'] = fingerprint
+        chain = self.pending.setdefault(finding_type, {}).setdefault(fingerprint, [])
+        previous = chain[-1] if chain else self.saved.get(finding_type, {}).get(fingerprint)
+        finding = finding_type(**fields)
+        self.provided[id(finding)] = {k for k, v in fields.items() if v}
+        if previous:                                                            # Finding parsed before
+            self.merge(finding, previous)                                       # Include the previous values
+        self.initial[id(finding)] = {
+            f.attname: getattr(finding, f.attname) for f in finding_type._meta.concrete_fields
+        }
+        chain.append(finding)
+        return finding
+
+    def update(self, finding: Finding, fields: List[str]) -> None:
+        '''Update finding fields after its creation. Findings pending to be saved aren't updated, because their
+        modified values will be saved by the next flush.
+
+        Args:
+            finding (Finding): Parsed finding
+            fields (List[str]): Modified field names
+        '''
+        if finding.pk is not None:                                              # Finding already saved
+            finding.save(update_fields=fields)
+
+    def get_existing_findings(self, finding_type: Any, fingerprints: List[str]) -> Dict[str, Finding]:
+        '''Get existing findings in database by fingerprint. One query for each chunk.
+
+        Args:
+            finding_type (Any): Finding model
+            fingerprints (List[str]): Fingerprints of the pending findings
+
+        Returns:
+            Dict[str, Finding]: Existing finding for each fingerprint
+        '''
+        existing: Dict[str, Finding] = {}
+        for index in range(0, len(fingerprints), BATCH_SIZE):
+            for finding in finding_type.objects.filter(fingerprint__in=fingerprints[index:index + BATCH_SIZE]):
+                existing[finding.fingerprint] = finding
+        return existing
+
+    def get_legacy_findings(self, finding_type: Any, findings: Dict[str, Finding]) -> Dict[str, Finding]:
+        '''Get existing findings without fingerprint using the key fields. They are saved before the fingerprints or
+        loaded from fixtures. One query for each finding, only if there are findings without fingerprint.
+
+        Args:
+            finding_type (Any): Finding model
+            findings (Dict[str, Finding]): Parsed findings not found by fingerprint
+
+        Returns:
+            Dict[str, Finding]: Existing finding for each fingerprint
+        '''
+        if not findings or not finding_type.objects.filter(fingerprint__isnull=True).exists():
+            return {}
+        existing: Dict[str, Finding] = {}
+        for fingerprint, finding in findings.items():
+            unique_filter = get_unique_filter(finding_type.key_fields, get_key_values(finding), self.target)
+            legacy = finding_type.objects.filter(
+                fingerprint__isnull=True, **unique_filter
+            ).exclude(pk__in=[f.pk for f in existing.values()]).order_by('id').first()
+            if legacy:                                                          # Fingerprint is saved by the flush
+                existing[fingerprint] = legacy
+        return existing
+
+    def merge(self, finding: Finding, previous: Finding) -> List[str]:
+        '''Merge parsed finding with the previous state of the same entity, as if it was updated with parsed values.
+
+        Args:
+            finding (Finding): Parsed finding
+            previous (Finding): Previous state of the same finding: existing entity or previous parsed finding
+
+        Returns:
+            List[str]: Updated field names
+        '''
+        updated_fields = []
+        initial = self.initial.get(id(finding))
+        provided = self.provided.get(id(finding), set())
+        for field in finding._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            value = getattr(finding, field.attname)
+            # Field provided by the parser, or modified after finding creation
+            changed = (
+                field.name in provided or
+                field.attname in provided or
+                (initial is not None and value != initial.get(field.attname))
+            )
+            if changed and value:
+                if value != getattr(previous, field.attname):                   # Distinct value than the previous one
+                    updated_fields.append(field.name)
+            else:
+                setattr(finding, field.attname, getattr(previous, field.attname))   # Keep the previous value
+        if previous.pk is not None:
+            finding.pk = previous.pk
+            finding._state.adding = False
+            finding._state.db = previous._state.db
+        return updated_fields
+
+    def apply(self, chain: List[Finding], previous: Finding) -> Set[str]:
+        '''Apply parsed findings in order over the previous state of the same entity.
+
+        Args:
+            chain (List[Finding]): Parsed findings with the same fingerprint, in parsing order
+            previous (Finding): Previous state of the entity
+
+        Returns:
+            Set[str]: Updated field names
+        '''
+        updated_fields: Set[str] = set()
+        for finding in chain:
+            updated_fields.update(self.merge(finding, previous))
+            previous = finding
+        return updated_fields
+
+    def create(self, finding_type: Any, findings: List[Finding]) -> Dict[str, Set[str]]:
+        '''Create new findings in database using bulk queries.
+
+        Args:
+            finding_type (Any): Finding model
+            findings (List[Finding]): New findings
+
+        Returns:
+            Dict[str, Set[str]]: Field names to update by fingerprint, only for findings created by other executions
+        '''
+        # Findings created by other executions at the same time are ignored thanks to the fingerprint index
+        finding_type.objects.bulk_create(findings, batch_size=BATCH_SIZE, ignore_conflicts=True)
+        created = self.get_existing_findings(finding_type, [f.fingerprint for f in findings])
+        updated_fields: Dict[str, Set[str]] = {}
+        for finding in findings:                                                # Get Ids of the created findings
+            fields = self.merge(finding, created[finding.fingerprint])
+            if fields:
+                updated_fields[finding.fingerprint] = set(fields)
+        return updated_fields
+
+    def link(self, finding_type: Any, findings: List[Finding]) -> None:
+        '''Link findings to the execution using bulk queries.
+
+        Args:
+            finding_type (Any): Finding model
+            findings (List[Finding]): Saved findings
+        '''
+        executions = finding_type._meta.get_field('executions')
+        through = executions.remote_field.through                               # Findings and executions relation
+        through.objects.bulk_create(
+            [
+                through(**{
+                    f'{executions.m2m_field_name()}_id': finding.pk,
+                    f'{executions.m2m_reverse_field_name()}_id': self.execution.pk
+                }) for finding in findings
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True                                               # Finding already linked to execution
+        )
+
+    def flush(self) -> None:
+        '''Save pending findings in database using bulk queries and link them to the execution.'''
+        for finding_type, pending in self.pending.items():
+            if not pending:
+                continue
+            saved = self.saved.setdefault(finding_type, {})
+            existing = self.get_existing_findings(finding_type, [k for k in pending.keys() if k not in saved])
+            existing.update(self.get_legacy_findings(
+                finding_type,
+                {k: c[0] for k, c in pending.items() if k not in saved and k not in existing}
+            ))
+            to_create = [c[0] for k, c in pending.items() if k not in saved and k not in existing]
+            updated_fields = self.create(finding_type, to_create) if to_create else {}
+            for fingerprint, chain in pending.items():
+                previous = saved.get(fingerprint) or existing.get(fingerprint)  # Finding already exists
+                if not previous:                                                # Finding created by this flush
+                    previous, chain = chain[0], chain[1:]
+                fields = self.apply(chain, previous)
+                if fields:
+                    updated_fields.setdefault(fingerprint, set()).update(fields)
+                saved[fingerprint] = chain[-1] if chain else previous
+            if updated_fields:                                                  # Save last values of each finding
+                finding_type.objects.bulk_update(
+                    [saved[k] for k in updated_fields.keys()],
+                    list(set().union(*updated_fields.values())),
+                    batch_size=BATCH_SIZE
+                )
+            self.link(finding_type, [saved[k] for k in pending.keys()])
+            for chain in pending.values():
+                for finding in chain:
+                    self.provided.pop(id(finding), None)
+                    self.initial.pop(id(finding), None)
+            logger.info(
+                f'[Findings] {len(to_create)} {finding_type.__name__} findings created and {len(updated_fields)} '
+                f'updated from execution {self.execution.id}'
+            )
+            pending.clear()
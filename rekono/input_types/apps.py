@@ -5,7 +5,7 @@ from typing import Any
 from django.apps import AppConfig
 from django.core import management
 from django.core.management.commands import loaddata
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class InputTypesConfig(AppConfig):
@@ -17,6 +17,12 @@ class InputTypesConfig(AppConfig):
         '''Run code as soon as the registry is fully populated.'''
         # Configure fixtures to be loaded after migration
         post_migrate.connect(self.load_input_types_model, sender=self)
+        from input_types.models import InputType
+        from input_types.utils import clear_relations_between_input_types
+
+        # Cached relations between input types are removed when input types change
+        post_save.connect(clear_relations_between_input_types, sender=InputType)
+        post_delete.connect(clear_relations_between_input_types, sender=InputType)
 
     def load_input_types_model(self, **kwargs: Any) -> None:
         '''Load input types fixtures in database.'''
@@ -1,14 +1,99 @@
-from typing import Dict, List, Optional
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
 
+import django_rq
 import requests
 import urllib3
+from django.apps import apps
 from django.db import models
 from input_types.base import BaseInput
 from input_types.models import InputType
+from redis.exceptions import RedisError
 from urllib3.exceptions import InsecureRequestWarning
 
+from rekono.settings import TOOLS_URL_PROBE_TTL
+
 urllib3.disable_warnings(category=InsecureRequestWarning)
 
+logger = logging.getLogger()                                                    # Rekono logger
+
+PROBE_WORKERS = 20                                                              # Max concurrent URL checks
+# Version of the input types shared by all the processes. It's incremented when input types change
+VERSION_KEY = 'rekono:input-types:version'
+# URL checks requested while inputs are parsed to get them at the same time. One set for each thread
+probes_collector = threading.local()
+
+
+def get_probe_key(protocol: str, host: str, port: Optional[int]) -> str:
+    '''Get Redis key to save the URL liveness check for a protocol, host and port.
+
+    Args:
+        protocol (str): URL protocol
+        host (str): URL host
+        port (Optional[int]): URL port
+
+    Returns:
+        str: Redis key for the URL check
+    '''
+    return f'rekono:url-probe:{protocol}:{host}:{port or ""}'
+
+
+def probe_url(url: str) -> bool:
+    '''Check if URL is reachable.
+
+    Args:
+        url (str): URL to check
+
+    Returns:
+        bool: Indicate if URL is reachable
+    '''
+    try:
+        # nosemgrep: python.requests.security.disabled-cert-validation.disabled-cert-validation
+        requests.get(url, timeout=5, verify=False)                              # Test URL connection
+        return True
+    except Exception:
+        return False
+
+
+def get_cached_probe(protocol: str, host: str, port: Optional[int]) -> Optional[bool]:
+    '''Get URL liveness check from cache.
+
+    Args:
+        protocol (str): URL protocol
+        host (str): URL host
+        port (Optional[int]): URL port
+
+    Returns:
+        Optional[bool]: Indicate if URL is reachable, or None if it isn't in cache
+    '''
+    try:
+        value = django_rq.get_connection('tasks-queue').get(get_probe_key(protocol, host, port))
+    except RedisError:                                                          # Cache not available
+        return None
+    return value == b'1' if value is not None else None
+
+
+def save_probe(protocol: str, host: str, port: Optional[int], reachable: bool) -> None:
+    '''Save URL liveness check in cache.
+
+    Args:
+        protocol (str): URL protocol
+        host (str): URL host
+        port (Optional[int]): URL port
+        reachable (bool): Indicate if URL is reachable
+    '''
+    try:
+        django_rq.get_connection('tasks-queue').set(
+            get_probe_key(protocol, host, port),
+            '1' if reachable else '0',
+            ex=TOOLS_URL_PROBE_TTL
+        )
+    except RedisError:                                                          # Cache not available
+        logger.warning(f'[Input Types] URL check for {protocol}://{host}:{port} can\'t be saved in cache')
+
 
 def get_url(host: str, port: int = None, endpoint: str = '', protocols: List[str] = ['http', 'https']) -> Optional[str]:
     '''Get a HTTP or HTTPS URL from host, port and endpoint.
@@ -20,41 +105,166 @@ def get_url(host: str, port: int = None, endpoint: str = '', protocols: List[str
         protocols (List[str], optional): Protocol list to check. Defaults to ['http', 'https'].
 
     Returns:
-        Optional[str]: [description]
+        Optional[str]: First reachable URL, or None if no one is reachable
     '''
+    collector = getattr(probes_collector, 'probes', None)
+    if collector is not None:                                                   # URL checks are being collected
+        collector.update([(protocol, host, port) for protocol in protocols])
+        return None
     schema = '{protocol}://{host}/{endpoint}'
     if port:
         schema = '{protocol}://{host}:{port}/{endpoint}'                        # Include port schema if port exists
     for protocol in protocols:                                                  # For each protocol
         url_to_test = schema.format(protocol=protocol, host=host, port=port, endpoint=endpoint)
-        try:
-            # nosemgrep: python.requests.security.disabled-cert-validation.disabled-cert-validation
-            requests.get(url_to_test, timeout=5, verify=False)                  # Test URL connection
+        reachable = get_cached_probe(protocol, host, port)
+        if reachable is None:                                                   # URL not checked yet
+            reachable = probe_url(url_to_test)
+            save_probe(protocol, host, port, reachable)
+        if reachable:
             return url_to_test
-        except Exception:
-            continue
     return None
 
 
-def get_relations_between_input_types() -> Dict[InputType, List[InputType]]:
-    '''Get relations between the different input types.
+def probe_urls(inputs: List[BaseInput]) -> None:
+    '''Check at the same time all the URLs required to parse the given inputs, and save the results in cache.
+
+    Args:
+        inputs (List[BaseInput]): Inputs to be parsed later
+    '''
+    probes: Set[Tuple[str, str, Optional[int]]] = set()
+    probes_collector.probes = probes
+    try:
+        for base_input in inputs:                                               # Get required URL checks
+            base_input.parse()
+    finally:
+        probes_collector.probes = None
+    probes = {p for p in probes if get_cached_probe(*p) is None}                # Exclude URL checks in cache
+    if not probes:
+        return
+
+    def probe(protocol: str, host: str, port: Optional[int]) -> None:
+        url = f'{protocol}://{host}:{port}/' if port else f'{protocol}://{host}/'
+        save_probe(protocol, host, port, probe_url(url))
+
+    with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(probes))) as executor:
+        list(executor.map(lambda p: probe(*p), probes))
+    logger.info(f'[Input Types] {len(probes)} URLs have been checked')
+
+
+# Relations used by each model to parse the entities, loaded with them to avoid one query for each entity
+PARSE_RELATIONS: Dict[str, List[str]] = {
+    'authentications.authentication': ['target_port__target'],
+    'targets.targetport': ['target'],
+    'findings.port': ['host'],
+    'findings.path': ['port__host'],
+    'findings.technology': ['port__host'],
+    'findings.credential': ['technology__port__host'],
+    'findings.vulnerability': ['technology__port__host', 'port__host'],
+    'findings.exploit': [
+        'vulnerability__technology__port__host', 'vulnerability__port__host', 'technology__port__host'
+    ],
+}
+
+
+def get_references(inputs: List[Any]) -> List[Tuple[str, int]]:
+    '''Get compact references to database entities, to be sent in queue jobs instead of the entities.
+
+    Args:
+        inputs (List[Any]): Database entities (targets, resources, findings, etc.)
+
+    Returns:
+        List[Tuple[str, int]]: Reference for each entity in 'app.model' and Id format
+    '''
+    return [(i._meta.label_lower, i.pk) for i in inputs]
+
+
+def get_inputs_from_references(references: List[Tuple[str, int]], target_id: Optional[int] = None) -> List[Any]:
+    '''Get database entities from references, using one query for each model. Relations used to parse the entities
+    are loaded in the same query.
+
+    Args:
+        references (List[Tuple[str, int]]): Reference for each entity in 'app.model' and Id format
+        target_id (Optional[int], optional): Target Id of the findings, to identify them. Defaults to None.
 
     Returns:
-        Dict[InputType, List[InputType]]: Dict with a list of related input types for each input type
+        List[Any]: Database entities in the same order than references. Removed entities are ignored
     '''
-    relations: Dict[InputType, List[InputType]] = {}
-    input_types = InputType.objects.filter(regular=True).order_by('-id').all()  # Get all input types
-    for it in input_types:                                                      # For each input type
-        relations[it] = []
+    ids: Dict[str, List[int]] = {}
+    for model, id in references:                                                # Group Ids by model
+        ids.setdefault(model, []).append(id)
+    entities = {
+        model: apps.get_model(model).objects.select_related(*PARSE_RELATIONS.get(model, [])).in_bulk(model_ids)
+        for model, model_ids in ids.items()
+    }
+    inputs = [entities[model][id] for model, id in references if id in entities[model]]
+    if target_id is not None:
+        for base_input in inputs:
+            if hasattr(base_input, 'set_identity_target'):                     # Findings without fingerprint
+                base_input.set_identity_target(target_id)
+    return inputs
+
+
+def get_input_types_version() -> Optional[int]:
+    '''Get version of the input types from Redis, to detect changes made by other processes.
+
+    Returns:
+        Optional[int]: Input types version, or None if it isn't available
+    '''
+    try:
+        return int(django_rq.get_connection('tasks-queue').get(VERSION_KEY) or 0)
+    except RedisError:                                                          # Version not available
+        return None
+
+
+# Relations between input types by input type Id. Computed only once, and removed when input types change
+input_types_relations: Optional[Mapping[int, Tuple[InputType, ...]]] = None
+relations_version: Optional[int] = None                                         # Input types version of the relations
+
+
+def get_relations_between_input_types() -> Mapping[int, Tuple[InputType, ...]]:
+    '''Get relations between the different input types. They are computed the first time and cached in memory.
+    Cached relations are computed again if input types have changed in any process.
+
+    Returns:
+        Mapping[int, Tuple[InputType, ...]]: Read-only mapping with the related input types for each input type Id
+    '''
+    global input_types_relations, relations_version
+    version = get_input_types_version()
+    if input_types_relations is not None and version is not None and version == relations_version:
+        return input_types_relations
+    relations_version = version
+    relations: Dict[int, Tuple[InputType, ...]] = {}
+    input_types = list(InputType.objects.order_by('id').all())                  # Get all input types
+    by_model: Dict[str, InputType] = {}
+    for it in input_types:                                                      # Input type by model reference
+        if it.model:
+            by_model.setdefault(it.model, it)
+    for it in reversed(input_types):                                            # For each input type
+        if not it.regular:
+            continue
+        related = []
         model = it.get_model_class()
         if model:
             for field in model._meta.get_fields():                              # For each model field
                 # Check if field is a ForeignKey to a BaseInput model
                 if field.__class__ == models.ForeignKey and issubclass(field.related_model, BaseInput):
                     # Search InputType by model
-                    related_type = InputType.objects.filter(
-                        model=f'{field.related_model._meta.app_label}.{field.related_model._meta.model_name}'
+                    related_type = by_model.get(
+                        f'{field.related_model._meta.app_label}.{field.related_model._meta.model_name}'
                     )
-                    if related_type.exists():
-                        relations[it].append(related_type.first())
-    return relations
+                    if related_type:
+                        related.append(related_type)
+        relations[it.id] = tuple(related)
+    input_types_relations = MappingProxyType(relations)
+    return input_types_relations
+
+
+def clear_relations_between_input_types(**kwargs: Any) -> None:
+    '''Remove cached relations between input types. It's executed when input types change, and the input types
+    version is incremented so the relations cached by other processes are removed too.'''
+    global input_types_relations
+    try:
+        django_rq.get_connection('tasks-queue').incr(VERSION_KEY)
+    except RedisError:                                                          # Version not available
+        logger.warning('[Input Types] Input types version can\'t be incremented')
+    input_types_relations = None
@@ -1,7 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class ProcessesConfig(AppConfig):
     '''Processes Django application.'''
 
     name = 'processes'
+
+    def ready(self) -> None:
+        '''Run code as soon as the registry is fully populated.'''
+        from input_types.models import InputType
+        from processes.plans import clear_process_plans
+        from tools.models import (Argument, Configuration, Input, Intensity,
+                                  Output, Tool)
+        for model in [Tool, Intensity, Configuration, Argument, Input, Output, InputType]:
+            # Compiled process plans are removed when tools data change
+            post_save.connect(clear_process_plans, sender=model)
+            post_delete.connect(clear_process_plans, sender=model)
@@ -1,34 +1,52 @@
 import logging
-from typing import Any
+from typing import Any, Dict, List, Tuple
 
 from django.utils import timezone
 from executions.models import Execution
+from executions.queue import counters, graph, stream
+from findings.queue import flush_digest
 from tasks.enums import Status
-from tools.tools.base_tool import BaseTool
+from tasks.models import Task
 
 logger = logging.getLogger()                                                    # Rekono logger
 
 
-def process_callback(job: Any, connection: Any, result: BaseTool, *args: Any, **kwargs: Any) -> None:
+def process_callback(job: Any, connection: Any, result: List[Tuple[str, int]], *args: Any, **kwargs: Any) -> None:
     '''Run code after execution job success. In this case, check if all executions of the same task has been finished.
 
     Args:
-        job (Any): Not used.
+        job (Any): Successful execution job
         connection (Any): Not used.
-        result (BaseTool): Successful execution job result
+        result (List[Tuple[str, int]]): Not used.
     '''
-    task = result.execution.task                                                # Get the associated task
-    # Check if there are pending executions (requested or running) associated to this task
-    pending_executions = Execution.objects.filter(task=task, status__in=[Status.REQUESTED, Status.RUNNING]).exists()
-    if not bool(pending_executions):                                            # No pending executions found
-        # Check if there are error executions associated to this task
-        error_executions = Execution.objects.filter(task=task, status=Status.ERROR).exists()
-        # Check if there are cancelled executions associated to this task
-        cancelled_executions = Execution.objects.filter(task=task, status=Status.CANCELLED).exists()
-        # Set task status to error if error executions found, completed otherwise
-        task_status = Status.COMPLETED if not bool(error_executions) else Status.ERROR
-        # Set task status to cancelled if cancelled executions found
-        task.status = task_status if not bool(cancelled_executions) else Status.CANCELLED
-        task.end = timezone.now()                                               # Update the task end date
-        task.save(update_fields=['status', 'end'])
+    # Get the associated task
+    execution = Execution.objects.select_related('task').get(pk=job.kwargs['execution_id'])
+    # Count the finished execution. Pending executions are known without querying the task executions
+    task_counters = counters.finish_execution(execution.task.id, execution.id, execution.status)
+    if task_counters is None:                                                   # Counters can't be trusted
+        task_counters = counters.reconcile(execution.task.id)                   # Count executions from database
+    if task_counters[counters.PENDING] == 0:                                    # No pending executions found
+        complete_task(execution.task, task_counters)
+
+
+def complete_task(task: Task, task_counters: Dict[str, int]) -> None:
+    '''Set the final status of a task whose executions have finished. It's only applied once for each task run.
+
+    Args:
+        task (Task): Task whose executions have finished
+        task_counters (Dict[str, int]): Task execution counters
+    '''
+    # Set task status to error if error executions found, completed otherwise
+    task_status = Status.COMPLETED if not task_counters[counters.ERROR] else Status.ERROR
+    # Set task status to cancelled if cancelled executions found
+    task.status = task_status if not task_counters[counters.CANCELLED] else Status.CANCELLED
+    task.end = timezone.now()                                                   # Update the task end date
+    updated = Task.objects.filter(pk=task.id).exclude(
+        status__in=[Status.COMPLETED, Status.ERROR, Status.CANCELLED]           # Task already finished
+    ).update(status=task.status, end=task.end)
+    graph.remove_graph(task.id)                                                 # Remove task dependency graph
+    stream.remove_stream(task.id)                                               # Remove task findings stream
+    counters.remove_counters(task.id)                                           # Remove task execution counters
+    if updated:
+        flush_digest(task.id)                                                   # Notify the task digest now
         logger.info(f'[Task] Task {task.id} has been completed with {task.status} status')
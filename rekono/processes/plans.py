@@ -0,0 +1,157 @@
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.db.models import Max
+from input_types.models import InputType
+from processes.models import Process, Step
+from tools.models import Argument, Input, Intensity, Output
+from tools.plans import get_tools_version
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+
+class StepPlan:
+    '''Compiled step of a process plan, with all the tools data needed to execute it.'''
+
+    def __init__(
+        self,
+        step: Step,
+        intensity: Intensity,
+        arguments: List[Argument],
+        inputs: Set[int],
+        outputs: List[InputType]
+    ) -> None:
+        '''Step plan constructor.
+
+        Args:
+            step (Step): Process step to be executed
+            intensity (Intensity): Tool intensity to be applied in the execution
+            arguments (List[Argument]): Tool arguments
+            inputs (Set[int]): Input type Ids used by the tool arguments
+            outputs (List[InputType]): Input types obtained from the step configuration
+        '''
+        self.step = step
+        self.intensity = intensity
+        self.arguments = arguments
+        self.inputs = inputs
+        self.outputs = outputs
+        # Indexes of the previous step plans whose output will be needed to execute this step
+        self.dependencies: List[int] = []
+        # Save the Input Types that will be obtained from dependencies
+        self.dependencies_coverage: List[InputType] = []
+
+    def add_dependencies(self, previous_plans: List['StepPlan']) -> None:
+        '''Add previous step plans as dependencies if their outputs are needed as input for this step.
+
+        Args:
+            previous_plans (List[StepPlan]): Step plans that will be executed before this one
+        '''
+        for index, previous in enumerate(previous_plans):                       # For each planned step
+            for output in previous.outputs:                                     # For each previous step output
+                if output.id in self.inputs:                                    # Output type is in current step inputs
+                    if index not in self.dependencies:
+                        self.dependencies.append(index)                         # Add previous step as dependency
+                    # Add output as dependency covered input type
+                    self.dependencies_coverage.append(output)
+
+
+def get_steps(process: Process) -> List[Step]:
+    '''Get all process steps sort by stage and priority (descendent), so steps from previous steps and with greater
+    priority will be included before in the plan.
+
+    Args:
+        process (Process): Process
+
+    Returns:
+        List[Step]: Sorted process steps with their tools and configurations
+    '''
+    return list(
+        Step.objects.annotate(
+            max_input=Max('tool__arguments__inputs__type__id'),
+            max_output=Max('configuration__outputs__type__id')
+        ).filter(
+            process=process
+        ).select_related(
+            'tool', 'configuration'
+        ).order_by(
+            'configuration__stage', '-priority', 'max_output', 'max_input'
+        )
+    )
+
+
+def compile_process_plan(steps: List[Step], intensity: int) -> List[StepPlan]:
+    '''Compile the execution plan of the process steps, using the same queries for all of them.
+
+    Args:
+        steps (List[Step]): Sorted process steps
+        intensity (int): Task intensity
+
+    Returns:
+        List[StepPlan]: Steps that should be executed, with their dependencies
+    '''
+    tools = {s.tool_id for s in steps}
+    intensities: Dict[int, Intensity] = {}
+    # Get the greater intensity for each tool, limited to the task intensity
+    for i in Intensity.objects.filter(tool__in=tools, value__lte=intensity).order_by('-value'):
+        intensities.setdefault(i.tool_id, i)
+    arguments: Dict[int, List[Argument]] = {t: [] for t in tools}
+    for argument in Argument.objects.filter(tool__in=tools).order_by('id'):
+        arguments[argument.tool_id].append(argument)
+    inputs: Dict[int, Set[int]] = {t: set() for t in tools}
+    for tool_id, type_id in Input.objects.filter(argument__tool__in=tools).values_list('argument__tool', 'type'):
+        inputs[tool_id].add(type_id)
+    outputs: Dict[int, Dict[int, InputType]] = {s.configuration_id: {} for s in steps}
+    for output in Output.objects.filter(configuration__in=outputs.keys()).select_related('type'):
+        outputs[output.configuration_id].setdefault(output.type_id, output.type)
+    plan: List[StepPlan] = []
+    for step in steps:
+        # If no intensity found with lower value than the task intensity, the step will be skipped
+        if step.tool_id not in intensities:
+            continue
+        step_plan = StepPlan(
+            step,
+            intensities[step.tool_id],
+            arguments[step.tool_id],
+            inputs[step.tool_id],
+            list(outputs[step.configuration_id].values())
+        )
+        step_plan.add_dependencies(plan)                                        # Dependencies with previous steps
+        plan.append(step_plan)
+    return plan
+
+
+# Compiled plan by process and intensity, with the steps stamp and the tools data version used to compile it. Only
+# the plan for the latest steps of each process is kept, and all of them are cleared when tools data change
+plans: Dict[Tuple[int, int], Tuple[Tuple[Any, ...], Optional[int], List[StepPlan]]] = {}
+
+
+def get_process_plan(process: Process, intensity: int) -> List[StepPlan]:
+    '''Get the cached plan for a process and intensity, or compile it if it doesn't exist or it's outdated. Process
+    steps are always queried to detect step changes, that produce a different stamp.
+
+    Args:
+        process (Process): Process
+        intensity (int): Task intensity
+
+    Returns:
+        List[StepPlan]: Steps that should be executed, with their dependencies
+    '''
+    steps = get_steps(process)
+    stamp = tuple(
+        (s.id, s.tool_id, s.configuration_id, s.priority, s.max_input, s.max_output) for s in steps     # type: ignore
+    )
+    version = get_tools_version()                                               # Tools data changes in any process
+    key = (process.id, intensity)
+    cached = plans.get(key)
+    if cached is not None and version is not None and cached[:2] == (stamp, version):
+        return cached[2]
+    plan = compile_process_plan(steps, intensity)
+    plans[key] = (stamp, version, plan)                                         # Replace plan for previous steps
+    return plan
+
+
+def clear_process_plans(**kwargs: Any) -> None:
+    '''Remove all the compiled process plans. It's executed when tools data change.'''
+    if plans:
+        logger.info('[Process] Process plans have been removed due to changes in tools data')
+        plans.clear()
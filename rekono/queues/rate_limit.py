@@ -0,0 +1,49 @@
+import logging
+import time
+
+import django_rq
+from redis.exceptions import RedisError
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+# Token bucket implemented in Redis, so the rate limit is shared by all the workers. Tokens are reserved even if the
+# bucket is empty, and the seconds to wait until the reserved token is available are returned. Redis clock is used to
+# don't depend on the workers clocks
+TOKEN_BUCKET_SCRIPT = '''
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local capacity = tonumber(ARGV[1])
+local rate = capacity / tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'timestamp')
+local tokens = tonumber(bucket[1]) or capacity
+local timestamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - timestamp) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'timestamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+'''
+
+
+def acquire(key: str, requests: int, period: int) -> float:
+    '''Reserve a token from a rate limit shared by all the workers, and wait until it's available.
+
+    Args:
+        key (str): Redis key of the token bucket
+        requests (int): Max requests by period
+        period (int): Period in seconds
+
+    Returns:
+        float: Waited seconds
+    '''
+    try:
+        connection = django_rq.get_connection('tasks-queue')                    # Same Redis than all the queues
+        wait = float(connection.register_script(TOKEN_BUCKET_SCRIPT)(keys=[key], args=[requests, period]))
+    except RedisError:                                                          # Rate limit not available
+        logger.warning(f'[Queues] Rate limit {key} can\'t be applied')
+        return 0
+    if wait > 0:
+        time.sleep(wait)                                                        # Wait until token is available
+    return wait
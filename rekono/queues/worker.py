@@ -0,0 +1,69 @@
+import logging
+from typing import Any
+
+from defectdojo.queue import drain_producer
+from email_notifications.sender import load_templates
+from rq import Worker
+from rq.job import Job
+from rq.queue import Queue
+from rq.utils import utcnow
+from rq.worker import WorkerStatus
+from tasks.queue import reconciliation_producer
+from telegram_bot import sender
+from tools.utils import load_tools
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+
+class RekonoWorker(Worker):
+    '''RQ worker that prepares the tools before consuming the executions queue, schedules the reconciliation of
+    the task execution counters before consuming the tasks queue, compiles the email templates before consuming the
+    emails queue, resumes the pending Defect-Dojo synchronizations before consuming the Defect-Dojo queue, and sends
+    Telegram messages in its own process.'''
+
+    def bootstrap(self, *args: Any, **kwargs: Any) -> None:
+        '''Run code when the worker starts, before consuming jobs.
+
+        Tools are loaded in the worker process, so they are available in the work horses created for each job.
+        '''
+        super().bootstrap(*args, **kwargs)
+        if 'executions-queue' in self.queue_names():                            # Worker for tool executions
+            load_tools()
+        if 'tasks-queue' in self.queue_names():                                 # Worker for tasks
+            reconciliation_producer()
+        if 'emails-queue' in self.queue_names():                                # Worker for emails
+            load_templates()
+        if 'defectdojo-queue' in self.queue_names():                            # Worker for Defect-Dojo
+            drain_producer()                                                    # Synchronizations pending after restart
+
+    def execute_job(self, job: Job, queue: Queue) -> None:
+        '''Execute job. Telegram jobs are executed in the worker process instead of a work horse, so the Telegram
+        client and its HTTP connections are reused between jobs.
+
+        Args:
+            job (Job): Job to execute
+            queue (Queue): Queue of the job
+        '''
+        if queue.name != 'telegram-queue':
+            super().execute_job(job, queue)
+            return
+        self.set_state(WorkerStatus.BUSY)
+        sender.heartbeat = lambda: self.heartbeat_job(job)                      # Heartbeats while messages are sent
+        try:
+            self.perform_job(job, queue)
+        finally:
+            sender.heartbeat = None
+        self.set_state(WorkerStatus.IDLE)
+
+    def heartbeat_job(self, job: Job) -> None:
+        '''Extend the expiration of the worker and the job executed in the worker process, because there isn't a work
+        horse monitor that does it.
+
+        Args:
+            job (Job): Job in execution
+        '''
+        ttl = self.get_heartbeat_ttl(job)
+        with self.connection.pipeline() as pipeline:
+            self.heartbeat(ttl, pipeline=pipeline)
+            job.heartbeat(utcnow(), ttl, pipeline=pipeline, xx=True)
+            pipeline.execute()
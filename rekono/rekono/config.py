@@ -43,6 +43,13 @@ class RekonoConfigLoader:
         self.EMAIL_USER = self.get_config_key(config, ['email', 'user'])
         self.EMAIL_PASSWORD = self.get_config_key(config, ['email', 'password'])
         self.EMAIL_TLS = self.get_config_key(config, ['email', 'tls'], True)
+        # Notifications: seconds to coalesce the notifications of each task. Zero to notify each execution
+        self.NOTIFICATIONS_DIGEST_WINDOW = self.get_config_key(config, ['notifications', 'digest', 'window'], 0)
+        # NVD NIST: rate limit of the public API without API key
+        self.NVD_NIST_RATE_LIMIT = self.get_config_key(config, ['nvd-nist', 'rate-limit', 'requests'], 5)
+        self.NVD_NIST_RATE_PERIOD = self.get_config_key(config, ['nvd-nist', 'rate-limit', 'period'], 30)
+        # Defect-Dojo: seconds to keep the product, engagement, test type and test lookups in cache
+        self.DD_CACHE_TTL = self.get_config_key(config, ['defect-dojo', 'cache', 'ttl'], 3600)
         # Tools
         self.TOOLS_CMSEEK_DIR = self.get_config_key(config, ['tools', 'cmseek', 'directory'], '/usr/share/cmseek')
         self.TOOLS_LOG4J_SCAN_DIR = self.get_config_key(
@@ -56,6 +63,16 @@ class RekonoConfigLoader:
             '/opt/spring4shell-scan'
         )
         self.TOOLS_GITTOOLS_DIR = self.get_config_key(config, ['tools', 'gittools', 'directory'], '/opt/GitTools')
+        # Max bytes of the tools output to save in database
+        self.TOOLS_OUTPUT_TAIL_SIZE = self.get_config_key(config, ['tools', 'output', 'tail-size'], 1048576)
+        # Max bytes of the tools plain output to load in memory to be parsed
+        self.TOOLS_OUTPUT_PARSE_SIZE = self.get_config_key(config, ['tools', 'output', 'parse-size'], 16777216)
+        # Seconds to keep the URL liveness checks in cache
+        self.TOOLS_URL_PROBE_TTL = self.get_config_key(config, ['tools', 'url-probe', 'ttl'], 3600)
+        # Hand off findings to dependent executions as soon as they are persisted
+        self.TOOLS_STREAMING_HANDOFF = self.get_config_key(config, ['tools', 'streaming', 'handoff'], False)
+        # Seconds to reuse the results of identical executions, by tool name. Zero to always run the tools
+        self.TOOLS_RESULTS_CACHE_TTL = self.get_config_key(config, ['tools', 'results-cache', 'ttl'], {'default': 0})
 
         # --------------------------------------------------------------------------------------------------------------
         # DEPRECATED
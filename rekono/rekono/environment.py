@@ -31,11 +31,25 @@ RKN_EMAIL_PORT = 'RKN_EMAIL_PORT'
 RKN_EMAIL_USER = 'RKN_EMAIL_USER'
 RKN_EMAIL_PASSWORD = 'RKN_EMAIL_PASSWORD'
 
+# Notifications configuration
+RKN_NOTIFICATIONS_DIGEST_WINDOW = 'RKN_NOTIFICATIONS_DIGEST_WINDOW'
+
+# NVD NIST configuration
+RKN_NVD_NIST_RATE_LIMIT = 'RKN_NVD_NIST_RATE_LIMIT'
+
+# Defect-Dojo configuration
+RKN_DD_CACHE_TTL = 'RKN_DD_CACHE_TTL'
+
 # Tools configuration
 RKN_CMSEEK_RESULTS = 'RKN_CMSEEK_RESULTS'
 RKN_LOG4J_SCAN_DIR = 'RKN_LOG4J_SCAN_DIR'
 RKN_GITTOOLS_DIR = 'RKN_GITTOOLS_DIR'
 RKN_SPRING4SHELL_SCAN_DIR = 'RKN_SPRING4SHELL_SCAN_DIR'
+RKN_TOOLS_OUTPUT_TAIL_SIZE = 'RKN_TOOLS_OUTPUT_TAIL_SIZE'
+RKN_TOOLS_OUTPUT_PARSE_SIZE = 'RKN_TOOLS_OUTPUT_PARSE_SIZE'
+RKN_TOOLS_URL_PROBE_TTL = 'RKN_TOOLS_URL_PROBE_TTL'
+RKN_TOOLS_STREAMING_HANDOFF = 'RKN_TOOLS_STREAMING_HANDOFF'
+RKN_TOOLS_RESULTS_CACHE_TTL = 'RKN_TOOLS_RESULTS_CACHE_TTL'
 
 
 # --------------------------------------------------------------------------------------------------------------
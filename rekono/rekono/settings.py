@@ -33,6 +33,7 @@ from rekono.environment import (
     RKN_DB_PASSWORD,
     RKN_DB_PORT,
     RKN_DB_USER,
+    RKN_DD_CACHE_TTL,
     RKN_EMAIL_HOST,
     RKN_EMAIL_PASSWORD,
     RKN_EMAIL_PORT,
@@ -40,11 +41,18 @@ from rekono.environment import (
     RKN_FRONTEND_URL,
     RKN_GITTOOLS_DIR,
     RKN_LOG4J_SCAN_DIR,
+    RKN_NOTIFICATIONS_DIGEST_WINDOW,
+    RKN_NVD_NIST_RATE_LIMIT,
     RKN_ROOT_PATH,
     RKN_RQ_HOST,
     RKN_RQ_PORT,
     RKN_SECRET_KEY,
     RKN_SPRING4SHELL_SCAN_DIR,
+    RKN_TOOLS_OUTPUT_PARSE_SIZE,
+    RKN_TOOLS_OUTPUT_TAIL_SIZE,
+    RKN_TOOLS_RESULTS_CACHE_TTL,
+    RKN_TOOLS_STREAMING_HANDOFF,
+    RKN_TOOLS_URL_PROBE_TTL,
     RKN_TRUSTED_PROXY,
 )
 
@@ -380,14 +388,36 @@ RQ_QUEUES = {
         'DB': 0,
         'DEFAULT_TIMEOUT': 10800                                                # 3 hours
     },
+    'enrichment-queue': {
+        'HOST': os.getenv(RKN_RQ_HOST, CONFIG.RQ_HOST),
+        'PORT': os.getenv(RKN_RQ_PORT, CONFIG.RQ_PORT),
+        'DB': 0,
+        'DEFAULT_TIMEOUT': 10800                                                # 3 hours
+    },
     'emails-queue': {
         'HOST': os.getenv(RKN_RQ_HOST, CONFIG.RQ_HOST),
         'PORT': os.getenv(RKN_RQ_PORT, CONFIG.RQ_PORT),
         'DB': 0,
         'DEFAULT_TIMEOUT': 3600                                                 # 1 hour
+    },
+    'telegram-queue': {
+        'HOST': os.getenv(RKN_RQ_HOST, CONFIG.RQ_HOST),
+        'PORT': os.getenv(RKN_RQ_PORT, CONFIG.RQ_PORT),
+        'DB': 0,
+        'DEFAULT_TIMEOUT': 3600                                                 # 1 hour
+    },
+    'defectdojo-queue': {
+        'HOST': os.getenv(RKN_RQ_HOST, CONFIG.RQ_HOST),
+        'PORT': os.getenv(RKN_RQ_PORT, CONFIG.RQ_PORT),
+        'DB': 0,
+        'DEFAULT_TIMEOUT': 10800                                                # 3 hours
     }
 }
 
+RQ = {
+    'WORKER_CLASS': 'queues.worker.RekonoWorker'                                # Load tools on worker start
+}
+
 
 ################################################################################
 # Email                                                                        #
@@ -401,6 +431,31 @@ EMAIL_HOST_PASSWORD = os.getenv(RKN_EMAIL_PASSWORD, CONFIG.EMAIL_PASSWORD)
 EMAIL_USE_TLS = CONFIG.EMAIL_TLS
 
 
+################################################################################
+# Notifications                                                                #
+################################################################################
+
+# Seconds to coalesce the notifications of each task in one digest. Zero to notify each execution
+NOTIFICATIONS_DIGEST_WINDOW = int(os.getenv(RKN_NOTIFICATIONS_DIGEST_WINDOW, CONFIG.NOTIFICATIONS_DIGEST_WINDOW))
+
+
+################################################################################
+# NVD NIST                                                                     #
+################################################################################
+
+# Max requests to NVD NIST API by period, shared by all the workers
+NVD_NIST_RATE_LIMIT = int(os.getenv(RKN_NVD_NIST_RATE_LIMIT, CONFIG.NVD_NIST_RATE_LIMIT))
+NVD_NIST_RATE_PERIOD = int(CONFIG.NVD_NIST_RATE_PERIOD)                         # Rate limit period in seconds
+
+
+################################################################################
+# Defect-Dojo                                                                  #
+################################################################################
+
+# Seconds to reuse the Defect-Dojo entities found or created by previous imports. Zero to always check them
+DD_CACHE_TTL = int(os.getenv(RKN_DD_CACHE_TTL, CONFIG.DD_CACHE_TTL))
+
+
 ################################################################################
 # Tools                                                                        #
 ################################################################################
@@ -419,6 +474,23 @@ TOOLS = {
         'directory': os.getenv(RKN_GITTOOLS_DIR, CONFIG.TOOLS_GITTOOLS_DIR)
     }
 }
+# Tools output is written to files during the execution. Only the last bytes are loaded and saved in database
+TOOLS_OUTPUT_TAIL_SIZE = int(os.getenv(RKN_TOOLS_OUTPUT_TAIL_SIZE, CONFIG.TOOLS_OUTPUT_TAIL_SIZE))
+# Plain outputs longer than the tail are read from file to be parsed, loading only their first bytes in memory
+TOOLS_OUTPUT_PARSE_SIZE = int(os.getenv(RKN_TOOLS_OUTPUT_PARSE_SIZE, CONFIG.TOOLS_OUTPUT_PARSE_SIZE))
+# HTTP and HTTPS liveness checks are cached to avoid repeating them for each argument formatting
+TOOLS_URL_PROBE_TTL = int(os.getenv(RKN_TOOLS_URL_PROBE_TTL, CONFIG.TOOLS_URL_PROBE_TTL))
+# Findings persisted by an execution are handed off to the dependent executions without waiting for the rest of them
+TOOLS_STREAMING_HANDOFF = str(
+    os.getenv(RKN_TOOLS_STREAMING_HANDOFF, CONFIG.TOOLS_STREAMING_HANDOFF)
+).lower() in ['true', '1']
+# Results of identical executions are reused while they are fresh. Environment variable sets the default TTL
+TOOLS_RESULTS_CACHE_TTL = {
+    str(k).lower(): int(v) for k, v in {'default': 0, **CONFIG.TOOLS_RESULTS_CACHE_TTL}.items()
+}
+TOOLS_RESULTS_CACHE_TTL['default'] = int(
+    os.getenv(RKN_TOOLS_RESULTS_CACHE_TTL, TOOLS_RESULTS_CACHE_TTL['default'])
+)
 
 
 ################################################################################
@@ -1,6 +1,7 @@
 from typing import Any, Dict, Optional
 
 from api.fields import ProtectedStringValueField
+from defectdojo import cache
 from defectdojo.api import DefectDojo
 from rest_framework import serializers
 from security.input_validation import (validate_defect_dojo_api_key,
@@ -74,3 +75,19 @@ class SystemSerializer(serializers.ModelSerializer):
         if 'defect_dojo_api_key' in attrs:
             validate_defect_dojo_api_key(attrs.get('defect_dojo_api_key', ''))
         return attrs
+
+    def update(self, instance: System, validated_data: Dict[str, Any]) -> System:
+        '''Update instance from validated data.
+
+        Args:
+            instance (System): Instance to update
+            validated_data (Dict[str, Any]): Validated data
+
+        Returns:
+            System: Updated instance
+        '''
+        defect_dojo_url = instance.defect_dojo_url
+        instance = super().update(instance, validated_data)
+        if instance.defect_dojo_url != defect_dojo_url:                         # Other Defect-Dojo instance
+            cache.clear()                                                       # Remove lookups of the previous one
+        return instance
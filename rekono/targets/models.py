@@ -1,6 +1,7 @@
 import logging
 from typing import Any, Dict, cast
 
+from defectdojo import cache
 from defectdojo.api import DefectDojo
 from defectdojo.exceptions import DefectDojoException
 from django.db import models
@@ -96,8 +97,8 @@ class Target(models.Model, BaseInput):
             int: Engagement Id in Defect-Dojo
         '''
         exists = False
-        if self.defectdojo_engagement_id is not None:
-            exists, _ = dd_client.get_engagement(self.defectdojo_engagement_id)     # Check existing engagement Id
+        if self.defectdojo_engagement_id is not None:                           # Check existing engagement Id
+            exists = cache.exists(cache.ENGAGEMENT, self.defectdojo_engagement_id, dd_client.get_engagement)
         if not exists:                                                          # Engagement not found
             self.create_defectdojo_engagement(dd_client)                        # Create a new engagement
         return self.defectdojo_engagement_id
@@ -118,6 +119,7 @@ class Target(models.Model, BaseInput):
             logger.info(f'[Defect-Dojo] New engagement {body["id"]} related to target {self.id} has been created')
             self.defectdojo_engagement_id = body['id']                          # Save Defect-Dojo engagement Id
             self.save(update_fields=['defectdojo_engagement_id'])
+            cache.save(cache.ENGAGEMENT, body['id'], body['id'])
         else:
             logger.warning(f"[Defect-Dojo] Engagement for the target {self.id} can't be created")
             raise DefectDojoException(
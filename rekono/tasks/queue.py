@@ -3,15 +3,21 @@ from datetime import timedelta
 from typing import Any
 
 import django_rq
+from django.db.models import Count, Q
 from django.utils import timezone
 from django_rq import job
+from executions.queue import counters
 from processes.executor import executor as processes
+from processes.executor.callback import complete_task
 from tasks.enums import Status
 from tasks.models import Task
 from tools.executor import executor as tools
 
 logger = logging.getLogger()                                                    # Rekono logger
 
+RECONCILIATION_INTERVAL = timedelta(minutes=10)                                 # Time between reconciliations
+RECONCILIATION_KEY = 'rekono:tasks:reconciliation'                              # Lock to schedule only one of them
+
 
 def producer(task: Task) -> None:
     '''Enqueue a new task in the tasks queue.
@@ -76,3 +82,38 @@ def scheduled_callback(job: Any, connection: Any, result: Task, *args: Any, **kw
         result.rq_job_id = task_job.id                                          # Update Job Id in task model
         result.status = Status.REQUESTED                                        # Update task status
         result.save(update_fields=['enqueued_at', 'rq_job_id', 'status'])
+
+
+def reconciliation_producer() -> None:
+    '''Schedule the reconciliation of the task execution counters, if it isn't scheduled yet.'''
+    connection = django_rq.get_connection('tasks-queue')
+    # Only one reconciliation is scheduled at the same time, although there are multiple workers
+    if connection.set(RECONCILIATION_KEY, '1', nx=True, ex=int(RECONCILIATION_INTERVAL.total_seconds()) * 2):
+        django_rq.get_queue('tasks-queue').enqueue_in(RECONCILIATION_INTERVAL, reconciliation_consumer)
+        logger.info('[Task] Reconciliation of task execution counters has been scheduled')
+
+
+@job('tasks-queue')
+def reconciliation_consumer() -> None:
+    '''Repair the execution counters of the process tasks in progress, and complete the tasks without pending
+    executions whose last callbacks have been lost.'''
+    tasks = Task.objects.filter(
+        process__isnull=False,
+        status__in=[Status.REQUESTED, Status.RUNNING]
+    ).annotate(
+        total=Count('executions'),
+        **{
+            counters.PENDING: Count('executions', filter=Q(executions__status__in=[Status.REQUESTED, Status.RUNNING])),
+            counters.ERROR: Count('executions', filter=Q(executions__status=Status.ERROR)),
+            counters.CANCELLED: Count('executions', filter=Q(executions__status=Status.CANCELLED))
+        }
+    ).filter(total__gt=0)
+    connection = django_rq.get_connection('executions-queue')
+    for task in tasks:
+        task_counters = {k: getattr(task, k) for k in [counters.PENDING, counters.ERROR, counters.CANCELLED]}
+        if task_counters[counters.PENDING] == 0:                                # All executions have finished
+            complete_task(task, task_counters)
+        elif not connection.exists(counters.get_counters_key(task.id)):         # Counters have been lost
+            counters.reconcile(task.id)
+    django_rq.get_connection('tasks-queue').delete(RECONCILIATION_KEY)
+    reconciliation_producer()                                                   # Schedule the next reconciliation
@@ -4,6 +4,7 @@ import django_rq
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from executions.models import Execution
+from executions.queue import counters, graph, stream
 from queues.utils import cancel_and_delete_job, cancel_job
 from rq.command import send_stop_job_command
 
@@ -44,6 +45,9 @@ def cancel_task(task: Task) -> None:
             execution.status = Status.CANCELLED                                 # Set execution status to Cancelled
             execution.end = timezone.now()                                      # Update execution end date
             execution.save(update_fields=['status', 'end'])
+        graph.remove_graph(task.id)                                             # Remove task dependency graph
+        stream.remove_stream(task.id)                                           # Remove task findings stream
+        counters.remove_counters(task.id)                                       # Remove task execution counters
         task.status = Status.CANCELLED                                          # Set task status to Cancelled
         task.end = timezone.now()                                               # Update task end date
         task.save(update_fields=['status', 'end'])
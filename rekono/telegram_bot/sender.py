@@ -1,11 +1,43 @@
 import logging
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
 
+import django_rq
+from django_rq import job
+from queues import rate_limit
 from system.models import System
-from telegram import ParseMode
-from telegram.ext import Updater
+from telegram import Bot, ParseMode
+from telegram.error import BadRequest, NetworkError, RetryAfter
+from telegram.utils.request import Request
 
 logger = logging.getLogger()                                                    # Rekono logger
 
+RATE_LIMIT_KEY = 'rekono:telegram:rate-limit'                                   # Token buckets shared by all workers
+GLOBAL_RATE_LIMIT = (30, 1)                                                     # Max 30 messages by second
+CHAT_RATE_LIMIT = (1, 1)                                                        # Max 1 message by second to each chat
+MAX_ATTEMPTS = 5                                                                # Max attempts to send a message
+POOL_SIZE = 8                                                                   # HTTP connections to Telegram API
+
+# Telegram client shared by all the messages. It's created again only if the Telegram token changes
+client: Optional[Bot] = None
+# Heartbeat of the worker that sends the messages in its own process, so it isn't considered dead during long jobs
+heartbeat: Optional[Callable[[], None]] = None
+
+
+def get_client() -> Optional[Bot]:
+    '''Get the Telegram client, reusing its HTTP connections between messages.
+
+    Returns:
+        Optional[Bot]: Telegram client, or None if the Telegram token isn't configured
+    '''
+    global client
+    token = System.objects.first().telegram_bot_token
+    if not token:
+        return None
+    if client is None or client.token != token:
+        client = Bot(token=token, request=Request(con_pool_size=POOL_SIZE))
+    return client
+
 
 def send_message(chat_id: int, text: str) -> None:
     '''Send Telegram message.
@@ -14,8 +46,84 @@ def send_message(chat_id: int, text: str) -> None:
         chat_id (int): Destinatary Telegram chat Id
         text (str): Text message with markdown style
     '''
+    send_messages([(chat_id, text)])
+
+
+def send_messages(messages: List[Tuple[int, str]]) -> None:
+    '''Enqueue Telegram messages in the Telegram queue, to be sent in only one job.
+
+    Args:
+        messages (List[Tuple[int, str]]): Destinatary Telegram chat Id and text message with markdown style
+    '''
+    if messages:
+        django_rq.get_queue('telegram-queue').enqueue(consumer, messages=messages)
+
+
+@job('telegram-queue')
+def consumer(messages: List[Tuple[int, str]] = [], attempt: int = 1) -> None:
+    '''Send Telegram messages, respecting the Telegram rate limits. Failed messages are retried together later.
+
+    If the Telegram rate limit is exceeded, the pending messages are sent again once the Telegram delay has passed.
+
+    Args:
+        messages (List[Tuple[int, str]], optional): Destinatary Telegram chat Id and text message. Defaults to [].
+        attempt (int, optional): Attempt number. Defaults to 1.
+    '''
+    telegram_client = get_client()
+    if not telegram_client:
+        logger.error('[Telegram] Telegram token is not configured')
+        return
+    failed = []
+    for index, (chat_id, text) in enumerate(messages):
+        if heartbeat:
+            heartbeat()                                                         # Worker is still alive
+        try:
+            if not deliver(telegram_client, chat_id, text):
+                failed.append((chat_id, text))
+        except RetryAfter as ex:                                                # Telegram rate limit exceeded
+            django_rq.get_queue('telegram-queue').enqueue_in(
+                timedelta(seconds=ex.retry_after), consumer, messages=messages[index:], attempt=attempt
+            )
+            logger.warning(f'[Telegram] {len(messages) - index} messages will be sent in {ex.retry_after} seconds')
+            break
+    if not failed:
+        return
+    if attempt < MAX_ATTEMPTS:
+        django_rq.get_queue('telegram-queue').enqueue_in(
+            timedelta(seconds=2 ** attempt), consumer, messages=failed, attempt=attempt + 1
+        )
+        logger.warning(f'[Telegram] {len(failed)} messages will be sent again')
+    else:
+        logger.error(f'[Telegram] {len(failed)} messages can\'t be sent after {MAX_ATTEMPTS} attempts')
+
+
+def deliver(telegram_client: Bot, chat_id: int, text: str) -> bool:
+    '''Send Telegram message using the Telegram client.
+
+    Args:
+        telegram_client (Bot): Telegram client
+        chat_id (int): Destinatary Telegram chat Id
+        text (str): Text message with markdown style
+
+    Raises:
+        RetryAfter: Raised if the Telegram rate limit is exceeded
+
+    Returns:
+        bool: Indicate if the message has been processed. False if it should be sent again
+    '''
+    rate_limit.acquire(f'{RATE_LIMIT_KEY}:{chat_id}', *CHAT_RATE_LIMIT)
+    rate_limit.acquire(RATE_LIMIT_KEY, *GLOBAL_RATE_LIMIT)
     try:
-        updater = Updater(token=System.objects.first().telegram_bot_token)                           # Telegram client
-        updater.bot.send_message(chat_id, text=text, parse_mode=ParseMode.MARKDOWN_V2)      # Send Telegram text message
-    except Exception as ex:
+        telegram_client.send_message(chat_id, text=text, parse_mode=ParseMode.MARKDOWN_V2)  # Send Telegram message
+        return True
+    except RetryAfter:                                                          # Telegram rate limit exceeded
+        raise
+    except BadRequest as ex:                                                    # Invalid message or chat
+        logger.error(f'[Telegram] Error during Telegram message sending: {str(ex)}')
+        return True
+    except NetworkError as ex:                                                  # Temporary errors
+        logger.warning(f'[Telegram] Error during Telegram message sending: {str(ex)}')
+    except Exception as ex:                                                     # Message can't be sent
         logger.error(f'[Telegram] Error during Telegram message sending: {str(ex)}')
+        return True
+    return False
@@ -112,7 +112,7 @@ class RekonoApiTestCase(RekonoTestCase):
 
     def get_rq_queues(self) -> List[Any]:
         '''Get Redis Queues for testing.'''
-        return [django_rq.get_queue(q) for q in RQ_QUEUES.keys() if q != 'emails-queue']
+        return [django_rq.get_queue(q) for q in RQ_QUEUES.keys() if q not in ['emails-queue', 'telegram-queue']]
 
     def launch_rq_worker(self) -> None:
         '''Launch Redis Queue worker for testing under demand.'''
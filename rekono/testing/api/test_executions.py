@@ -1,8 +1,12 @@
+import os
+
 from django.utils import timezone
 from executions.models import Execution
 from tasks.enums import Status
 from testing.api.base import RekonoApiTestCase
 
+from rekono.settings import REPORTS_DIR
+
 
 class ExecutionsTest(RekonoApiTestCase):
     '''Test cases for Executions module.'''
@@ -45,3 +49,18 @@ class ExecutionsTest(RekonoApiTestCase):
     def test_unauthorized_get_all(self) -> None:
         '''Test get all feature with an unauthorized user.'''
         self.api_test(self.other_client.get, self.endpoint, expected={'count': 0})      # Get all executions
+
+    def test_download_plain_output(self) -> None:
+        '''Test download of the full plain output when the plain output saved in database is truncated.'''
+        endpoint = f'{self.endpoint}{self.execution.id}/output/'
+        self.api_test(self.client.get, endpoint, 404)                          # Plain output not truncated
+        self.execution.output_plain_file = os.path.join(REPORTS_DIR, 'test-download.stdout')
+        self.execution.save(update_fields=['output_plain_file'])
+        with open(self.execution.output_plain_file, 'w') as plain_output:
+            plain_output.write('Full plain output')
+        response = self.client.get(endpoint)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(b'Full plain output', b''.join(response.streaming_content))
+        self.assertEqual(404, self.other_client.get(endpoint).status_code)     # Unauthorized user
+        self.execution.delete()                                                 # File is removed with the execution
+        self.assertFalse(os.path.isfile(os.path.join(REPORTS_DIR, 'test-download.stdout')))
@@ -1,11 +1,21 @@
 from datetime import datetime, timedelta
+from unittest import mock
 
+import django_rq
 from executions.models import Execution
+from executions.queue import counters
+from executions.queue.consumer import failure_callback
+from processes.executor.callback import process_callback
+from processes import plans
+from processes.executor.executor import create_plan
 from processes.models import Step
 from tasks.enums import Status, TimeUnit
 from tasks.models import Task
+from tasks.queue import RECONCILIATION_KEY, reconciliation_consumer
 from testing.api.base import RekonoApiTestCase
+from tools.enums import IntensityRank
 from tools.models import Configuration, Tool
+from tools.plans import VERSION_KEY
 
 
 class TasksTest(RekonoApiTestCase):
@@ -70,6 +80,62 @@ class TasksTest(RekonoApiTestCase):
         self.check_fields(['id', 'name'], content['process'], self.process)
         self.run_task_and_check_status(content['id'])
 
+    def test_process_plan(self) -> None:
+        '''Test that process plans are compiled once and reused while process steps don't change.'''
+        task = Task.objects.create(target=self.target, process=self.process, intensity=IntensityRank.NORMAL)
+        plan = create_plan(task)
+        self.assertEqual([self.harvester, self.nmap, self.dirsearch], [j.step.tool for j in plan])
+        self.assertIn(plan[1], plan[2].dependencies)                         # Dirsearch depends on Nmap
+        with self.assertNumQueries(1):                                          # Only process steps are queried
+            cached_plan = create_plan(task)
+        self.assertEqual([j.step for j in plan], [j.step for j in cached_plan])
+        self.step_1.delete()                                                    # Process steps change
+        self.assertEqual([self.harvester, self.nmap], [j.step.tool for j in create_plan(task)])
+        self.assertEqual(1, len([k for k in plans.plans if k[0] == self.process.id]))   # Only for the latest steps
+        django_rq.get_connection('executions-queue').incr(VERSION_KEY)         # Tools data changed by other process
+        with mock.patch('processes.plans.compile_process_plan', wraps=plans.compile_process_plan) as compile_plan:
+            create_plan(task)
+            compile_plan.assert_called_once()                                   # Plan is compiled again
+
+    def test_task_counters(self) -> None:
+        '''Test task completion based on the task execution counters.'''
+        executions = list(Execution.objects.filter(task=self.running_task).order_by('id'))
+        counters.add_pending(self.running_task.id, [e.id for e in executions])
+        executions[0].status = Status.COMPLETED
+        executions[0].save(update_fields=['status'])
+        with self.assertNumQueries(1):                                          # Executions aren't queried
+            process_callback(mock.Mock(kwargs={'execution_id': executions[0].id}), None, [])
+        process_callback(mock.Mock(kwargs={'execution_id': executions[0].id}), None, [])    # Callback called again
+        self.assertEqual(Status.RUNNING, Task.objects.get(pk=self.running_task.id).status)
+        # Last execution job fails. Task is only updated after the last execution
+        job = mock.Mock(kwargs={'execution_id': executions[1].id}, meta={'callback': process_callback})
+        failure_callback(job, None, Exception, Exception('Job failed'), None)
+        self.assertEqual(Status.ERROR, Execution.objects.get(pk=executions[1].id).status)
+        self.assertEqual(Status.ERROR, Task.objects.get(pk=self.running_task.id).status)
+        connection = django_rq.get_connection('executions-queue')
+        self.assertFalse(connection.exists(counters.get_counters_key(self.running_task.id)))
+
+    def test_task_counters_reconciliation(self) -> None:
+        '''Test repair of lost task execution counters.'''
+        execution = Execution.objects.filter(task=self.running_task, status=Status.RUNNING).first()
+        execution.status = Status.COMPLETED
+        execution.save(update_fields=['status'])
+        process_callback(mock.Mock(kwargs={'execution_id': execution.id}), None, [])    # Counters don't exist
+        self.assertEqual(
+            {counters.PENDING: 1, counters.ERROR: 0, counters.CANCELLED: 0},
+            counters.count_executions(self.running_task.id)
+        )
+        self.assertEqual(Status.RUNNING, Task.objects.get(pk=self.running_task.id).status)
+        # Execution counted by the reconciliation isn't counted again
+        process_callback(mock.Mock(kwargs={'execution_id': execution.id}), None, [])
+        self.assertEqual(Status.RUNNING, Task.objects.get(pk=self.running_task.id).status)
+        # Last execution finishes without callback
+        Execution.objects.filter(task=self.running_task).update(status=Status.COMPLETED)
+        reconciliation_consumer()
+        self.assertEqual(Status.COMPLETED, Task.objects.get(pk=self.running_task.id).status)
+        django_rq.get_connection('tasks-queue').delete(RECONCILIATION_KEY)
+        self.clear_rq_queues()
+
     def test_create_with_scheduled_at(self) -> None:
         '''Test creation feature with scheduled date.'''
         self.tool_data['scheduled_at'] = (datetime.now() + timedelta(minutes=1)).isoformat()
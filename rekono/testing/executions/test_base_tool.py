@@ -1,20 +1,29 @@
+import importlib
 import os
-from typing import List
+import signal
+import subprocess
+from typing import Any, List
 from unittest import mock
 
 import django_rq
 from authentications.enums import AuthenticationType
 from authentications.models import Authentication
+from defectdojo import queue as defectdojo
+from django.apps import apps
 from django.utils import timezone
-from findings.enums import DataType, Protocol, Severity
+from findings.enums import DataType, OSType, Protocol, Severity
 from findings.models import (OSINT, Credential, Exploit, Finding, Host, Path,
                              Port, Technology, Vulnerability)
+from findings.writer import FindingsWriter
 from input_types.base import BaseInput
 from input_types.models import InputType
+from input_types.utils import (get_inputs_from_references, get_probe_key,
+                               get_references, probe_urls)
 from parameters.models import InputTechnology, InputVulnerability
 from projects.models import Project
 from resources.enums import WordlistType
 from resources.models import Wordlist
+from redis import Redis
 from rq import SimpleWorker
 from targets.enums import TargetType
 from targets.models import Target, TargetPort
@@ -24,14 +33,18 @@ from testing.mocks.defectdojo import (defect_dojo_error, defect_dojo_success,
                                       defect_dojo_success_multiple)
 from testing.mocks.nvd_nist import nvd_nist_success_cvss_3
 from testing.test_case import RekonoTestCase
+from tools import plans
 from tools.enums import IntensityRank, Stage
 from tools.exceptions import ToolExecutionException
 from tools.models import Argument, Configuration, Input, Intensity, Tool
 from tools.tools.base_tool import BaseTool
-from tools.utils import get_tool_class_by_name
+from tools.utils import get_tool_class_by_name, load_tools
 from users.models import User
 
-from executions.models import Execution
+from executions.models import DefectDojoSync, Execution
+from executions.queue import graph, producer, stream
+from executions.queue.utils import (hand_off_findings, process_dependencies,
+                                    update_new_dependencies)
 
 
 class BaseToolTest(RekonoTestCase):
@@ -432,6 +445,22 @@ class BaseToolTest(RekonoTestCase):
         '''Test get tool class from invalid name.'''
         self.assertEqual(BaseTool, get_tool_class_by_name('NotFound'))
 
+    def test_load_tools(self) -> None:
+        '''Test tool classes registry and cached installation checks.'''
+        for tool in Tool.objects.all():                                         # All tools have a tool class
+            self.assertNotEqual(BaseTool, get_tool_class_by_name(tool.name))
+        BaseTool.installations.clear()
+        with mock.patch('shutil.which', return_value=None) as which:            # No tool is installed
+            load_tools()
+            calls = which.call_count
+            self.assertRaises(ToolExecutionException, self.tool_instance.check_installation)
+            self.assertEqual(calls + 1, which.call_count)                       # Missing tools are checked again
+        with mock.patch('shutil.which', return_value='/usr/bin/tool') as which:    # Tool has been installed
+            self.tool_instance.check_installation()
+            self.tool_instance.check_installation()
+            self.assertEqual(1, which.call_count)                               # Installation isn't checked again
+        BaseTool.installations.clear()
+
     def test_get_arguments_using_all_findings(self) -> None:
         '''Test get_arguments feature using all the available findings.'''
         arguments = self.tool_instance.get_arguments(self.targets, self.all_findings)
@@ -544,6 +573,22 @@ class BaseToolTest(RekonoTestCase):
         self.assertTrue(self.tool_instance.check_arguments(self.targets, self.findings_to_use_targets))
         self.assertFalse(self.tool_instance.check_arguments([], self.findings_to_use_targets))
 
+    def test_check_arguments_using_plan(self) -> None:
+        '''Test check_arguments feature using the compiled arguments plan.'''
+        self.assertTrue(self.tool_instance.check_arguments(self.targets, self.required_findings))
+        plan = self.tool_instance.arguments_plan
+        with self.assertNumQueries(0):                                          # Plan is reused without queries
+            for _ in range(10):
+                self.assertTrue(self.tool_instance.check_arguments(self.targets, self.required_findings))
+        self.assertEqual(plan, self.tool_instance.arguments_plan)
+        self.configuration.save()                                               # Tools data changes
+        self.tool_instance.check_arguments(self.targets, self.required_findings)
+        self.assertNotEqual(plan, self.tool_instance.arguments_plan)            # Plan is compiled again
+        plan = self.tool_instance.arguments_plan
+        django_rq.get_connection('executions-queue').incr(plans.VERSION_KEY)   # Tools data changed by other process
+        self.tool_instance.check_arguments(self.targets, self.required_findings)
+        self.assertNotEqual(plan, self.tool_instance.arguments_plan)            # Plan is compiled again
+
     def test_tool_execution(self) -> None:
         '''Test tool_execution feature using ls command.'''
         # Testing tool with ls command
@@ -564,6 +609,68 @@ class BaseToolTest(RekonoTestCase):
         self.tool_instance.tool_execution(['/'])                                # Valid ls execution
         self.assertEqual(1, errors_count)
 
+    @mock.patch('tools.tools.base_tool.TOOLS_OUTPUT_TAIL_SIZE', 10)            # Limit output loaded in memory
+    def test_tool_execution_with_long_output(self) -> None:
+        '''Test tool_execution feature when the output is longer than the maximum output size in memory.'''
+        tool = Tool.objects.create(name='Test', command='ls')
+        self.new_execution.tool = tool
+        self.new_execution.save(update_fields=['tool'])
+        self.tool_instance = get_tool_class_by_name(tool.name)(self.new_execution, self.intensity, self.arguments)
+        output = self.tool_instance.tool_execution(['-a', self.data_path])
+        self.assertEqual(10, len(output))
+        full_output = self.tool_instance.get_plain_output(output)
+        self.assertEqual({'.', '..', *os.listdir(self.data_path)}, set(full_output.split()))
+        self.assertTrue(full_output.endswith(output))
+        with mock.patch('tools.tools.base_tool.TOOLS_OUTPUT_PARSE_SIZE', 30):    # Limit output to parse in memory
+            parsed_output = self.tool_instance.get_plain_output(output)
+        self.assertTrue(len(parsed_output) <= 30 and parsed_output.endswith('\n'))   # Only complete lines
+        self.assertTrue(full_output.startswith(parsed_output))
+        self.tool_instance.on_completed(output)                                 # Full output linked to the execution
+        self.tool_instance.remove_plain_output()
+        self.assertEqual(self.tool_instance.path_plain_output, self.new_execution.output_plain_file)
+        self.assertTrue(os.path.isfile(self.tool_instance.path_plain_output))
+        self.new_execution.delete()                                             # Removed with the execution
+        self.assertFalse(os.path.isfile(self.tool_instance.path_plain_output))
+        self.new_execution.output_plain_file = None
+        with self.assertRaises(ToolExecutionException) as ex:                  # Errors are also limited
+            self.tool_instance.tool_execution(['/directory-not-found'])
+        self.assertEqual(10, len(str(ex.exception)))
+        self.tool_instance.remove_plain_output()
+        self.assertFalse(os.path.isfile(self.tool_instance.path_plain_output))
+
+    def test_tool_execution_with_streaming_error(self) -> None:
+        '''Test that tool process is stopped when its output can't be parsed while it's running.'''
+        tool = Tool.objects.create(name='Test', command='sleep')
+        self.new_execution.tool = tool
+        self.new_execution.save(update_fields=['tool'])
+        self.tool_instance = get_tool_class_by_name(tool.name)(self.new_execution, self.intensity, self.arguments)
+        self.tool_instance.streaming_output = True
+        processes = []
+        original_popen = subprocess.Popen
+
+        def popen(*args: Any, **kwargs: Any) -> subprocess.Popen:
+            processes.append(original_popen(*args, **kwargs))
+            return processes[-1]
+        with mock.patch('tools.tools.base_tool.subprocess.Popen', popen):
+            with mock.patch.object(self.tool_instance, 'stream_output', side_effect=ValueError('Invalid output')):
+                with self.assertRaises(ValueError):
+                    self.tool_instance.tool_execution(['300'])
+        self.assertEqual(-signal.SIGKILL, processes[0].returncode)               # Process has been killed
+        self.tool_instance.remove_plain_output()
+
+    def test_plain_output_not_truncated(self) -> None:
+        '''Test that plain output with multibyte characters is not read again from file if it isn't truncated.'''
+        output = 'Ñandú ' * 10
+        with open(self.tool_instance.path_plain_output, 'w', encoding='utf-8') as plain_output:
+            plain_output.write(output)
+        with mock.patch('builtins.open') as open_file:
+            self.assertEqual(output, self.tool_instance.get_plain_output(output))
+            open_file.assert_not_called()
+        self.tool_instance.on_completed(output)
+        self.assertIsNone(self.new_execution.output_plain_file)
+        self.tool_instance.remove_plain_output()
+        self.assertFalse(os.path.isfile(self.tool_instance.path_plain_output))
+
     def process_findings(self, imported_in_defectdojo: bool) -> None:
         '''Execute process_findings feature using nmap report.
 
@@ -572,15 +679,21 @@ class BaseToolTest(RekonoTestCase):
         '''
         queue = django_rq.get_queue('findings-queue')
         queue.empty()                                                           # Clear findings queue
+        defectdojo_queue = django_rq.get_queue('defectdojo-queue')
+        defectdojo_queue.empty()                                                # Clear Defect-Dojo queue
+        defectdojo_queue.connection.delete(defectdojo.SCHEDULED_KEY)            # Remove scheduled retry
         self.tool_instance.path_output = self.nmap_report                       # Set nmap report
         self.tool_instance.create_finding(Path, path='/test')                   # Save endpoint to improve coverage
         self.tool_instance.run(self.targets, self.all_findings)                 # Run tool
-        worker = SimpleWorker([queue], connection=queue.connection)             # Create RQ worker for findings queue
+        # Create RQ worker for findings and Defect-Dojo queues
+        worker = SimpleWorker([queue, defectdojo_queue], connection=queue.connection)
         worker.work(burst=True)                                                 # Launch RQ worker
         execution = Execution.objects.get(pk=self.new_execution.id)
         self.assertEqual(Status.COMPLETED, execution.status)
         self.assertEqual(self.nmap_report, execution.output_file)
         self.assertEqual(imported_in_defectdojo, execution.imported_in_defectdojo)
+        # Failed synchronizations are kept to be retried later
+        self.assertEqual(not imported_in_defectdojo, DefectDojoSync.objects.filter(execution=execution).exists())
 
     @mock.patch('defectdojo.api.DefectDojo.request', defect_dojo_success)       # Mocks Defect-Dojo response
     @mock.patch('findings.nvd_nist.NvdNist.request', nvd_nist_success_cvss_3)   # Mocks NVD NIST response
@@ -659,3 +772,239 @@ class BaseToolTest(RekonoTestCase):
         # No authentication found
         search = self.tool_instance.get_authentication([], [])
         self.assertEqual(None, search)
+
+    def test_create_findings_in_bulk(self) -> None:
+        '''Test create_finding feature using the findings writer.'''
+        existing = Host.objects.get(address='45.33.32.156')                     # Host without fingerprint
+        host = self.tool_instance.create_finding(Host, address='45.33.32.156', os='Linux')      # Existing host
+        new_host = self.tool_instance.create_finding(Host, address='10.10.10.10')               # New host
+        duplicated = self.tool_instance.create_finding(Host, address='10.10.10.10', os='Linux')  # Same new host
+        self.assertIsNone(host.id)                                              # Findings not saved until flush
+        new_host.os_type = OSType.LINUX
+        self.tool_instance.findings_writer.update(new_host, ['os_type'])       # Saved by the next flush
+        self.tool_instance.findings_writer.flush()
+        self.assertEqual(existing.id, host.id)
+        self.assertEqual(host.fingerprint, Host.objects.get(pk=existing.id).fingerprint)    # Fingerprint is saved
+        self.assertEqual(new_host.id, duplicated.id)
+        self.assertEqual(None, new_host.os)                                     # Values parsed at that moment
+        self.assertEqual('Linux', Host.objects.get(pk=new_host.id).os)
+        self.assertEqual(OSType.LINUX, Host.objects.get(pk=new_host.id).os_type)
+        self.assertEqual('Linux', Host.objects.get(pk=existing.id).os)
+        self.assertEqual(3, Host.objects.count())
+        self.assertEqual(2, Host.objects.filter(executions=self.new_execution).count())
+        self.assertEqual(
+            {self.first_execution.id, self.new_execution.id},
+            set(Host.objects.get(pk=existing.id).executions.values_list('id', flat=True))
+        )
+        # Same finding is saved again if it is found in other target
+        other_target = Target.objects.create(project=self.project, target='10.10.10.1', type=TargetType.PRIVATE_IP)
+        task = Task.objects.create(target=other_target, tool=self.nmap, configuration=self.configuration)
+        writer = FindingsWriter(Execution.objects.create(task=task, tool=self.nmap, configuration=self.configuration))
+        other_host = writer.add(Host, {'address': '45.33.32.156'})
+        writer.flush()
+        self.assertNotEqual(existing.id, other_host.id)
+        self.assertNotEqual(host.fingerprint, other_host.fingerprint)
+
+    def test_findings_identity(self) -> None:
+        '''Test identity of findings without fingerprint, using the key fields values and the target.'''
+        target_id = self.new_execution.task.target_id
+        existing = Host.objects.get(address='45.33.32.156')                     # Host without fingerprint
+        existing_port = Port.objects.get(port=80)
+        for finding in [existing, existing_port]:
+            finding.set_identity_target(target_id)                              # Target known by the caller
+        writer = FindingsWriter(self.new_execution)
+        parsed = writer.add(Host, {'address': '45.33.32.156'})                  # Unsaved, same target
+        with self.assertNumQueries(0):                                          # Database is never queried
+            self.assertEqual(existing, parsed)
+            self.assertEqual(hash(existing), hash(parsed))
+            self.assertEqual(parsed.fingerprint, existing.get_identity())       # Same identity than fingerprints
+        writer.flush()
+        parsed_port = writer.add(Port, {'host': parsed, 'port': 80, 'protocol': Protocol.TCP})
+        self.assertEqual(existing_port, parsed_port)
+        other_target = Target.objects.create(project=self.project, target='10.10.10.1', type=TargetType.PRIVATE_IP)
+        other = Host.objects.create(address='45.33.32.156')                     # Same host in other target
+        other.set_identity_target(other_target.id)
+        self.assertNotEqual(existing, other)
+        self.assertEqual(2, len({existing, other, parsed}))
+
+    def test_set_fingerprints_migration(self) -> None:
+        '''Test that the data migration calculates the fingerprints of existing findings as the findings writer.'''
+        migration = importlib.import_module('findings.migrations.0004_set_finding_fingerprint')
+        migration.set_fingerprints(apps, None)
+        writer = FindingsWriter(self.new_execution)                             # Same target than existing findings
+        host = writer.add(Host, {'address': '45.33.32.156'})
+        port = writer.add(Port, {'host': host, 'port': 443, 'protocol': Protocol.TCP})
+        self.assertEqual(Host.objects.get(address='45.33.32.156').fingerprint, host.fingerprint)
+        self.assertEqual(Port.objects.get(port=443).fingerprint, port.fingerprint)
+
+    @mock.patch('input_types.utils.probe_url', lambda url: url.startswith('https'))    # Only HTTPS is reachable
+    def test_probe_urls(self) -> None:
+        '''Test URL checks in batch and probe cache.'''
+        hosts = [Host.objects.create(address=f'probe-{timezone.now().timestamp()}-{i}.test') for i in range(5)]
+        connection = django_rq.get_connection('tasks-queue')
+        keys = [get_probe_key(p, h.address, None) for h in hosts for p in ['http', 'https']]
+        connection.delete(*keys)
+        probe_urls(hosts)                                                       # Check all URLs at the same time
+        self.assertEqual([b'0', b'1'] * 5, connection.mget(keys))
+        with mock.patch('input_types.utils.probe_url') as probe:                # URLs are taken from cache
+            self.assertEqual(f'https://{hosts[0].address}/', hosts[0].parse()['url'])
+            probe.assert_not_called()
+        connection.delete(*keys)
+
+    def test_execution_job_with_references(self) -> None:
+        '''Test execution jobs that only include Ids and references to database entities.'''
+        queue = django_rq.get_queue('executions-queue')
+        queue.empty()                                                           # Clear executions queue
+        job = producer.producer(
+            self.new_execution,
+            self.intensity,
+            self.arguments,
+            targets=self.targets,
+            previous_findings=self.all_findings
+        )
+        self.assertEqual(self.new_execution.id, job.kwargs['execution_id'])
+        self.assertEqual([a.id for a in self.arguments], job.kwargs['arguments_ids'])
+        self.assertEqual(self.targets, get_inputs_from_references(job.kwargs['targets']))
+        self.assertEqual(self.all_findings, get_inputs_from_references(job.kwargs['previous_findings']))
+        inputs = get_inputs_from_references(job.kwargs['targets'] + job.kwargs['previous_findings'])
+        with mock.patch('input_types.utils.probe_url', return_value=True), self.assertNumQueries(0):
+            for base_input in inputs:                                           # Relations are already loaded
+                base_input.parse()
+
+        def parse_output(tool: BaseTool, output: str) -> None:
+            tool.create_finding(Host, address='10.10.10.100')                   # Finding found by the execution
+
+        with mock.patch('tools.tools.nmap.Nmap.parse_output', parse_output):
+            worker = SimpleWorker([queue], connection=queue.connection)         # Create RQ worker for executions queue
+            worker.work(burst=True)                                             # Launch RQ worker
+        host = Host.objects.get(address='10.10.10.100')
+        self.assertEqual([('findings.host', host.id)], queue.fetch_job(job.id).result)
+        self.assertEqual(Status.COMPLETED, Execution.objects.get(pk=self.new_execution.id).status)
+        django_rq.get_queue('findings-queue').empty()                           # Clear findings queue
+
+    def test_update_new_dependencies(self) -> None:
+        '''Test new dependencies for on hold jobs using the task dependency graph.'''
+        queue = django_rq.get_queue('executions-queue')
+        queue.empty()                                                           # Clear executions queue
+        task_id = self.new_execution.task.id
+        parent = producer.producer(self.new_execution, self.intensity, self.arguments, targets=self.targets)
+        child = producer.producer(
+            self.new_execution, self.intensity, self.arguments, targets=self.targets, dependencies=[parent]
+        )
+        self.assertEqual([child.id], graph.get_dependents(task_id, parent.id))
+        new_job = producer.producer(self.new_execution, self.intensity, self.arguments, targets=self.targets)
+        update_new_dependencies(task_id, parent.id, [new_job.id])
+        child = queue.fetch_job(child.id)                                       # Same on hold job
+        self.assertTrue(child.is_deferred)
+        self.assertEqual([parent.id, new_job.id], graph.get_dependencies(child))
+        self.assertEqual([child.id], graph.get_dependents(task_id, new_job.id))
+        worker = SimpleWorker([queue], connection=queue.connection)             # Create RQ worker for executions queue
+        worker.work(burst=True)                                                 # Launch RQ worker
+        self.assertTrue(queue.fetch_job(child.id).is_finished)                  # Executed after all dependencies
+        graph.remove_graph(task_id)
+        self.assertEqual([], graph.get_dependents(task_id, parent.id))
+        django_rq.get_queue('findings-queue').empty()                           # Clear findings queue
+
+    def test_bulk_producer(self) -> None:
+        '''Test creation of executions and enqueue of their jobs at once.'''
+        queue = django_rq.get_queue('executions-queue')
+        queue.empty()                                                           # Clear executions queue
+        task = self.new_execution.task
+        parent = Execution(task=task, tool=self.nmap, configuration=self.new_execution.configuration)
+        parent.rq_job_id = 'parent-job'
+        child = Execution(task=task, tool=self.nmap, configuration=self.new_execution.configuration)
+        with self.assertNumQueries(2):                                          # Insert and Ids if not returned
+            jobs = producer.bulk_producer([
+                (parent, self.intensity, self.arguments, self.targets, [], []),
+                (child, self.intensity, self.arguments, self.targets, [], [parent.rq_job_id])
+            ])
+        self.assertEqual([parent.rq_job_id, child.rq_job_id], [j.id for j in jobs])
+        for execution, job in zip([parent, child], jobs):
+            self.assertEqual(execution.id, job.kwargs['execution_id'])
+            self.assertEqual(job.id, Execution.objects.get(pk=execution.id).rq_job_id)
+        self.assertEqual([parent.rq_job_id], queue.job_ids)                     # Only parent job is queued
+        self.assertTrue(queue.fetch_job(child.rq_job_id).is_deferred)
+        self.assertEqual([child.rq_job_id], graph.get_dependents(task.id, parent.rq_job_id))
+        worker = SimpleWorker([queue], connection=queue.connection)             # Create RQ worker for executions queue
+        worker.work(burst=True)                                                 # Launch RQ worker
+        self.assertTrue(queue.fetch_job(child.rq_job_id).is_finished)           # Executed after its dependency
+        graph.remove_graph(task.id)
+        django_rq.get_queue('findings-queue').empty()                           # Clear findings queue
+
+    def test_findings_handoff(self) -> None:
+        '''Test executions started from findings handed off by a dependency that hasn't finished yet.'''
+        queue = django_rq.get_queue('executions-queue')
+        queue.empty()                                                           # Clear executions queue
+        task = self.new_execution.task
+        configuration = Configuration.objects.create(
+            name='Single host', tool=self.nmap, arguments='{test_only_host}', stage=Stage.ENUMERATION
+        )
+        arguments = list(Argument.objects.filter(tool=self.nmap, name='test_only_host'))
+        child_execution = Execution.objects.create(task=task, tool=self.nmap, configuration=configuration)
+        parent = producer.producer(self.new_execution, self.intensity, self.arguments, targets=self.targets)
+        child = producer.producer(
+            child_execution, self.intensity, arguments, targets=self.targets, dependencies=[parent]
+        )
+        hosts = [f for f in self.all_findings if isinstance(f, Host)]
+        self.tool_instance.findings_handoff = mock.Mock()
+        self.tool_instance.process_streamed_findings()
+        self.tool_instance.findings_handoff.assert_called_once_with([])         # Hook called with persisted findings
+        self.tool_instance.process_findings()
+        # Findings not streamed are received by the dependent jobs when the execution finishes
+        self.tool_instance.findings_handoff.assert_called_once()
+        hand_off_findings(self.new_execution, parent.id, hosts)
+        new_jobs = [queue.fetch_job(j) for j in queue.job_ids if j != parent.id]
+        self.assertEqual(1, len(new_jobs))                                      # Only one host is valid for the tool
+        self.assertEqual([('findings.host', hosts[1].id)], new_jobs[0].kwargs['previous_findings'])
+        self.assertEqual(
+            configuration, Execution.objects.get(pk=new_jobs[0].kwargs['execution_id']).configuration
+        )
+        self.assertEqual({('findings.host', h.id) for h in hosts}, stream.get_published(task.id, [parent.id]))
+        stream.publish(task.id, child.id, [('findings.host', hosts[0].id)])
+        with mock.patch('redis.Redis.xread', autospec=True, side_effect=Redis.xread) as xread:
+            self.assertEqual({('findings.host', hosts[0].id)}, stream.get_published(task.id, [child.id]))
+        last_id = list(xread.call_args[0][1].values())[0]
+        self.assertNotEqual('0', last_id)                                       # Only new entries are read
+        self.assertEqual(1, len(Redis.xread(queue.connection, {stream.get_stream_key(task.id): last_id})[0][1]))
+        tool = self.tool_class(child_execution, self.intensity, arguments)
+        with mock.patch('executions.queue.utils.get_findings_from_dependencies', return_value=hosts):
+            with mock.patch('executions.queue.utils.TOOLS_STREAMING_HANDOFF', True):
+                # Findings handed off before aren't used again
+                self.assertEqual(
+                    [], process_dependencies(child_execution, self.intensity, arguments, self.targets, child, tool)
+                )
+            self.assertEqual(hosts[1:], process_dependencies(
+                child_execution, self.intensity, arguments, self.targets, child, tool
+            ))
+        stream.remove_stream(task.id)
+        self.assertEqual(set(), stream.get_published(task.id, [parent.id]))
+        graph.remove_graph(task.id)
+        queue.empty()                                                           # Clear executions queue
+        django_rq.get_queue('findings-queue').empty()                           # Clear findings queue
+
+    def test_reuse_results(self) -> None:
+        '''Test that fresh results of an identical execution are linked to the new execution instead of running it.'''
+        queue = django_rq.get_queue('findings-queue')
+        queue.empty()                                                           # Clear findings queue
+        with mock.patch.dict('tools.cache.TOOLS_RESULTS_CACHE_TTL', {'nmap': 60}):
+            self.tool_instance.path_output = self.nmap_report                   # Set nmap report
+            self.tool_instance.run(self.targets, self.all_findings)             # Run tool
+            self.assertTrue(len(self.tool_instance.findings) > 0)
+            new_execution = Execution.objects.create(
+                task=self.new_execution.task,
+                tool=self.nmap,
+                configuration=self.configuration,
+                status=Status.REQUESTED
+            )
+            tool = self.tool_class(new_execution, self.intensity, self.arguments)
+            with mock.patch('tools.tools.nmap.Nmap.parse_output') as parse_output:
+                tool.run(self.targets, self.all_findings)                       # Results are reused
+            parse_output.assert_not_called()
+        self.assertEqual(set(get_references(self.tool_instance.findings)), set(get_references(tool.findings)))
+        execution = Execution.objects.get(pk=new_execution.id)
+        self.assertEqual(Status.COMPLETED, execution.status)
+        self.assertEqual(self.nmap_report, execution.output_file)
+        for finding in tool.findings:                                           # Findings linked to the new execution
+            self.assertTrue(finding.executions.filter(pk=new_execution.id).exists())
+        django_rq.get_connection('executions-queue').delete(tool.get_results_cache_key())
+        queue.empty()                                                           # Clear findings queue
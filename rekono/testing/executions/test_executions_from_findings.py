@@ -1,11 +1,18 @@
-from typing import Any
+from typing import Any, List, cast
+from unittest import mock
 
+import django_rq
+from django.db import connection
 from django.db.models import Model
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from findings.models import Host, Path, Port
+from findings.models import (Credential, Finding, Host, Path, Port, Technology,
+                             Vulnerability)
+from findings.writer import FindingsWriter
 from input_types.base import BaseInput
 from input_types.models import InputType
+from input_types.utils import VERSION_KEY, get_relations_between_input_types
 from projects.models import Project
 from resources.enums import WordlistType
 from resources.models import Wordlist
@@ -13,6 +20,7 @@ from targets.enums import TargetType
 from targets.models import Target, TargetPort
 from tasks.enums import Status
 from tasks.models import Task
+from testing.executions import legacy_planner
 from tools.enums import IntensityRank, Stage
 from tools.models import Argument, Configuration, Input, Tool
 
@@ -163,6 +171,23 @@ class ExecutionsFromFindingsTest(TestCase):
         executions = get_executions_from_findings(findings, self.tool)
         self.assertEqual(expected, executions)
 
+    def test_relations_between_input_types(self) -> None:
+        '''Test cached relations between input types.'''
+        relations = get_relations_between_input_types()
+        host = InputType.objects.get(name='Host')
+        port = InputType.objects.get(name='Port')
+        self.assertEqual((host,), relations[port.id])                           # Port is related to Host
+        with self.assertNumQueries(0):                                          # Relations are taken from cache
+            self.assertIs(relations, get_relations_between_input_types())
+        with self.assertRaises(TypeError):                                      # Relations can't be modified
+            cast(Any, relations)[host.id] = ()
+        host.save()                                                             # Input types change
+        self.assertIsNot(relations, get_relations_between_input_types())
+        self.assertEqual(dict(relations), dict(get_relations_between_input_types()))
+        relations = get_relations_between_input_types()
+        django_rq.get_connection('tasks-queue').incr(VERSION_KEY)               # Input types changed by other process
+        self.assertIsNot(relations, get_relations_between_input_types())
+
     def test_with_only_one_finding_type(self) -> None:
         '''Test get_executions_from_findings feature with findings.'''
         host_1 = self.create_finding(Host, address='10.10.10.1')
@@ -200,3 +225,100 @@ class ExecutionsFromFindingsTest(TestCase):
         ]
         executions = get_executions_from_findings(targets, self.tool)
         self.assertEqual(expected, executions)
+
+    def create_findings_in_bulk(self, hosts: int, ports: int) -> List[BaseInput]:
+        '''Create hosts and ports using the findings writer, like the tools do.
+
+        Args:
+            hosts (int): Number of hosts
+            ports (int): Number of ports for each host
+
+        Returns:
+            List[BaseInput]: Created findings
+        '''
+        writer = FindingsWriter(self.execution)
+        host_list = [writer.add(Host, {'address': f'10.10.{i // 256}.{i % 256}'}) for i in range(hosts)]
+        writer.flush()
+        port_list = [writer.add(Port, {'host_id': h.id, 'port': p}) for h in host_list for p in range(1, ports + 1)]
+        writer.flush()
+        hosts_by_id = {h.id: h for h in host_list}
+        for port in port_list:
+            port.host = hosts_by_id[port.host_id]                               # Avoid queries to get related hosts
+        return host_list + port_list
+
+    def test_with_many_findings(self) -> None:
+        '''Test get_executions_from_findings feature with 5k findings, as a benchmark of the executions planning.'''
+        findings = self.create_findings_in_bulk(50, 99)
+        with self.assertNumQueries(0):                                          # Identity without database queries
+            self.assertEqual(5000, len(set(findings)))
+            self.assertEqual(findings[0], Host(address='10.10.0.0', fingerprint=findings[0].fingerprint))
+        with CaptureQueriesContext(connection) as queries:
+            executions = get_executions_from_findings(findings, self.tool)
+        self.assertEqual(50, len(executions))
+        for execution in executions:                                            # One execution for each host
+            self.assertEqual(100, len(execution))
+            self.assertTrue(all(f.host == execution[0] for f in execution[1:]))
+        self.assertLess(len(queries.captured_queries), 40)                      # Queries by input type, not by finding
+
+    def create_findings_in_memory(self, hosts: int, ports: int) -> List[BaseInput]:
+        '''Create hosts, ports and one technology for each port without saving them, like if they were loaded.
+
+        Args:
+            hosts (int): Number of hosts
+            ports (int): Number of ports for each host
+
+        Returns:
+            List[BaseInput]: Created findings
+        '''
+        host_list = [Host(id=i, address=f'10.{i // 65536}.{i // 256 % 256}.{i % 256}') for i in range(hosts)]
+        port_list = [Port(id=h.id * ports + p, host=h, port=p) for h in host_list for p in range(ports)]
+        technology_list = [Technology(id=p.id, port=p, name='nginx') for p in port_list]
+        findings: List[BaseInput] = [*host_list, *port_list, *technology_list]
+        for finding in findings:
+            finding.fingerprint = f'{finding.__class__.__name__}-{finding.id}'  # Identity without key fields
+        return findings
+
+    def test_scalability(self) -> None:
+        '''Test that get_executions_from_findings operations grow linearly with the number of findings.'''
+        operations = []
+        for hosts in [50, 500]:                                                 # 5k and 50k findings
+            findings = self.create_findings_in_memory(hosts, 50)
+            # Finding identities are calculated for each comparison and index lookup
+            with mock.patch.object(
+                Finding, 'get_identity', autospec=True, side_effect=Finding.get_identity
+            ) as identity:
+                executions = get_executions_from_findings(findings, self.tool)
+            operations.append(identity.call_count)
+            self.assertEqual(hosts, len(executions))                            # One execution for each host
+            for execution in executions:                                        # Host with its ports and technologies
+                self.assertEqual(101, len(execution))
+                self.assertTrue(all(f.host == execution[0] for f in execution[1:51]))
+                self.assertTrue(all(f.port in execution[1:51] for f in execution[51:]))
+        self.assertLessEqual(operations[1], operations[0] * 10)                 # 10 times more findings
+
+    def test_same_executions_than_legacy_planner(self) -> None:
+        '''Test that get_executions_from_findings plans the same executions than the implementation without indexes.'''
+        findings: List[BaseInput] = [self.target, TargetPort.objects.create(target=self.target, port=80)]
+        findings.append(Wordlist.objects.create(name='Wordlist', type=WordlistType.ENDPOINT, path='/some/path'))
+        for index in range(3):
+            host = self.create_finding(Host, address=f'10.10.10.{index}')
+            findings.append(host)
+            for port_number in [22, 80, 443][:index + 1]:
+                port = self.create_finding(Port, host=host, port=port_number)
+                technology = self.create_finding(Technology, port=port, name=f'Technology {port_number}')
+                findings.extend([
+                    port,
+                    self.create_finding(Path, port=port, path='/endpoint'),
+                    self.create_finding(Path, port=port, path=f'/endpoint/{index}'),
+                    technology,
+                    self.create_finding(Vulnerability, port=port, name='Port vulnerability'),
+                    self.create_finding(Vulnerability, technology=technology, name='Vulnerability', cve='CVE-2021-1'),
+                    self.create_finding(Credential, technology=technology, username=f'user{index}')
+                ])
+        findings.append(self.create_finding(Host, address='10.10.10.10'))         # Host without ports
+        for tool in [self.tool, *Tool.objects.exclude(pk=self.tool.pk)]:        # All tools with different arguments
+            self.assertEqual(
+                legacy_planner.get_executions_from_findings(findings, tool),
+                get_executions_from_findings(findings, tool),
+                tool.name
+            )
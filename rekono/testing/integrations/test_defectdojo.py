@@ -0,0 +1,180 @@
+import json
+from typing import List
+from unittest import mock
+
+import django_rq
+from defectdojo import cache
+from defectdojo import queue as defectdojo
+from defectdojo.exceptions import DefectDojoException
+from defectdojo.reporter import ReportRun, create_endpoints, report
+from django.utils import timezone
+from executions.models import DefectDojoSync, Execution
+from findings.enums import Protocol, Severity
+from findings.models import Finding, Host, Path, Port, Technology, Vulnerability
+from input_types.utils import get_references
+from projects.models import Project
+from targets.enums import TargetType
+from targets.models import Target
+from tasks.enums import Status
+from tasks.models import Task
+from testing.mocks.defectdojo import defect_dojo_error, defect_dojo_success
+from testing.test_case import RekonoTestCase
+from tools.enums import IntensityRank
+from tools.models import Configuration, Tool
+
+
+class DefectDojoTest(RekonoTestCase):
+    '''Test cases for Defect-Dojo synchronization.'''
+
+    def setUp(self) -> None:
+        '''Create initial data before run tests.'''
+        super().setUp()
+        self.nmap = Tool.objects.get(name='Nmap')
+        self.nmap.defectdojo_scan_type = None                                   # Import findings instead executions
+        self.nmap.save(update_fields=['defectdojo_scan_type'])
+        self.project = Project.objects.create(
+            name='Test', description='Test', tags=['test'],
+            defectdojo_product_id=1,
+            defectdojo_engagement_by_target=True,
+            defectdojo_synchronization=True
+        )
+        target = Target.objects.create(project=self.project, target='45.33.32.156', type=TargetType.PUBLIC_IP)
+        task = Task.objects.create(
+            target=target,
+            tool=self.nmap,
+            configuration=Configuration.objects.get(tool=self.nmap, default=True),
+            intensity=IntensityRank.NORMAL,
+            status=Status.COMPLETED,
+            start=timezone.now(),
+            end=timezone.now()
+        )
+        self.first_execution = Execution.objects.create(                        # Execution related to testing findings
+            task=task,
+            tool=task.tool,
+            configuration=task.configuration,
+            status=Status.COMPLETED,
+            start=timezone.now(),
+            end=timezone.now()
+        )
+        self.new_execution = Execution.objects.create(                          # New execution for testing
+            task=task,
+            tool=task.tool,
+            configuration=task.configuration,
+            status=Status.REQUESTED
+        )
+        host = Host.objects.create(address='45.33.32.156')
+        ssh = Port.objects.create(host=host, port=22, protocol=Protocol.TCP, service='ssh')
+        http = Port.objects.create(host=host, port=80, protocol=Protocol.TCP, service='http')
+        technology = Technology.objects.create(port=http, name='Wordpress', version='1.0.0')
+        self.all_findings: List[Finding] = [
+            host, ssh, http,
+            Path.objects.create(port=http, path='/admin', status=403),
+            Path.objects.create(port=http, path='/robots.txt', status=200),
+            technology,
+            Vulnerability.objects.create(
+                technology=technology,
+                name='Log4Shell',
+                description='Log4Shell',
+                severity=Severity.CRITICAL,
+                cve='CVE-2021-44228',
+                cwe='CWE-20'
+            )
+        ]
+        for finding in self.all_findings:
+            finding.executions.add(self.first_execution)
+
+    def test_report_findings_in_bulk(self) -> None:
+        '''Test that findings are imported in Defect-Dojo using one report, and lookups are made once by run.'''
+        run = ReportRun()
+        with mock.patch('defectdojo.api.DefectDojo.request', side_effect=defect_dojo_success) as request:
+            report(self.first_execution, self.all_findings, run)
+            report(self.new_execution, self.all_findings, run)
+        endpoints = [c.args[1] for c in request.call_args_list]
+        paths = len([f for f in self.all_findings if isinstance(f, Path)])
+        self.assertEqual(paths * 2, endpoints.count('/endpoints/'))              # Endpoints created one by one
+        self.assertEqual(2, endpoints.count('/reimport-scan/'))                 # One report for each execution
+        self.assertEqual(0, endpoints.count('/findings/'))
+        self.assertEqual(1, endpoints.count('/tests/'))                         # Lookups are made only once
+        # Defect-Dojo availability, test type lookup and test type creation
+        self.assertEqual(3, endpoints.count('/test_types/'))
+        report_file = request.call_args_list[-1].kwargs['files']['file'][1]
+        self.assertEqual(len(self.all_findings) - paths, len(json.loads(report_file)['findings']))
+        self.assertTrue(Execution.objects.get(pk=self.new_execution.id).imported_in_defectdojo)
+
+    def test_defectdojo_lookups_cache(self) -> None:
+        '''Test that Defect-Dojo lookups are shared between report runs, and removed if entities aren't found.'''
+        with mock.patch('defectdojo.api.DefectDojo.request', side_effect=defect_dojo_success):
+            report(self.first_execution, self.all_findings)                     # Lookups are saved in cache
+        with mock.patch('defectdojo.api.DefectDojo.request', side_effect=defect_dojo_success) as request:
+            report(self.new_execution, self.all_findings)
+        endpoints = [c.args[1] for c in request.call_args_list]
+        self.assertEqual(1, endpoints.count('/test_types/'))                    # Only Defect-Dojo availability
+        for endpoint in ['/tests/', '/products/1/', '/engagements/', '/engagements/1/']:
+            self.assertNotIn(endpoint, endpoints)
+        not_found = mock.MagicMock(status_code=404)                             # Test removed from Defect-Dojo
+        with mock.patch('defectdojo.api.DefectDojo.request', side_effect=defect_dojo_success) as request, \
+                mock.patch('defectdojo.api.DefectDojo.reimport_findings', side_effect=[(False, not_found), (True, {})]):
+            report(self.new_execution, self.all_findings)
+        endpoints = [c.args[1] for c in request.call_args_list]
+        self.assertEqual(1, endpoints.count('/tests/'))                         # New test is created
+        self.assertEqual(1, cache.get(cache.TEST, 1))                           # Engagement 1
+        cache.save(cache.ENGAGEMENT, 1, 1)                                      # Engagement removed from Defect-Dojo
+        cache.invalidate(cache.TEST, 1)
+        with mock.patch('defectdojo.api.DefectDojo.request', side_effect=defect_dojo_success), \
+                mock.patch('defectdojo.api.DefectDojo.create_rekono_test', return_value=(False, not_found)):
+            self.assertRaises(DefectDojoException, report, self.new_execution, self.all_findings)
+        self.assertIsNone(cache.get(cache.ENGAGEMENT, 1))
+        run = ReportRun()                                                       # Product removed from Defect-Dojo
+        run.checks[(cache.PRODUCT, 1)] = True
+        cache.save(cache.PRODUCT, 1, 1)
+        paths = [f for f in self.all_findings if isinstance(f, Path)]
+        with mock.patch('defectdojo.api.DefectDojo.create_endpoint', return_value=(False, not_found)):
+            create_endpoints(1, paths, run)
+        self.assertNotIn((cache.PRODUCT, 1), run.checks)
+        self.assertIsNone(cache.get(cache.PRODUCT, 1))
+
+    def test_defectdojo_sync_retries(self) -> None:
+        '''Test that failed Defect-Dojo synchronizations are retried with backoff, sharing lookups by batch.'''
+        defectdojo.producer(self.first_execution, self.all_findings)
+        defectdojo.producer(self.new_execution, self.all_findings)
+        with mock.patch('defectdojo.api.DefectDojo.request', side_effect=defect_dojo_error) as request:
+            defectdojo.consumer()
+        request.assert_called_once()                                            # Availability is checked only once
+        sync = DefectDojoSync.objects.get(execution=self.first_execution)
+        self.assertEqual(1, sync.attempts)
+        self.assertGreater(sync.next_attempt, timezone.now())                   # Retry is delayed
+        progress = defectdojo.get_progress()
+        self.assertEqual((2, 0), (progress['pending'], progress['failed']))
+        DefectDojoSync.objects.update(next_attempt=timezone.now(), attempts=defectdojo.MAX_ATTEMPTS - 1)
+        with mock.patch('defectdojo.api.DefectDojo.request', defect_dojo_error):
+            defectdojo.consumer()
+        progress = defectdojo.get_progress()
+        self.assertEqual((0, 2), (progress['pending'], progress['failed']))
+        self.assertEqual(2, defectdojo.retry_failed())
+        with mock.patch('defectdojo.api.DefectDojo.request', defect_dojo_success):
+            defectdojo.consumer()
+        self.assertFalse(DefectDojoSync.objects.exists())
+        self.assertEqual(2, Execution.objects.filter(imported_in_defectdojo=True).count())
+        defectdojo.producer(self.first_execution, self.all_findings)
+        with mock.patch('defectdojo.queue.report', side_effect=ValueError('Unexpected error')):
+            defectdojo.consumer()                                               # Unexpected errors are retried too
+        sync = DefectDojoSync.objects.get(execution=self.first_execution)
+        self.assertEqual((1, 'Unexpected error'), (sync.attempts, sync.last_error))
+        with mock.patch('defectdojo.queue.claim', side_effect=Exception('Database error')), \
+                mock.patch('defectdojo.queue.schedule') as schedule:
+            self.assertRaises(Exception, defectdojo.consumer)
+        schedule.assert_called_once()                                           # Retry is scheduled after errors
+        django_rq.get_queue('defectdojo-queue').empty()
+        django_rq.get_connection('defectdojo-queue').delete(defectdojo.SCHEDULED_KEY)
+
+    def test_defectdojo_backfill(self) -> None:
+        '''Test that completed executions not imported in Defect-Dojo are enqueued in bulk.'''
+        self.assertEqual(1, defectdojo.backfill([self.project.id]))            # Only the completed execution
+        self.assertEqual(0, defectdojo.backfill())                              # Execution is already enqueued
+        sync = DefectDojoSync.objects.get(execution=self.first_execution)
+        self.assertIsNone(sync.findings)
+        self.assertEqual(
+            set(get_references([f for f in self.all_findings if self.first_execution in f.executions.all()])),
+            set(get_references(defectdojo.get_findings(sync)))                  # All the execution findings
+        )
+        django_rq.get_queue('defectdojo-queue').empty()
@@ -0,0 +1,83 @@
+from smtplib import SMTPServerDisconnected
+from unittest import mock
+
+import django_rq
+from django.core import mail
+from django.core.mail import get_connection
+from django.template.loader import get_template
+from django.test import TestCase
+from email_notifications import sender
+from rq import SimpleWorker
+from rq.registry import ScheduledJobRegistry
+
+
+class EmailSenderTest(TestCase):
+    '''Test cases for email messages delivery.'''
+
+    def setUp(self) -> None:
+        '''Create initial data before run tests.'''
+        super().setUp()
+        sender.templates.clear()                                                # Remove compiled templates
+        self.queue = django_rq.get_queue('emails-queue')
+        self.queue.empty()                                                      # Clear emails queue
+        self.queue.connection.delete(sender.EMAILS_KEY)                         # Remove pending emails
+
+    def tearDown(self) -> None:
+        '''Run code after run tests.'''
+        super().tearDown()
+        self.queue.empty()                                                      # Clear emails queue
+        self.queue.connection.delete(sender.EMAILS_KEY)                         # Remove pending emails
+        registry = ScheduledJobRegistry(queue=self.queue)
+        for job_id in registry.get_job_ids():                                   # Remove scheduled retries
+            registry.remove(job_id, delete_job=True)
+
+    @mock.patch('email_notifications.sender.EMAIL_HOST', '127.0.0.1')
+    @mock.patch('email_notifications.sender.EMAIL_PORT', 25)
+    def test_send_emails(self) -> None:
+        '''Test that pending emails are sent by batches using one SMTP connection and compiled templates.'''
+        data = {'time': '2022-01-01 00:00'}
+        sender.producer(['first@rekono.com', 'second@rekono.com'], 'Login', 'user_login_notification.html', data)
+        sender.producer(['third@rekono.com'], 'Login', 'user_login_notification.html', data)
+        sender.producer([], 'Login', 'user_login_notification.html', data)     # Emails without addresses are ignored
+        self.assertEqual(2, self.queue.count)
+        with mock.patch('email_notifications.sender.get_connection', wraps=get_connection) as connection, \
+                mock.patch('email_notifications.sender.get_template', wraps=get_template) as template:
+            SimpleWorker([self.queue], connection=self.queue.connection).work(burst=True)
+        connection.assert_called_once()                                         # Only one SMTP connection
+        template.assert_called_once()                                           # Template is compiled only once
+        self.assertEqual(
+            [['first@rekono.com'], ['second@rekono.com'], ['third@rekono.com']],
+            [m.to for m in mail.outbox]                                         # One message for each recipient
+        )
+        self.assertEqual(0, self.queue.connection.llen(sender.EMAILS_KEY))
+
+    @mock.patch('email_notifications.sender.EMAIL_HOST', '127.0.0.1')
+    @mock.patch('email_notifications.sender.EMAIL_PORT', 25)
+    def test_retry_failed_emails(self) -> None:
+        '''Test that emails aren't lost if the SMTP connection fails, and invalid emails are discarded.'''
+        data = {'time': '2022-01-01 00:00'}
+        sender.producer(['first@rekono.com'], 'Login', 'user_login_notification.html', data)
+        sender.producer(['second@rekono.com'], 'Login', 'not_found.html', data)    # Template can't be rendered
+        with mock.patch('email_notifications.sender.get_connection', side_effect=Exception('Unavailable')):
+            sender.consumer()
+        self.assertEqual(1, ScheduledJobRegistry(queue=self.queue).count)       # Emails will be sent later
+        self.assertEqual(
+            [(['first@rekono.com'], 2)],                                        # Invalid email is discarded
+            [(e['addresses'], e['attempt']) for e in sender.pop_emails()]
+        )
+        sender.producer(
+            ['first@rekono.com', 'second@rekono.com', 'third@rekono.com'], 'Login', 'user_login_notification.html', data
+        )
+        connection = mock.MagicMock()                                           # SMTP session drops after one message
+        connection.__enter__.return_value.send_messages.side_effect = [1, SMTPServerDisconnected()]
+        with mock.patch('email_notifications.sender.get_connection', return_value=connection):
+            sender.consumer()
+        self.assertEqual(
+            [['second@rekono.com', 'third@rekono.com']],                        # Only addresses not reached yet
+            [e['addresses'] for e in sender.pop_emails()]
+        )
+        sender.producer(['first@rekono.com'], 'Login', 'user_login_notification.html', data)
+        with mock.patch('email_notifications.sender.MAX_ATTEMPTS', 1), \
+                mock.patch('email_notifications.sender.get_connection', side_effect=Exception('Unavailable')):
+            sender.consumer()
+        self.assertEqual(0, self.queue.connection.llen(sender.EMAILS_KEY))      # Discarded after max attempts
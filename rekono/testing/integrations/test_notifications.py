@@ -0,0 +1,91 @@
+from unittest import mock
+
+import django_rq
+from django.utils import timezone
+from executions.models import Execution
+from findings import digest
+from findings.enums import Protocol
+from findings.models import Host, Port
+from findings.queue import digest_producer, flush_digest
+from projects.models import Project
+from rq import SimpleWorker
+from rq.registry import ScheduledJobRegistry
+from targets.enums import TargetType
+from targets.models import Target
+from tasks.enums import Status
+from tasks.models import Task
+from testing.test_case import RekonoTestCase
+from tools.enums import IntensityRank
+from tools.models import Configuration, Tool
+from users.models import User
+
+
+class NotificationsDigestTest(RekonoTestCase):
+    '''Test cases for findings notifications digest.'''
+
+    def setUp(self) -> None:
+        '''Create initial data before run tests.'''
+        super().setUp()
+        self.queue = django_rq.get_queue('findings-queue')
+        self.queue.empty()                                                      # Clear findings queue
+        nmap = Tool.objects.get(name='Nmap')
+        project = Project.objects.create(name='Test', description='Test', tags=['test'])
+        target = Target.objects.create(project=project, target='45.33.32.156', type=TargetType.PUBLIC_IP)
+        self.task = Task.objects.create(
+            target=target,
+            tool=nmap,
+            configuration=Configuration.objects.get(tool=nmap, default=True),
+            intensity=IntensityRank.NORMAL,
+            status=Status.RUNNING,
+            start=timezone.now(),
+            executor=User.objects.create_superuser('rekono', 'rekono@rekono.rekono', 'rekono')
+        )
+        self.first_execution, self.second_execution = [
+            Execution.objects.create(
+                task=self.task,
+                tool=self.task.tool,
+                configuration=self.task.configuration,
+                status=Status.COMPLETED,
+                start=timezone.now(),
+                end=timezone.now()
+            ) for _ in range(2)
+        ]
+        self.host = Host.objects.create(address='45.33.32.156')
+        self.host.executions.add(self.first_execution)
+        self.ssh = Port.objects.create(host=self.host, port=22, protocol=Protocol.TCP, service='ssh')
+        self.ssh.executions.add(self.first_execution)
+        self.http = Port.objects.create(host=self.host, port=80, protocol=Protocol.TCP, service='http')
+        self.http.executions.add(self.second_execution)
+        digest.pop(self.task.id)                                                # Clear previous digest
+
+    def tearDown(self) -> None:
+        '''Run code after run tests.'''
+        super().tearDown()
+        self.queue.empty()                                                      # Clear findings queue
+        digest.pop(self.task.id)                                                # Clear pending digest
+
+    def test_notifications_digest(self) -> None:
+        '''Test that findings from multiple executions are notified in one digest when the task is completed.'''
+        with mock.patch('findings.queue.NOTIFICATIONS_DIGEST_WINDOW', 60), \
+                mock.patch('findings.digest.NOTIFICATIONS_DIGEST_WINDOW', 60), \
+                mock.patch('findings.queue.email_sender') as email_sender:
+            digest_producer(self.first_execution, [self.host, self.ssh])
+            digest_producer(self.second_execution, [self.http])
+            registry = ScheduledJobRegistry(queue=self.queue)
+            self.assertEqual(1, registry.count)                                 # Only one flush is scheduled
+            worker = SimpleWorker([self.queue], connection=self.queue.connection)
+            worker.work(burst=True)
+            email_sender.task_notifications.assert_not_called()                 # Digest window isn't finished
+            flush_digest(self.task.id)                                          # Task completion
+            worker.work(burst=True)
+            for job_id in registry.get_job_ids():
+                registry.remove(job_id, delete_job=True)
+        email_sender.task_notifications.assert_called_once()
+        emails, task_notified, executions = email_sender.task_notifications.call_args.args
+        self.assertEqual([self.task.executor.email], emails)
+        self.assertEqual(self.task.id, task_notified.id)
+        self.assertEqual(
+            [(self.first_execution.id, {self.host, self.ssh}), (self.second_execution.id, {self.http})],
+            [(e.id, set(f)) for e, f in executions]
+        )
+        self.assertEqual([], digest.pop(self.task.id))
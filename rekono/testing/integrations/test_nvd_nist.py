@@ -1,8 +1,19 @@
+import gzip
+import io
+import json
+import os
+import tempfile
 from unittest import mock
 
+import django_rq
+from django.core.management import call_command
 from django.test import TestCase
 from findings.enums import Severity
-from findings.nvd_nist import NvdNist
+from findings.models import Cve, Vulnerability
+from findings.nvd_nist import NvdNist, get_cves
+from findings.queue import ENRICHMENT_KEY, enrichment_producer
+from queues import rate_limit
+from rq import SimpleWorker
 from testing.mocks.nvd_nist import (nvd_nist_not_found,
                                     nvd_nist_success_cvss_2,
                                     nvd_nist_success_cvss_3)
@@ -44,3 +55,98 @@ class NvdNistTest(TestCase):
     def test_get_old_cve_data(self) -> None:
         '''Test get old CVE data from NVD NIST feature.'''
         self.get_cve_data(self.old_cve, Severity.HIGH)
+
+    def test_cve_cache(self) -> None:
+        '''Test that CVE information is saved in database after the first request to NVD NIST.'''
+        with mock.patch('findings.nvd_nist.NvdNist.request', side_effect=nvd_nist_success_cvss_3) as request:
+            cve = get_cves([self.cve.lower(), self.cve])[self.cve]
+            self.assertEqual(self.cve, cve.cve)
+            self.assertEqual(Severity.CRITICAL, cve.severity)
+            self.assertEqual(9, cve.cvss)
+            self.assertEqual('CWE-200', cve.cwe)
+            cve = get_cves([self.cve])[self.cve]                                # CVE obtained from database
+            self.assertEqual(Severity.CRITICAL, cve.severity)
+            self.assertEqual(1, request.call_count)
+
+    @mock.patch('findings.nvd_nist.NvdNist.request', nvd_nist_not_found)        # Mocks NVD NIST response
+    def test_cve_cache_not_found(self) -> None:
+        '''Test that not found CVEs aren't saved in database.'''
+        cve = get_cves([self.not_found_cve])[self.not_found_cve]
+        self.assertEqual(Severity.MEDIUM, cve.severity)
+        self.assertFalse(Cve.objects.filter(cve=self.not_found_cve).exists())
+
+    def test_import_feed(self) -> None:
+        '''Test import of CVE information from NVD JSON feed files, in API 2.0 and legacy 1.1 formats.'''
+        Cve.objects.create(cve=self.cve, description='outdated', severity=Severity.LOW)
+        api_feed = {
+            'vulnerabilities': [{'cve': dict(nvd_nist_success_cvss_3(), id=self.cve)}]
+        }
+        legacy_feed = {
+            'CVE_Items': [{
+                'cve': {
+                    'CVE_data_meta': {'ID': self.old_cve},
+                    'problemtype': {'problemtype_data': [{'description': [{'lang': 'en', 'value': 'CWE-79'}]}]},
+                    'description': {'description_data': [{'lang': 'en', 'value': 'legacy description'}]}
+                },
+                'impact': {'baseMetricV2': {'cvssV2': {'baseScore': 4.3}}}
+            }]
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            api_path = os.path.join(directory, 'nvdcve-api.json')
+            legacy_path = os.path.join(directory, 'nvdcve-1.1-2010.json.gz')
+            with open(api_path, 'w') as api_file:
+                json.dump(api_feed, api_file)
+            with gzip.open(legacy_path, 'wt') as legacy_file:
+                json.dump(legacy_feed, legacy_file)
+            call_command('import_nvd_feed', api_path, legacy_path, stdout=io.StringIO())
+        self.assertEqual(1, Cve.objects.filter(cve=self.cve).count())
+        cve = Cve.objects.get(cve=self.cve)                                     # Existing CVE has been updated
+        self.assertEqual('description', cve.description)
+        self.assertEqual(Severity.CRITICAL, cve.severity)
+        cve = Cve.objects.get(cve=self.old_cve)
+        self.assertEqual('legacy description', cve.description)
+        self.assertEqual('CWE-79', cve.cwe)
+        self.assertEqual(4.3, cve.cvss)
+        self.assertEqual(Severity.MEDIUM, cve.severity)
+        with mock.patch('findings.nvd_nist.NvdNist.request') as request:
+            self.assertEqual('legacy description', get_cves([self.old_cve])[self.old_cve].description)
+            request.assert_not_called()
+
+    def test_rate_limit(self) -> None:
+        '''Test that the rate limit shared by all the workers makes the requests wait when it's exceeded.'''
+        key = 'rekono:test:rate-limit'
+        django_rq.get_connection('tasks-queue').delete(key)
+        with mock.patch('queues.rate_limit.time.sleep') as sleep:
+            self.assertEqual(0, rate_limit.acquire(key, 2, 1))
+            self.assertEqual(0, rate_limit.acquire(key, 2, 1))
+            wait = rate_limit.acquire(key, 2, 1)                                # Bucket is empty
+            self.assertTrue(0 < wait <= 0.5)
+            sleep.assert_called_once_with(wait)
+        django_rq.get_connection('tasks-queue').delete(key)
+
+    def test_enrichment(self) -> None:
+        '''Test that vulnerabilities are enriched in a different stage, requesting each CVE only once.'''
+        connection = django_rq.get_connection('enrichment-queue')
+        connection.delete(ENRICHMENT_KEY)
+        queue = django_rq.get_queue('enrichment-queue')
+        queue.empty()                                                           # Clear enrichment queue
+        Cve.objects.create(cve=self.old_cve, description='cached', severity=Severity.LOW)
+        cached = Vulnerability.objects.create(name='cached', cve=self.old_cve)
+        vulnerabilities = [Vulnerability.objects.create(name=f'log4shell {i}', cve=self.cve) for i in range(3)]
+        enrichment_producer([cached, *vulnerabilities])
+        cached.refresh_from_db()                                                # Saved CVE is applied directly
+        self.assertEqual('cached', cached.description)
+        self.assertEqual(Severity.LOW, cached.severity)
+        self.assertEqual(3, connection.scard(ENRICHMENT_KEY))
+        with mock.patch('findings.nvd_nist.NvdNist.request', side_effect=Exception('NVD NIST not available')):
+            SimpleWorker([queue], connection=queue.connection).work(burst=True)
+        self.assertEqual(3, connection.scard(ENRICHMENT_KEY))                   # Vulnerabilities aren't lost
+        enrichment_producer(vulnerabilities)
+        with mock.patch('findings.nvd_nist.NvdNist.request', side_effect=nvd_nist_success_cvss_3) as request:
+            SimpleWorker([queue], connection=queue.connection).work(burst=True)
+        self.assertEqual(1, request.call_count)
+        for vulnerability in Vulnerability.objects.filter(cve=self.cve):
+            self.assertEqual('description', vulnerability.description)
+            self.assertEqual(Severity.CRITICAL, vulnerability.severity)
+            self.assertEqual('CWE-200', vulnerability.cwe)
+        self.assertEqual(0, connection.scard(ENRICHMENT_KEY))
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from unittest import mock
+
+import django_rq
+from django.test import TestCase
+from queues.worker import RekonoWorker
+from system.models import System
+from telegram.error import BadRequest, RetryAfter, TimedOut
+from telegram_bot import sender
+
+
+class TelegramSenderTest(TestCase):
+    '''Test cases for Telegram messages delivery.'''
+
+    def setUp(self) -> None:
+        '''Create initial data before run tests.'''
+        super().setUp()
+        system = System.objects.first()
+        system.telegram_bot_token = 'test'
+        system.save(update_fields=['telegram_bot_token'])
+        sender.client = None                                                    # Remove previous Telegram client
+        self.queue = django_rq.get_queue('telegram-queue')
+        self.queue.empty()                                                      # Clear Telegram queue
+        self.messages = [(1, 'first'), (2, 'second'), (3, 'third')]
+
+    def tearDown(self) -> None:
+        '''Run code after run tests.'''
+        super().tearDown()
+        sender.client = None
+        self.queue.empty()                                                      # Clear Telegram queue
+
+    @mock.patch('telegram_bot.sender.rate_limit.acquire')
+    @mock.patch('telegram_bot.sender.Bot')
+    def test_send_messages(self, bot: mock.MagicMock, acquire: mock.MagicMock) -> None:
+        '''Test that Telegram messages are sent in the worker process using the same Telegram client.'''
+        bot.return_value.token = 'test'
+        sender.send_messages(self.messages)
+        sender.send_message(4, 'fourth')
+        with mock.patch.object(
+            RekonoWorker, 'heartbeat_job', autospec=True, side_effect=RekonoWorker.heartbeat_job
+        ) as heartbeat:
+            RekonoWorker([self.queue], connection=self.queue.connection).work(burst=True)
+        self.assertEqual(4, heartbeat.call_count)                               # Heartbeat before each message
+        self.assertIsNone(sender.heartbeat)
+        bot.assert_called_once()                                                # Telegram client is reused
+        self.assertEqual(
+            [1, 2, 3, 4],
+            [c.args[0] for c in bot.return_value.send_message.call_args_list]
+        )
+        self.assertEqual(8, acquire.call_count)                                 # Chat and global rate limits
+
+    @mock.patch('telegram_bot.sender.rate_limit.acquire')
+    @mock.patch('telegram_bot.sender.Bot')
+    def test_retry_failed_messages(self, bot: mock.MagicMock, acquire: mock.MagicMock) -> None:
+        '''Test that only temporary errors are retried, together in the same job.'''
+        bot.return_value.token = 'test'
+        bot.return_value.send_message.side_effect = [None, TimedOut(), BadRequest('Invalid message')]
+        with mock.patch('telegram_bot.sender.django_rq.get_queue') as get_queue:
+            sender.consumer(messages=self.messages)
+            get_queue.return_value.enqueue_in.assert_called_once()
+            self.assertEqual(
+                {'messages': [(2, 'second')], 'attempt': 2},
+                get_queue.return_value.enqueue_in.call_args.kwargs
+            )
+            bot.return_value.send_message.side_effect = TimedOut()
+            sender.consumer(messages=[(2, 'second')], attempt=sender.MAX_ATTEMPTS)
+            get_queue.return_value.enqueue_in.assert_called_once()              # Max attempts reached
+        bot.assert_called_once()
+
+    @mock.patch('telegram_bot.sender.rate_limit.acquire')
+    @mock.patch('telegram_bot.sender.Bot')
+    def test_telegram_rate_limit(self, bot: mock.MagicMock, acquire: mock.MagicMock) -> None:
+        '''Test that pending messages are sent again after the delay required by Telegram, without waiting for it.'''
+        bot.return_value.token = 'test'
+        bot.return_value.send_message.side_effect = [None, RetryAfter(30)]
+        with mock.patch('telegram_bot.sender.django_rq.get_queue') as get_queue:
+            sender.consumer(messages=self.messages, attempt=2)
+        get_queue.return_value.enqueue_in.assert_called_once()                  # Only one job for pending messages
+        self.assertEqual(timedelta(seconds=30), get_queue.return_value.enqueue_in.call_args.args[0])
+        self.assertEqual(
+            {'messages': self.messages[1:], 'attempt': 2},                      # Same attempt
+            get_queue.return_value.enqueue_in.call_args.kwargs
+        )
+        self.assertEqual(2, bot.return_value.send_message.call_count)          # Next messages aren't sent
@@ -1,6 +1,7 @@
 import os
 import shutil
 
+from defectdojo import cache
 from django.test import TestCase
 from rekono.settings import LOGGING_DIR, REKONO_HOME, REPORTS_DIR, WORDLIST_DIR
 from system.models import System
@@ -16,6 +17,7 @@ class RekonoTestCase(TestCase):
         self.system.defect_dojo_url = 'http://127.0.0.1:8080'                   # Testing URL due to coverage reasons
         self.system.upload_files_max_mb = 1                                     # Reduce max size allowed
         self.system.save(update_fields=['defect_dojo_url', 'upload_files_max_mb'])
+        cache.clear()                                                           # Remove Defect-Dojo lookups
         for dir in [REKONO_HOME, REPORTS_DIR, WORDLIST_DIR, LOGGING_DIR]:       # Initialize directories if needed
             if not os.path.isdir(dir):
                 os.mkdir(dir)
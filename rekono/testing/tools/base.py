@@ -1,6 +1,8 @@
 import os
+import subprocess
 from typing import Any, Dict, List
 
+import django_rq
 from django.utils import timezone
 from executions.models import Execution
 from projects.models import Project
@@ -91,3 +93,25 @@ class ToolParserTest(RekonoTestCase):
             plain_output = output_file.read()
         self.tool.parse_plain_output(plain_output)
         self.check_expected_findings(expected)
+
+    def check_tool_stream_parser(self, filename: str, expected: List[Dict[str, Any]]) -> None:
+        '''Check expected findings for results obtained after parse tool report while the tool is running.
+
+        Args:
+            filename (str): Report filename to write by the tool process
+            expected (List[Dict[str, Any]]): Expected findings data. Requires the field 'model' to check finding type
+        '''
+        queue = django_rq.get_queue('findings-queue')
+        queue.empty()                                                           # Clear findings queue
+        filepath = os.path.join(self.reports_path, self.tool_name.lower().replace(' ', '_'), filename)
+        self.tool.streaming_batch_size = 1                                      # Enqueue each parsed finding
+        process = subprocess.Popen(['cp', filepath, self.tool.path_output])     # Process that writes the report
+        self.tool.stream_output(process)                                        # Parse report while process runs
+        os.remove(self.tool.path_output)
+        self.assertTrue(self.tool.output_streamed)
+        self.assertEqual(len(expected), self.tool.streamed_findings)            # All findings have been enqueued
+        self.assertEqual([], queue.jobs[0].kwargs['reported_findings'])        # Findings not notified yet
+        self.tool.process_findings()                                            # Tool execution has finished
+        self.assertEqual([], queue.jobs[-1].kwargs['findings'])                 # No findings pending to enqueue
+        self.assertEqual(self.tool.findings, queue.jobs[-1].kwargs['reported_findings'])
+        self.check_expected_findings(expected)
@@ -60,3 +60,16 @@ class GobusterParserTest(ToolParserTest):
             }
         ]
         super().check_tool_file_parser('vhost.txt', expected)
+
+    def test_dns_while_running(self) -> None:
+        '''Test to parse dns report with domains and IPs while the tool is running.'''
+        expected = [
+            {'model': OSINT, 'data': 'chat.example.com', 'data_type': DataType.DOMAIN, 'source': 'DNS'},
+            {'model': OSINT, 'data': '10.10.10.10', 'data_type': DataType.IP, 'source': 'DNS'},
+            {'model': OSINT, 'data': '10.10.10.11', 'data_type': DataType.IP, 'source': 'DNS'},
+            {'model': OSINT, 'data': 'echo.example.com', 'data_type': DataType.DOMAIN, 'source': 'DNS'},
+            {'model': OSINT, 'data': '10.10.10.10', 'data_type': DataType.IP, 'source': 'DNS'},
+            {'model': OSINT, 'data': '10.10.10.11', 'data_type': DataType.IP, 'source': 'DNS'},
+        ]
+        super().check_tool_stream_parser('dns.txt', expected)
+        self.assertIsNotNone(self.tool.findings[0].id)                          # Findings saved during execution
@@ -1,3 +1,5 @@
+from typing import Any, Dict, List
+
 from findings.enums import Severity
 from findings.models import Credential, Technology, Vulnerability
 from testing.tools.base import ToolParserTest
@@ -8,9 +10,13 @@ class NucleiParserTest(ToolParserTest):
 
     tool_name = 'Nuclei'
 
-    def test_tech_and_vulns(self) -> None:
-        '''Test to parse report with technologies and vulnerabilities.'''
-        expected = [
+    def get_tech_and_vulns(self) -> List[Dict[str, Any]]:
+        '''Get expected findings from the report with technologies and vulnerabilities.
+
+        Returns:
+            List[Dict[str, Any]]: Expected findings data
+        '''
+        return [
             {'model': Technology, 'name': 'PHP Detect', 'version': None, 'description': None, 'reference': None},
             {
                 'model': Technology,
@@ -94,4 +100,12 @@ class NucleiParserTest(ToolParserTest):
                 'context': 'DVWA Default Login'
             }
         ]
-        super().check_tool_file_parser('tech_and_vulns.json', expected)
+
+    def test_tech_and_vulns(self) -> None:
+        '''Test to parse report with technologies and vulnerabilities.'''
+        super().check_tool_file_parser('tech_and_vulns.json', self.get_tech_and_vulns())
+
+    def test_tech_and_vulns_while_running(self) -> None:
+        '''Test to parse report with technologies and vulnerabilities while the tool is running.'''
+        super().check_tool_stream_parser('tech_and_vulns.json', self.get_tech_and_vulns())
+        self.assertIsNotNone(self.tool.findings[0].id)                          # Findings saved during execution
@@ -5,7 +5,7 @@ from typing import Any
 from django.apps import AppConfig
 from django.core import management
 from django.core.management.commands import loaddata
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 
 class ToolsConfig(AppConfig):
@@ -19,6 +19,14 @@ class ToolsConfig(AppConfig):
         post_migrate.connect(self.load_tools_models, sender=self)
         # Needed here to ensure processes migration after tools migration
         post_migrate.connect(self.load_processes_models, sender=self)
+        from input_types.models import InputType
+        from tools.models import (Argument, Configuration, Input, Intensity,
+                                  Tool)
+        from tools.plans import clear_arguments_plans
+        for model in [Tool, Intensity, Configuration, Argument, Input, InputType]:
+            # Compiled arguments plans are removed when tools data change
+            post_save.connect(clear_arguments_plans, sender=model)
+            post_delete.connect(clear_arguments_plans, sender=model)
 
     def load_tools_models(self, **kwargs: Any) -> None:
         '''Load tools fixtures in database.'''
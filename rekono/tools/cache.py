@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+from typing import List, Optional, Tuple
+
+import django_rq
+from executions.models import Execution
+from redis.exceptions import RedisError
+from tools.models import Tool
+
+from rekono.settings import TOOLS_RESULTS_CACHE_TTL
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+
+def get_results_ttl(tool: Tool) -> int:
+    '''Get seconds to reuse the results of a tool execution.
+
+    Args:
+        tool (Tool): Tool
+
+    Returns:
+        int: Seconds to reuse the execution results. Zero if results can't be reused
+    '''
+    name = tool.name.lower().replace(' ', '')
+    return int(TOOLS_RESULTS_CACHE_TTL.get(name, TOOLS_RESULTS_CACHE_TTL.get('default', 0)))
+
+
+def get_results_key(execution: Execution, intensity: int, arguments: List[str]) -> str:
+    '''Get cache key of the results of a tool execution.
+
+    Args:
+        execution (Execution): Tool execution
+        intensity (int): Intensity Id applied in the execution
+        arguments (List[str]): Normalized tool arguments
+
+    Returns:
+        str: Cache key. Target is included because findings fingerprints depend on it
+    '''
+    digest = hashlib.sha256(json.dumps(arguments).encode()).hexdigest()
+    return (
+        f'rekono:execution-results:{execution.task.target_id}:{execution.tool_id}:'
+        f'{execution.configuration_id}:{intensity}:{digest}'
+    )
+
+
+def get_cached_results(key: str) -> Optional[Tuple[int, List[Tuple[str, int]]]]:
+    '''Get the results of a previous tool execution from cache.
+
+    Args:
+        key (str): Cache key
+
+    Returns:
+        Optional[Tuple[int, List[Tuple[str, int]]]]: Previous execution Id and references to its findings, or None
+    '''
+    try:
+        value = django_rq.get_connection('executions-queue').get(key)
+    except RedisError:                                                          # Cache not available
+        return None
+    if value is None:
+        return None
+    data = json.loads(value)
+    return data['execution'], [(model, id) for model, id in data['findings']]
+
+
+def save_results(key: str, ttl: int, execution: Execution, references: List[Tuple[str, int]]) -> None:
+    '''Save the results of a tool execution in cache.
+
+    Args:
+        key (str): Cache key
+        ttl (int): Seconds to keep the results
+        execution (Execution): Tool execution
+        references (List[Tuple[str, int]]): References to the findings obtained by the execution
+    '''
+    try:
+        django_rq.get_connection('executions-queue').set(
+            key,
+            json.dumps({'execution': execution.id, 'findings': references}),
+            ex=ttl
+        )
+    except RedisError:                                                          # Cache not available
+        logger.warning(f'[Tool] Results of execution {execution.id} can\'t be saved in cache')
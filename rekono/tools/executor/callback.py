@@ -1,22 +1,27 @@
 import logging
-from typing import Any
+from typing import Any, List, Tuple
 
 from django.utils import timezone
-from tools.tools.base_tool import BaseTool
+from executions.models import Execution
+from executions.queue import counters
+from findings.queue import flush_digest
 
 logger = logging.getLogger()                                                    # Rekono logger
 
 
-def tool_callback(job: Any, connection: Any, result: BaseTool, *args: Any, **kwargs: Any) -> None:
+def tool_callback(job: Any, connection: Any, result: List[Tuple[str, int]], *args: Any, **kwargs: Any) -> None:
     '''Run code after execution job success. In this case, update task information.
 
     Args:
-        job (Any): Not used.
+        job (Any): Successful execution job
         connection (Any): Not used.
-        result (BaseTool): Successful execution job result
+        result (List[Tuple[str, int]]): Not used.
     '''
-    task = result.execution.task                                                # Get task associated to the execution
-    task.status = result.execution.status                                       # Update task status
+    execution = Execution.objects.select_related('task').get(pk=job.kwargs['execution_id'])
+    task = execution.task                                                       # Get task associated to the execution
+    task.status = execution.status                                              # Update task status
     task.end = timezone.now()                                                   # Update the task end date
     task.save(update_fields=['status', 'end'])
+    counters.remove_counters(task.id)                                           # Remove task execution counters
+    flush_digest(task.id)                                                       # Notify the task digest now
     logger.info(f'[Task] Task {task.id} has been completed with {task.status} status')
@@ -0,0 +1,131 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import django_rq
+from input_types.base import BaseInput
+from redis.exceptions import RedisError
+
+from tools.models import Argument, Configuration, Input, Intensity, Tool
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+# Regex to split the formatted arguments by whitespaces taking into account the arguments between quotes
+ARGUMENTS_REGEX = re.compile(r'[^\s\'"]*[\'"][^\'"]+[\'"]|[^\'"\s]+')
+# Methods to get the input models: related model and callback target
+MODEL_METHODS = ['get_model_class', 'get_callback_model_class']
+# Version of the tools data shared by all the processes. It's incremented when tools data change
+VERSION_KEY = 'rekono:tools:version'
+
+
+class ArgumentsPlan:
+    '''Resolution plan to build the arguments of a tool configuration without database queries.'''
+
+    def __init__(self, configuration: Configuration, arguments: List[Argument]) -> None:
+        '''Arguments plan constructor. Ordered inputs and their models are loaded using only one query.
+
+        Args:
+            configuration (Configuration): Tool configuration
+            arguments (List[Argument]): Tool arguments
+        '''
+        self.template = configuration.arguments                                 # Arguments template
+        # Ordered inputs with their models, by argument Id and model method
+        self.inputs: Dict[int, Dict[str, List[Tuple[Input, BaseInput]]]] = {
+            a.id: {m: [] for m in MODEL_METHODS} for a in arguments
+        }
+        inputs = Input.objects.filter(argument__in=arguments).select_related('type').order_by('argument', 'order')
+        for input in inputs:
+            for method in MODEL_METHODS:
+                model = getattr(input.type, method)()                           # Get model from input type
+                if model:
+                    self.inputs[input.argument_id][method].append((input, model))
+
+    def get_inputs(self, argument: Argument, model_method: str) -> List[Tuple[Input, BaseInput]]:
+        '''Get ordered inputs of an argument with their models.
+
+        Args:
+            argument (Argument): Tool argument
+            model_method (str): Method to get model from argument inputs
+
+        Returns:
+            List[Tuple[Input, BaseInput]]: Ordered inputs with their models
+        '''
+        return self.inputs.get(argument.id, {}).get(model_method, [])
+
+    def split(self, command: Dict[str, str]) -> List[str]:
+        '''Format the arguments template with the built tool arguments and split them.
+
+        Args:
+            command (Dict[str, str]): Tool arguments by name
+
+        Returns:
+            List[str]: List of tool arguments to use in the tool execution
+        '''
+        return [a.replace('"', '') for a in ARGUMENTS_REGEX.findall(self.template.format(**command))]
+
+
+def get_tools_version() -> Optional[int]:
+    '''Get version of the tools data from Redis, to detect changes made by other processes.
+
+    Returns:
+        Optional[int]: Tools data version, or None if it isn't available
+    '''
+    try:
+        return int(django_rq.get_connection('executions-queue').get(VERSION_KEY) or 0)
+    except RedisError:                                                          # Version not available
+        return None
+
+
+# Compiled plans by tool, configuration, intensity and arguments. Cleared when tools data change
+plans: Dict[Tuple[Any, ...], ArgumentsPlan] = {}
+plans_version: Optional[int] = None                                             # Tools data version of the plans
+
+
+def get_arguments_plan(
+    tool: Tool,
+    configuration: Configuration,
+    intensity: Intensity,
+    arguments: List[Argument]
+) -> ArgumentsPlan:
+    '''Get the cached arguments plan for a tool configuration, or compile it if it doesn't exist. Cached plans are
+    removed if tools data have changed in any process.
+
+    Args:
+        tool (Tool): Tool
+        configuration (Configuration): Tool configuration
+        intensity (Intensity): Tool intensity
+        arguments (List[Argument]): Tool arguments
+
+    Returns:
+        ArgumentsPlan: Arguments plan
+    '''
+    global plans_version
+    version = get_tools_version()
+    if version is None or version != plans_version:                             # Plans can be outdated
+        plans.clear()
+        plans_version = version
+    key = (
+        tool.id,
+        configuration.id,
+        configuration.arguments,
+        intensity.id,
+        intensity.argument,
+        tuple(a.id for a in arguments)
+    )
+    plan = plans.get(key)
+    if not plan:
+        plan = ArgumentsPlan(configuration, arguments)
+        plans[key] = plan
+    return plan
+
+
+def clear_arguments_plans(**kwargs: Any) -> None:
+    '''Remove all the compiled arguments plans. It's executed when tools data change, and the tools data version is
+    incremented so the plans cached by other processes are removed too.'''
+    try:
+        django_rq.get_connection('executions-queue').incr(VERSION_KEY)
+    except RedisError:                                                          # Version not available
+        logger.warning('[Tool] Tools data version can\'t be incremented')
+    if plans:
+        logger.info('[Tool] Arguments plans have been removed due to changes in tools data')
+        plans.clear()
@@ -1,10 +1,12 @@
 import logging
 import os
-import re
 import shutil
 import subprocess
+import tempfile
+import time
 import uuid
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import (Any, BinaryIO, Callable, Dict, List, Optional, Set, Tuple,
+                    Union, cast)
 
 from authentications.models import Authentication
 from django.db.models import Model
@@ -15,14 +17,20 @@ from django.utils import timezone
 from executions.models import Execution
 from findings.models import Finding, Port, Vulnerability
 from findings.queue import producer
-from findings.utils import get_unique_filter
+from findings.writer import FindingsWriter
 from input_types.base import BaseInput
+from input_types.utils import (get_inputs_from_references, get_references,
+                               probe_urls)
 from targets.models import TargetPort
 from tasks.enums import Status
+from tools.cache import (get_cached_results, get_results_key, get_results_ttl,
+                         save_results)
 from tools.exceptions import ToolExecutionException
-from tools.models import Argument, Input, Intensity
+from tools.models import Argument, Input, Intensity, Tool
+from tools.plans import ArgumentsPlan, get_arguments_plan
 
-from rekono.settings import REPORTS_DIR, TESTING
+from rekono.settings import (REPORTS_DIR, TESTING, TOOLS_OUTPUT_PARSE_SIZE,
+                             TOOLS_OUTPUT_TAIL_SIZE)
 
 logger = logging.getLogger()                                                    # Rekono logger
 
@@ -32,7 +40,13 @@ class BaseTool:
 
     # Indicate if execution must continue even if error occurs during tool execution. By default False.
     ignore_exit_code = False
+    # Indicate if output lines can be parsed while the tool is running, using parse_output_line. By default False.
+    streaming_output = False
+    streaming_batch_size = 50                                                   # Max findings to parse before enqueue
+    streaming_interval = 30                                                     # Max seconds to wait before enqueue
     script = ''                                                                 # Indicate the script path to execute
+    # Installed tools by command and script, shared by all tool classes. Tools not installed are checked again
+    installations: Set[Tuple[Optional[str], str]] = set()
 
     def __init__(self, execution: Execution, intensity: Intensity, arguments: List[Argument]) -> None:
         '''Tool constructor.
@@ -52,10 +66,40 @@ class BaseTool:
         self.file_output_extension = self.tool.output_format or 'txt'           # Tool output file extension
         self.filename_output = f'{str(uuid.uuid4())}.{self.file_output_extension}'  # Tool output file name
         self.path_output = os.path.join(REPORTS_DIR, self.filename_output)      # Tool output file path
+        # Tool plain output file path. Full plain output is written here during tool execution
+        self.path_plain_output = os.path.join(REPORTS_DIR, f'{os.path.splitext(self.filename_output)[0]}.stdout')
         self.findings: List[Finding] = []                                       # Findings obtained from tool execution
+        self.findings_writer = FindingsWriter(execution)                        # Save parsed findings in bulk
+        self.output_streamed = False                                            # Output parsed during tool execution
+        self.streamed_findings = 0                                              # Findings enqueued during execution
         # Inputs used during tool execution
         # This data will be used to maintain relations between findings and previous findings always as possible
         self.findings_relations: Dict[str, BaseInput] = {}
+        self.arguments_plan: Optional[ArgumentsPlan] = None                     # Compiled arguments resolution plan
+        # Function to hand off the persisted findings to the dependent executions, if streaming hand-off is enabled
+        self.findings_handoff: Optional[Callable[[List[Finding]], None]] = None
+
+    @classmethod
+    def is_installed(cls, tool: Tool) -> bool:
+        '''Check if tool is installed in the system. Only positive results are cached by command and script, because
+        tools can be installed while workers are running.
+
+        Args:
+            tool (Tool): Tool to check
+
+        Returns:
+            bool: Indicate if tool is installed
+        '''
+        key = (tool.command, cls.script)
+        if key in BaseTool.installations:                                       # Installation already found
+            return True
+        installed = not (
+            (tool.command and shutil.which(tool.command) is None) or            # Check command installation
+            (cls.script and not os.path.isfile(cls.script))                     # Check if script exists
+        )
+        if installed:
+            BaseTool.installations.add(key)
+        return installed
 
     def check_installation(self) -> None:
         '''Check if tool is installed in the system.
@@ -63,10 +107,7 @@ class BaseTool:
         Raises:
             ToolExecutionException: Raised if tool isn't installed
         '''
-        if (
-            (self.tool.command and shutil.which(self.tool.command) is None) or  # Check command installation
-            (self.script and not os.path.isfile(self.script))                   # Check if script exists
-        ):
+        if not self.is_installed(self.tool):
             raise ToolExecutionException(f'Tool {self.tool.name} is not installed in the system')
 
     def prepare_environment(self) -> None:
@@ -176,13 +217,12 @@ class BaseTool:
         '''
         found = False
         if argument.name not in command or not command[argument.name]:          # Argument can't be added yet
-            for input in argument.inputs.order_by('order'):                     # For each argument input (ordered)
-                model = getattr(input.type, model_method)()                     # Get model from input
-                if model:                                                       # Model found
-                    # Process base inputs
-                    found, command = self.process_source(argument, input, model, source, command)
-                    if found:                                                   # Related base input found and processed
-                        break
+            # For each argument input (ordered) with model
+            for input, model in cast(ArgumentsPlan, self.arguments_plan).get_inputs(argument, model_method):
+                # Process base inputs
+                found, command = self.process_source(argument, input, model, source, command)
+                if found:                                                       # Related base input found and processed
+                    break
         return found, command
 
     def get_authentication(
@@ -227,6 +267,8 @@ class BaseTool:
         Returns:
             List[str]: List of tool arguments to use in the tool execution
         '''
+        # Get compiled plan to resolve the arguments without database queries
+        self.arguments_plan = get_arguments_plan(self.tool, self.configuration, self.intensity, self.arguments)
         command = {
             'script': self.script,                                              # Script to execute the tool
             'command': self.tool.command,                                       # Add tool command to the arguments
@@ -250,10 +292,8 @@ class BaseTool:
                     raise ToolExecutionException(f'Tool configuration requires {argument.name} argument')
                 else:                                                           # Argument is optional for the tool
                     command[argument.name] = ''                                 # Ignore this argument
-        # Format configuration arguments with the built tool arguments
-        args = self.configuration.arguments.format(**command)
-        # Split arguments by whitespaces taking into account the arguments between quotes
-        return [a.replace('"', '') for a in re.findall(r'[^\s\'"]*[\'"][^\'"]+[\'"]|[^\'"\s]+', args)]
+        # Format configuration arguments with the built tool arguments and split them
+        return self.arguments_plan.split(command)
 
     def check_arguments(self, targets: List[BaseInput], findings: List[Finding]) -> bool:
         '''Check if given resources (targets, resources and findings) lists are enough to execute the tool.
@@ -311,8 +351,21 @@ class BaseTool:
             arguments = arguments[index:]                                       # Remove environment variable from args
         return arguments, environment
 
+    def read_output_tail(self, output: BinaryIO) -> str:
+        '''Read the last part of a tool output file, to limit the output size loaded in memory and saved in database.
+
+        Args:
+            output (BinaryIO): Tool output file
+
+        Returns:
+            str: Last part of the tool output
+        '''
+        size = output.seek(0, os.SEEK_END)
+        output.seek(max(0, size - TOOLS_OUTPUT_TAIL_SIZE))
+        return output.read().decode('utf-8', errors='ignore')
+
     def tool_execution(self, arguments: List[str]) -> str:
-        '''Execute the tool.
+        '''Execute the tool. Its output is written to files during the execution instead of being kept in memory.
 
         Args:
             arguments (List[str]): Arguments to include in the tool command
@@ -321,26 +374,120 @@ class BaseTool:
             ToolExecutionException: Raised if tool execution finishes with an exit code distinct than zero
 
         Returns:
-            str: Plain output of the tool execution
+            str: Last part of the plain output of the tool execution. Full output is saved in path_plain_output
         '''
         arguments, environment = self.get_environment(arguments)                # Get environment from argument
         logger.info(f'[Tool] Running: {" ".join(arguments)}')
-        if hasattr(self, 'run_directory'):
-            process = subprocess.run(                                           # Execute the tool in directory
+        with open(self.path_plain_output, 'w+b') as stdout, tempfile.TemporaryFile(dir=REPORTS_DIR) as stderr:
+            process = subprocess.Popen(                                         # Execute the tool
                 arguments,
-                capture_output=True,
+                stdout=stdout,
+                stderr=stderr,
                 env=environment,
-                cwd=getattr(self, 'run_directory')
+                cwd=getattr(self, 'run_directory', None)                        # Execute the tool in directory if set
             )
-        else:
-            process = subprocess.run(arguments, capture_output=True, env=environment)   # Execute the tool
-        if not self.ignore_exit_code and process.returncode > 0:
-            # Execution error and ignore exit code is False
-            raise ToolExecutionException(process.stderr.decode('utf-8'))
-        return process.stdout.decode('utf-8')
+            if self.streaming_output:
+                try:
+                    self.stream_output(process)                                 # Parse output while tool is running
+                except Exception:
+                    process.kill()                                              # Tool is stopped if parsing fails
+                    process.wait()
+                    raise
+            process.wait()
+            if not self.ignore_exit_code and process.returncode > 0:
+                # Execution error and ignore exit code is False
+                raise ToolExecutionException(self.read_output_tail(stderr))
+            return self.read_output_tail(stdout)
+
+    def parse_output_lines(self, path: str, position: int, finished: bool) -> int:
+        '''Parse new lines written in the tool output since the last parsed position.
+
+        Args:
+            path (str): Tool output file path
+            position (int): Position of the first line that has not been parsed yet
+            finished (bool): Indicate if the tool has finished, so the last line is complete even without line break
+
+        Returns:
+            int: Position of the first line that has not been parsed yet
+        '''
+        if not os.path.isfile(path):                                            # Output file not created yet
+            return position
+        with open(path, 'rb') as output:
+            output.seek(position)
+            for line in output:
+                if not line.endswith(b'\n') and not finished:
+                    break                                                       # Line is still being written
+                position += len(line)
+                self.parse_output_line(line.decode('utf-8', errors='ignore'))
+        return position
+
+    def stream_output(self, process: subprocess.Popen) -> None:
+        '''Parse tool output while the tool is running, and process the parsed findings in batches.
+
+        Args:
+            process (subprocess.Popen): Tool process
+        '''
+        path = self.path_output if self.file_output_enabled else self.path_plain_output
+        position = 0
+        last_batch = time.time()
+        running = True
+        while running:
+            running = process.poll() is None
+            position = self.parse_output_lines(path, position, not running)
+            pending = len(self.findings) - self.streamed_findings
+            if (
+                pending >= self.streaming_batch_size or
+                (pending > 0 and time.time() - last_batch >= self.streaming_interval)
+            ):
+                self.process_streamed_findings()                                # Enqueue batch of findings
+                last_batch = time.time()
+            elif running:
+                time.sleep(1)
+        self.output_streamed = True
+
+    def is_output_truncated(self) -> bool:
+        '''Check if the plain output saved in database is only the last part of the full plain output.
+
+        Returns:
+            bool: Indicate if the full plain output is only available in path_plain_output
+        '''
+        # Both sizes in bytes, because the saved output is the last TOOLS_OUTPUT_TAIL_SIZE bytes of the file
+        return (
+            os.path.isfile(self.path_plain_output) and
+            os.stat(self.path_plain_output).st_size > TOOLS_OUTPUT_TAIL_SIZE
+        )
+
+    def get_plain_output(self, output: str) -> str:
+        '''Get plain output of the tool execution, to be parsed. File is only read if the output is truncated, and
+        only up to TOOLS_OUTPUT_PARSE_SIZE bytes are loaded in memory.
+
+        Args:
+            output (str): Last part of the plain output returned by the tool execution
+
+        Returns:
+            str: Full plain output, or its first complete lines if it's longer than the max size to parse
+        '''
+        if not self.is_output_truncated():
+            return output
+        with open(self.path_plain_output, 'rb') as plain_output:                # Output longer than the saved one
+            content = plain_output.read(TOOLS_OUTPUT_PARSE_SIZE + 1)
+        if len(content) > TOOLS_OUTPUT_PARSE_SIZE:
+            logger.warning(
+                f'[Tool] Only the first {TOOLS_OUTPUT_PARSE_SIZE} bytes of the {self.tool.name} output will be parsed'
+            )
+            content = content[:TOOLS_OUTPUT_PARSE_SIZE]
+            if b'\n' in content:
+                content = content[:content.rindex(b'\n') + 1]                   # Only complete lines
+        return content.decode('utf-8', errors='ignore')
+
+    def remove_plain_output(self) -> None:
+        '''Remove plain output file, unless it's linked to the execution because the output saved in database is
+        truncated.'''
+        if self.execution.output_plain_file != self.path_plain_output and os.path.isfile(self.path_plain_output):
+            os.remove(self.path_plain_output)
 
     def create_finding(self, finding_type: Model, **fields: Any) -> Finding:
-        '''Create finding from fields.
+        '''Create finding from fields. It will be saved with the rest of parsed findings using bulk queries.
 
         Args:
             finding_type (Model): Finding model
@@ -348,24 +495,11 @@ class BaseTool:
         Returns:
             Finding: Created finding entity
         '''
-        # Get unique filter for this finding model and from this fields
-        unique_filter = get_unique_filter(finding_type.key_fields, fields, self.execution.task.target)
-        finding = finding_type.objects.filter(**unique_filter).first()          # Check if finding already exists
         fields.update({
             'detected_by': self.tool,
             'last_seen': timezone.now(),
         })
-        if finding:
-            updated_fields = []
-            for field, value in fields.items():                                 # For each finding field
-                if value and value != getattr(finding, field):                  # Distinct value than the existing one
-                    setattr(finding, field, value)                              # Update existing field
-                    updated_fields.append(field)
-            if updated_fields:
-                finding.save(update_fields=updated_fields)                      # Update existing finding
-        else:                                                                   # Finding not found
-            finding = finding_type.objects.create(**fields)                     # Create new finding
-        finding.executions.add(self.execution)                                  # Link finding to the current execution
+        finding = self.findings_writer.add(finding_type, fields)               # Buffer finding to be saved later
         self.findings.append(finding)
         return finding
 
@@ -373,6 +507,30 @@ class BaseTool:
         '''Parse tool output file to create finding entities. This should be implemented by child tool classes.'''
         pass                                                                    # pragma: no cover
 
+    def parse_output(self, output: str) -> None:
+        '''Parse tool output file if exists, or tool plain output otherwise.
+
+        Args:
+            output (str): Last part of the plain output returned by the tool execution
+        '''
+        if self.file_output_enabled and os.path.isfile(self.path_output) and os.stat(self.path_output).st_size > 0:
+            # Output file exists
+            self.parse_output_file()                                            # Parse output file
+        elif self.streaming_output and self.is_output_truncated():
+            # Truncated plain output is parsed line by line from the file, so it isn't fully loaded in memory
+            self.parse_output_lines(self.path_plain_output, 0, True)
+        else:                                                                   # Output file not found
+            self.parse_plain_output(self.get_plain_output(output))              # Parse plain output
+
+    def parse_output_line(self, line: str) -> None:
+        '''Parse tool output line to create finding entities. This should be implemented by child tool classes that
+        support streaming output.
+
+        Args:
+            line (str): Tool output line
+        '''
+        pass                                                                    # pragma: no cover
+
     def parse_plain_output(self, output: str) -> None:
         '''Parse tool plain output to create finding entities. This should be implemented by child tool classes.
 
@@ -381,9 +539,14 @@ class BaseTool:
         '''
         pass                                                                    # pragma: no cover
 
-    def process_findings(self) -> None:
-        '''Set relations between parsed findings and previous findings, and send new findings to the findings queue.'''
-        for finding in self.findings:                                           # For each parsed finding
+    def set_findings_relations(self, findings: List[Finding]) -> None:
+        '''Set relations between parsed findings and previous findings.
+
+        Args:
+            findings (List[Finding]): Parsed findings
+        '''
+        self.findings_writer.flush()                                            # Save pending findings
+        for finding in findings:                                                # For each parsed finding
             if (
                 # Vulnerability with port and technology exists in saved relations
                 isinstance(finding, Vulnerability) and
@@ -392,7 +555,7 @@ class BaseTool:
             ):
                 # Remove port value because technology is more relevant
                 setattr(finding, 'port', None)
-                finding.save(update_fields=['port'])
+                self.findings_writer.update(finding, ['port'])
             for key, value in self.findings_relations.items():                  # For each saved relations
                 # Vulnerability with technology value and the current relation is with port
                 if isinstance(finding, Vulnerability) and getattr(finding, 'technology') and key == 'port':
@@ -407,8 +570,70 @@ class BaseTool:
                 ):
                     # Finding has a field that matches the current relation
                     setattr(finding, key, value)                                # Set relation between findings
-                    finding.save(update_fields=[key])
-        producer(self.execution, self.findings)                                 # Send findings to the findings queue
+                    self.findings_writer.update(finding, [key])
+
+    def process_streamed_findings(self) -> None:
+        '''Save findings parsed while the tool is running, and send them to the findings queue without notifications.'''
+        findings = self.findings[self.streamed_findings:]
+        self.set_findings_relations(findings)
+        producer(self.execution, findings, reported_findings=[])                # Send findings to the findings queue
+        self.streamed_findings = len(self.findings)
+        if self.findings_handoff:
+            self.findings_handoff(findings)                                     # Dependent executions can start now
+
+    def process_findings(self) -> None:
+        '''Set relations between parsed findings and previous findings, and send new findings to the findings queue.'''
+        findings = self.findings[self.streamed_findings:]                       # Findings not enqueued yet
+        self.set_findings_relations(findings)
+        # Findings enqueued during tool execution are notified and reported with the rest of them
+        producer(self.execution, findings, reported_findings=self.findings if self.streamed_findings else None)
+
+    def get_results_cache_key(self) -> str:
+        '''Get cache key of the execution results, using the tool arguments without execution specific paths.
+
+        Returns:
+            str: Cache key of the execution results
+        '''
+        arguments = [a.replace(self.path_output, '{output}') for a in self.command_arguments]
+        return get_results_key(self.execution, self.intensity.id, arguments)
+
+    def reuse_results(self) -> bool:
+        '''Link the findings of a previous execution with the same tool, configuration, intensity and arguments to
+        the current one, if its results are still fresh.
+
+        Returns:
+            bool: Indicate if the previous results have been reused
+        '''
+        if not get_results_ttl(self.tool):                                      # Results reuse disabled for this tool
+            return False
+        cached = get_cached_results(self.get_results_cache_key())
+        if not cached:
+            return False
+        execution_id, references = cached
+        previous = Execution.objects.filter(pk=execution_id).first()
+        findings = cast(List[Finding], get_inputs_from_references(references, self.execution.task.target_id))
+        if not previous or len(findings) != len(references):                    # Previous results have been removed
+            return False
+        findings_by_type: Dict[Any, List[Finding]] = {}
+        for finding in findings:
+            findings_by_type.setdefault(finding.__class__, []).append(finding)
+        for finding_type, typed_findings in findings_by_type.items():
+            self.findings_writer.link(finding_type, typed_findings)             # Link findings to current execution
+        self.findings = findings
+        self.execution.status = Status.COMPLETED
+        self.execution.end = timezone.now()
+        self.execution.output_file = previous.output_file
+        self.execution.output_plain = previous.output_plain
+        self.execution.save(update_fields=['status', 'end', 'output_file', 'output_plain'])
+        logger.info(f'[Tool] {len(findings)} findings reused from execution {previous.id} of {self.tool.name}')
+        producer(self.execution, findings)                                      # Send findings to the findings queue
+        return True
+
+    def cache_results(self) -> None:
+        '''Save the execution results in cache, so they can be reused by the next identical executions.'''
+        ttl = get_results_ttl(self.tool)
+        if ttl:
+            save_results(self.get_results_cache_key(), ttl, self.execution, get_references(self.findings))
 
     def on_start(self) -> None:
         '''Perform changes in Execution entity when tool execution starts.'''
@@ -458,22 +683,27 @@ class BaseTool:
         if self.path_output in stdout:
             stdout.replace(self.path_output, f'output.{self.tool.output_format}')   # Prevent information exposure
         self.execution.output_plain = stdout                                    # Save plain output
-        self.execution.save(update_fields=['status', 'end', 'output_file', 'output_plain'])
+        if self.is_output_truncated():                                          # Full plain output only in file
+            self.execution.output_plain_file = self.path_plain_output
+        self.execution.save(update_fields=['status', 'end', 'output_file', 'output_plain', 'output_plain_file'])
 
-    def run(self, targets: List[BaseInput], previous_findings: List[Finding]) -> None:
-        '''Run tool.
+    def configure(self, targets: List[BaseInput], previous_findings: List[Finding]) -> bool:
+        '''Check tool installation and build the tool arguments. Execution is skipped if any of them fails.
 
         Args:
             targets (List[BaseInput]): List of targets and resources
             previous_findings (List[Finding]): List of previous findings
+
+        Returns:
+            bool: Indicate if the tool is ready to be executed
         '''
-        self.on_start()                                                         # Start execution
         try:
             self.check_installation()                                           # Check tool installation
         except ToolExecutionException as ex:                                    # Tool installation not found
             logger.error(f'[Tool] Tool {self.tool.name} is not installed in the system. This execution will be skipped')
             self.on_skipped(str(ex))                                            # Skip execution
-            return
+            return False
+        probe_urls(targets + previous_findings)                                 # Check all required URLs at once
         try:
             # Get arguments to include in command
             self.command_arguments = self.get_arguments(targets, previous_findings)
@@ -481,7 +711,19 @@ class BaseTool:
             logger.error(f'[Tool] {str(ex)}')
             # Targets and findings aren't enough to build the command
             self.on_skipped(str(ex))                                            # Skip execution
-            return
+            return False
+        return True
+
+    def run(self, targets: List[BaseInput], previous_findings: List[Finding]) -> None:
+        '''Run tool.
+
+        Args:
+            targets (List[BaseInput]): List of targets and resources
+            previous_findings (List[Finding]): List of previous findings
+        '''
+        self.on_start()                                                         # Start execution
+        if not self.configure(targets, previous_findings) or self.reuse_results():
+            return                                                              # Skipped or previous results reused
         self.prepare_environment()                                              # Prepare environment
         self.on_running()                                                       # Run execution
         try:
@@ -494,6 +736,7 @@ class BaseTool:
             # Error during tool execution
             self.on_error(stderr=str(ex))                                       # Execution error
             self.clean_environment()                                            # Clean environment
+            self.remove_plain_output()                                          # Remove plain output
             return
         except Exception as ex:                                                 # pragma: no cover
             logger.error(f'[Tool] Unexpected error during {self.tool.name} execution')
@@ -501,14 +744,14 @@ class BaseTool:
             # Unexpected error during tool execution
             self.on_error()                                                     # Execution error
             self.clean_environment()                                            # Clean environment
+            self.remove_plain_output()                                          # Remove plain output
             return
         self.clean_environment()                                                # Clean environment
         self.on_completed(output)                                               # Completed execution
         logger.info(f'[Tool] {self.tool.name} execution has been completed')
-        if self.file_output_enabled and os.path.isfile(self.path_output) and os.stat(self.path_output).st_size > 0:
-            # Output file exists
-            self.parse_output_file()                                            # Parse output file
-        else:                                                                   # Output file not found
-            self.parse_plain_output(output)                                     # Parse plain output
+        if not self.output_streamed:                                            # Output not parsed during execution
+            self.parse_output(output)
+        self.remove_plain_output()                                              # Remove plain output if not needed
         logger.info(f'[Tool] {len(self.findings)} findings parsed from {self.tool.name} output')
         self.process_findings()                                                 # Process parsed findings
+        self.cache_results()                                                    # Results can be reused later
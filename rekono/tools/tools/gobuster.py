@@ -11,6 +11,8 @@ from tools.tools.base_tool import BaseTool
 class Gobuster(BaseTool):
     '''Gobuster tool class.'''
 
+    streaming_output = True                                                     # One result for each output line
+
     def get_arguments(self, targets: List[BaseInput], previous_findings: List[Finding]) -> List[str]:
         '''Get tool arguments for the tool command.
 
@@ -34,30 +36,37 @@ class Gobuster(BaseTool):
     def parse_output_file(self) -> None:
         '''Parse tool output file to create finding entities.'''
         with open(self.path_output, 'r', encoding='utf-8') as output_file:
-            data = output_file.readlines()                                      # Read output file
-        for line in data:                                                       # Iterate over lines
-            if ' (Status: ' in line and ') [Size: ' in line:                    # Endpoint format
-                aux = line.split(' (Status: ')
+            for line in output_file:                                            # Iterate over lines
+                self.parse_output_line(line)
+
+    def parse_output_line(self, line: str) -> None:
+        '''Parse tool output line to create finding entities.
+
+        Args:
+            line (str): Tool output line
+        '''
+        if ' (Status: ' in line and ') [Size: ' in line:                        # Endpoint format
+            aux = line.split(' (Status: ')
+            self.create_finding(
+                Path,
+                path=aux[0].strip(),
+                status=int(aux[1].split(')')[0].strip()),
+                type=PathType.ENDPOINT
+            )
+        elif ' Status: ' in line and ' [Size: ' in line:                        # VHOST format
+            vhost, status = line.replace('Found: ', '').split(' Status: ')
+            if status.split(' [')[0].strip().startswith('2'):                   # Create only VHOST with status 2XX
+                if '://' in vhost:
+                    vhost = vhost.split('://')[1]                               # Remove schema from VHOST URL
                 self.create_finding(
-                    Path,
-                    path=aux[0].strip(),
-                    status=int(aux[1].split(')')[0].strip()),
-                    type=PathType.ENDPOINT
+                    OSINT,
+                    data=vhost.strip(),
+                    data_type=DataType.VHOST,
+                    source='Enumeration'
                 )
-            elif ' Status: ' in line and ' [Size: ' in line:                    # VHOST format
-                vhost, status = line.replace('Found: ', '').split(' Status: ')
-                if status.split(' [')[0].strip().startswith('2'):               # Create only VHOST with status 2XX
-                    if '://' in vhost:
-                        vhost = vhost.split('://')[1]                           # Remove schema from VHOST URL
-                    self.create_finding(
-                        OSINT,
-                        data=vhost.strip(),
-                        data_type=DataType.VHOST,
-                        source='Enumeration'
-                    )
-            elif ' [' in line and ']' in line:                                  # Subdomain format
-                subdomain, addresses = line.replace('Found: ', '').split(' [')  # Get subdomains and IP addresses
-                ips = addresses.replace(']', '').split(',')
-                self.create_finding(OSINT, data=subdomain.strip(), data_type=DataType.DOMAIN, source='DNS')
-                for ip in ips:
-                    self.create_finding(OSINT, data=ip.strip(), data_type=DataType.IP, source='DNS')
+        elif ' [' in line and ']' in line:                                      # Subdomain format
+            subdomain, addresses = line.replace('Found: ', '').split(' [')      # Get subdomains and IP addresses
+            ips = addresses.replace(']', '').split(',')
+            self.create_finding(OSINT, data=subdomain.strip(), data_type=DataType.DOMAIN, source='DNS')
+            for ip in ips:
+                self.create_finding(OSINT, data=ip.strip(), data_type=DataType.IP, source='DNS')
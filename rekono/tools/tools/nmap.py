@@ -230,7 +230,7 @@ class Nmap(BaseTool):
                     protocol if '[dangerous' not in protocol else protocol.split('[dangerous', 1)[0].strip()
                 )
             technology.description = f'Protocols: {", ".join(protocols)}'
-            technology.save(update_fields=['description'])
+            self.findings_writer.update(technology, ['description'])
 
     def parse_nse_scripts(
         self,
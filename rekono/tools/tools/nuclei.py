@@ -10,11 +10,22 @@ from tools.tools.base_tool import BaseTool
 class Nuclei(BaseTool):
     '''Nuclei tool class.'''
 
+    streaming_output = True                                                     # Output file in JSON Lines format
+
     def parse_output_file(self) -> None:
         '''Parse tool output file to create finding entities.'''
         with open(self.path_output, 'r', encoding='utf-8') as output_file:
-            report = [json.loads(line) for line in output_file if line]         # Read output file
-        for item in report:
+            for line in output_file:                                            # Read output file
+                self.parse_output_line(line)
+
+    def parse_output_line(self, line: str) -> None:
+        '''Parse tool output line to create finding entities.
+
+        Args:
+            line (str): Tool output line
+        '''
+        if line.strip():
+            item = json.loads(line)
             name = item.get('info', {}).get('name')
             extracted_results = item.get('extracted-results', [])
             if extracted_results:
@@ -1,5 +1,33 @@
 import importlib
-from typing import Any
+import inspect
+import logging
+import pkgutil
+from typing import Any, Dict
+
+from tools import tools as tools_package
+from tools.models import Tool
+from tools.tools.base_tool import BaseTool
+
+logger = logging.getLogger()                                                    # Rekono logger
+
+tools_classes: Dict[str, Any] = {}                                              # Tool classes by normalized name
+
+
+def get_tools_classes() -> Dict[str, Any]:
+    '''Get all tool classes by normalized name. Tool modules are only imported the first time.
+
+    Returns:
+        Dict[str, Any]: Tool classes by name in lower case and without whitespaces
+    '''
+    if not tools_classes:
+        for module_info in pkgutil.iter_modules(tools_package.__path__):        # For each tool module
+            # nosemgrep: python.lang.security.audit.non-literal-import.non-literal-import
+            tools_module = importlib.import_module(f'{tools_package.__name__}.{module_info.name}')
+            for _, tool_class in inspect.getmembers(tools_module, inspect.isclass):
+                # Tool class defined in this module
+                if issubclass(tool_class, BaseTool) and tool_class.__module__ == tools_module.__name__:
+                    tools_classes[tool_class.__name__.lower()] = tool_class
+    return tools_classes
 
 
 def get_tool_class_by_name(name: str) -> Any:
@@ -11,12 +39,14 @@ def get_tool_class_by_name(name: str) -> Any:
     Returns:
         Any: Tool class
     '''
-    try:
-        # nosemgrep: python.lang.security.audit.non-literal-import.non-literal-import
-        tools_module = importlib.import_module(f'tools.tools.{name.lower().replace(" ", "_")}')   # Import tool module
-        # Get tool class
-        tool_class = getattr(tools_module, name[0].upper() + name[1:].lower().replace(' ', ''))
-    except (AttributeError, ModuleNotFoundError):                               # Error during import
-        tools_module = importlib.import_module('tools.tools.base_tool')         # Get base tool module
-        tool_class = getattr(tools_module, 'BaseTool')                          # Get base tool class
-    return tool_class
+    # Get tool class or base tool class if not found
+    return get_tools_classes().get(name.lower().replace(' ', ''), BaseTool)
+
+
+def load_tools() -> None:
+    '''Import all tool classes and check tools installation, so it's not needed for each tool execution.'''
+    for tool in Tool.objects.all():                                             # For each tool
+        if get_tool_class_by_name(tool.name).is_installed(tool):
+            logger.info(f'[Tool] Tool {tool.name} is installed in the system')
+        else:
+            logger.warning(f'[Tool] Tool {tool.name} is not installed in the system')